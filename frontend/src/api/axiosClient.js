@@ -141,6 +141,17 @@ export const routeAPI = {
       console.error('Failed to save route:', error);
       throw error;
     }
+  },
+
+  // Save offline-stored routes in one request (each with its own idempotency_key)
+  saveRoutesBulk: async (routes) => {
+    try {
+      const response = await axiosClient.post('api/routen/speichern/bulk/', { routes });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to save routes:', error);
+      throw error;
+    }
   }
 };
 
@@ -157,25 +168,35 @@ export const profileAPI = {
   }
 };
 
+// Master data catalog: loaded once per page session, the browser cache revalidates it via ETag
+let catalogPromise = null;
+
+export const loadCatalog = () => {
+  if (!catalogPromise) {
+    catalogPromise = axiosClient
+      .get('api/catalog/')
+      .then((response) => response.data)
+      .catch((error) => {
+        catalogPromise = null;
+        throw error;
+      });
+  }
+  return catalogPromise;
+};
+
 // Data API for parkings, stadiums, etc.
 export const dataAPI = {
-  getParkings: async () => {
-    const response = await axiosClient.get('api/parkplatz/');
-    return response.data;
-  },
+  getParkings: async () => (await loadCatalog()).parkplaetze,
 
-  getStadiums: async () => {
-    const response = await axiosClient.get('api/stadion/');
-    return response.data;
-  },
+  getStadiums: async () => (await loadCatalog()).stadien,
 
-  getClubs: async () => {
-    const response = await axiosClient.get('api/verein/');
-    return response.data;
-  },
+  getClubs: async () => (await loadCatalog()).vereine,
 
-  getRoutes: async () => {
-    const response = await axiosClient.get('api/routen/');
+  // Cursor-paginiert: { next, previous, results } - für die nächste Seite den Cursor aus "next" übergeben
+  getRoutes: async (cursor = null, pageSize = 20) => {
+    const response = await axiosClient.get('api/routen/', {
+      params: { page_size: pageSize, ...(cursor ? { cursor } : {}) }
+    });
     return response.data;
   }
 };
@@ -31,35 +31,15 @@ const DashboardPage = () => {
         const profilRes = await axiosClient.get("api/profil/");
         setProfil(profilRes.data);
 
-        // Routen-Statistiken laden
+        // Routen-Statistiken inkl. der letzten 5 Routen laden (serverseitig berechnet)
         try {
-          const routesRes = await axiosClient.get("api/routen/");
-          const routes = routesRes.data || [];
-          setRecentRoutes(routes.slice(0, 5)); // Letzte 5 Routen
-          
-          // Echte Statistiken berechnen
-          if (routes.length > 0) {
-            const totalMinutes = routes.reduce((sum, r) => sum + (r.dauer_minuten || 0), 0);
-            const avgDur = totalMinutes / routes.length;
-            
-            // Häufigsten Parkplatz finden
-            const parkingCounts = {};
-            routes.forEach(route => {
-              if (route.parkplatz?.name) {
-                parkingCounts[route.parkplatz.name] = (parkingCounts[route.parkplatz.name] || 0) + 1;
-              }
-            });
-            
-            const mostUsedParking = Object.keys(parkingCounts).length > 0 
-              ? Object.keys(parkingCounts).reduce((a, b) => parkingCounts[a] > parkingCounts[b] ? a : b)
-              : null;
-            
-            setStats({
-              totalRoutes: routes.length,
-              avgDuration: Math.round(avgDur),
-              favoriteParking: mostUsedParking
-            });
-          }
+          const statsRes = await axiosClient.get("api/dashboard-stats/");
+          setRecentRoutes(statsRes.data?.recent_routes || []);
+          setStats({
+            totalRoutes: statsRes.data?.total_routes || 0,
+            avgDuration: statsRes.data?.avg_duration_minutes || 0,
+            favoriteParking: statsRes.data?.favorite_parking || null
+          });
         } catch (routeError) {
           console.log("Routen konnten nicht geladen werden:", routeError);
           // Leere Werte setzen statt Fehler
@@ -290,7 +270,7 @@ const DashboardPage = () => {
                           <div className="flex items-center space-x-4 text-sm text-gray-600">
                             <span className="flex items-center">
                               <Car className="w-4 h-4 mr-1" />
-                              {route.parkplatz?.name || "Parkplatz"}
+                              {route.parkplatz_name || "Parkplatz"}
                             </span>
                             <span className="flex items-center">
                               <Clock className="w-4 h-4 mr-1" />
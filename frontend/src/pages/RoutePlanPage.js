@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useMemo } from "react";
 import { 
   MapPin, 
   Navigation, 
@@ -137,7 +137,8 @@ const RoutePlanPage = () => {
     try {
       setLoadingStage("Verkehrsdaten werden analysiert...");
       
-      const res = await axiosClient.post("api/routen-vorschlag/", {
+      // Kompakte Antwort: weitere Parkplätze ohne Polylines/Navigation, Details beim Anklicken
+      const res = await axiosClient.post("api/routen-vorschlag/?view=compact", {
         start_adresse: startAdresse,
       });
 
@@ -198,10 +199,35 @@ const RoutePlanPage = () => {
     setFehlerMeldung("");
   };
 
-  const handleParkplatzKlick = (v) => {
+  // Polylines und Navigationslinks eines kompakt gelieferten Parkplatzes nachladen
+  const ladeVorschlagDetails = async (v) => {
+    if (v.polyline_auto || !ergebnis?.vorschlag_id) {
+      return v;
+    }
+    try {
+      const res = await axiosClient.get(
+        `api/routen-vorschlag/${ergebnis.vorschlag_id}/${v.parkplatz.id}/`
+      );
+      const vollstaendig = res.data;
+      setAlleVorschlaege((alle) =>
+        alle.map((x) => (x.parkplatz.id === vollstaendig.parkplatz.id ? vollstaendig : x))
+      );
+      return vollstaendig;
+    } catch (err) {
+      console.error("Fehler beim Laden der Parkplatz-Details:", err);
+      return v;
+    }
+  };
+
+  const handleParkplatzKlick = async (auswahl) => {
     // Sofort Fokus setzen für bessere Responsivität
-    setFokusParkplatz([v.parkplatz.latitude, v.parkplatz.longitude]);
-    setAktiverParkplatz(v);
+    setFokusParkplatz([auswahl.parkplatz.latitude, auswahl.parkplatz.longitude]);
+    setAktiverParkplatz(auswahl);
+
+    const v = await ladeVorschlagDetails(auswahl);
+    if (v !== auswahl) {
+      setAktiverParkplatz(v);
+    }
     
     // Route-Daten aktualisieren
     if (v?.polyline_auto) {
@@ -215,6 +241,12 @@ const RoutePlanPage = () => {
     setTransitCoords(polylineAlt ? decodePolyline(polylineAlt) : []);
   };
 
+  // Ein Schlüssel pro angezeigter Route: Doppel-Tap oder Retry speichert sie nur einmal
+  const speicherSchluessel = useMemo(
+    () => `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`,
+    [aktiverParkplatz?.parkplatz.id, startAdresse]
+  );
+
   const handleSaveRoute = async () => {
     const route = aktiverParkplatz;
     if (!route || !route.parkplatz || !stadionId) {
@@ -235,6 +267,7 @@ const RoutePlanPage = () => {
         stadion_id: stadionId,
         parkplatz_id: route.parkplatz.id,
         route_url: null,
+        idempotency_key: speicherSchluessel,
       });
       
       alert("Route erfolgreich gespeichert! Sie finden sie in Ihrem Dashboard.");
@@ -20,6 +20,31 @@ GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 # GRAPH_HOPPER_API_KEY = os.getenv("GRAPH_HOPPER_API_KEY")
 OPENWEATHERMAP_KEY = os.getenv("OPENWEATHERMAP_KEY")
 OPENAI_API_KEY = os.getenv("OPEN_AI_KEY")
+# Basis-URLs der externen APIs - überschreibbar für lokale Stand-ins (benchmark_routes, standin_apis)
+GOOGLE_MAPS_API_BASE_URL = os.getenv("GOOGLE_MAPS_API_BASE_URL", "https://maps.googleapis.com/maps/api")
+OPENWEATHERMAP_API_BASE_URL = os.getenv("OPENWEATHERMAP_API_BASE_URL", "https://api.openweathermap.org/data/2.5")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = offizieller Endpoint
+DORTMUND_API_URL = os.getenv(
+    "DORTMUND_API_URL", "https://open-data.dortmund.de/api/explore/v2.1/catalog/datasets/parkhauser/records"
+)
+# Verzeichnis für den worker-übergreifenden Metrik-Austausch (/metrics)
+METRICS_DIR = os.getenv("METRICS_DIR")
+# Tracing: OTLP/JSON Export in Datei und/oder an einen Collector (z.B. http://localhost:4318/v1/traces)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "True") == "True"
+TRACING_EXPORT_FILE = os.getenv("TRACING_EXPORT_FILE")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT")
+# Sampling-Profiler: Anteil zufällig profilierter Requests (0-1) und Ablage der Profile
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+# Dauerhafter Performance-Store (gzip-JSONL-Segmente pro Worker) für performance_report
+PERFORMANCE_STORE_ENABLED = os.getenv("PERFORMANCE_STORE_ENABLED", "True") == "True"
+PERFORMANCE_STORE_DIR = os.getenv("PERFORMANCE_STORE_DIR")
+# Record-and-Replay: Ablage der Upstream-Kassetten (X-Record-Cassette, replay_cassette)
+CASSETTE_DIR = os.getenv("CASSETTE_DIR")
+# Wie oft (Sekunden) jeder Worker den Versionsstempel des Stammdaten-Katalogs prüft
+KATALOG_PRUEFINTERVALL_SEKUNDEN = float(os.getenv("KATALOG_PRUEFINTERVALL_SEKUNDEN", "5"))
+# Browser-Cache der Katalog-Endpoints (Sekunden); danach Revalidierung per ETag
+KATALOG_CACHE_MAX_AGE = int(os.getenv("KATALOG_CACHE_MAX_AGE", "60"))
 print(f"🔍 DEBUG: OPENAI_API_KEY value = '{OPENAI_API_KEY}' (type: {type(OPENAI_API_KEY)})")
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,6 +79,11 @@ INSTALLED_APPS = [
 CORS_ALLOW_ALL_ORIGINS = True # Allow all origins for development purposes
 
 MIDDLEWARE = [
+    'parkmanagement.middleware.RequestMetricsMiddleware',
+    'parkmanagement.middleware.QueryInstrumentationMiddleware',
+    'parkmanagement.middleware.TracingMiddleware',
+    'parkmanagement.middleware.ProfilingMiddleware',
+    'parkmanagement.middleware.CassetteMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -141,4 +171,14 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson statt json (Fallback auf die DRF-Implementierung, wenn orjson fehlt)
+    'DEFAULT_RENDERER_CLASSES': (
+        'parkmanagement.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'parkmanagement.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matchroute.settings')
 
 application = get_wsgi_application()
+
+# Stammdaten-Katalog beim Worker-Start laden, damit der erste Request ihn nicht aus der DB aufbaut
+from parkmanagement.catalog import Katalog  # noqa: E402
+
+Katalog.vorladen()
@@ -1,25 +1,51 @@
 # parkmanagement/async_client.py
 
 import asyncio
+import contextvars
 import aiohttp
 import logging
+import math
 from typing import List, Dict, Any, Optional, Tuple
 from django.conf import settings
 from concurrent.futures import ThreadPoolExecutor
 import time
+from datetime import datetime
+
+from .deadline import Deadline, DeadlineExceeded, restzeit
+from .performance_monitor import performance_monitor
+from .metrics import track_upstream
+from .upstream import get_json_async
 
 logger = logging.getLogger(__name__)
 
+# Anteil am verbleibenden Budget pro Batch: die Auto-Routen dürfen die Weiterreise nicht verdrängen
+BATCH_BUDGET_ANTEIL = {"driving": 0.5, "transit": 0.5, "walking": 1.0}
+
+# Schätzung der Fußweg-Dauer ohne Walking-Route (Luftlinie mal Umwegfaktor, 4,8 km/h)
+GEHWEG_UMWEGFAKTOR = 1.3
+GEHGESCHWINDIGKEIT_KMH = 4.8
+
+
+def _geschaetzte_gehzeit_minuten(parkplatz, stadion) -> int:
+    lat1, lng1 = math.radians(float(parkplatz.latitude)), math.radians(float(parkplatz.longitude))
+    lat2, lng2 = math.radians(float(stadion.latitude)), math.radians(float(stadion.longitude))
+    # Haversine wie DortmundParkingData._calculate_distance
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    km = 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return math.ceil(km * GEHWEG_UMWEGFAKTOR / GEHGESCHWINDIGKEIT_KMH * 60)
+
+
 class AsyncGoogleMapsClient:
     """
     Hochperformanter asynchroner Google Maps API Client
     Für Parallelisierung von API-Calls zur drastischen Performance-Verbesserung
     """
     
-    def __init__(self):
+    def __init__(self, deadline: Optional[Deadline] = None):
         self.api_key = settings.GOOGLE_MAPS_API_KEY
-        self.base_url = "https://maps.googleapis.com/maps/api"
+        self.base_url = settings.GOOGLE_MAPS_API_BASE_URL
         self.session = None
+        self.deadline = deadline
         
     async def __aenter__(self):
         """Async Context Manager - Session öffnen"""
@@ -31,7 +57,7 @@ class AsyncGoogleMapsClient:
         )
         
         timeout = aiohttp.ClientTimeout(
-            total=30,  # Gesamt-Timeout
+            total=restzeit(self.deadline, 30),  # Gesamt-Timeout, begrenzt durch das Request-Budget
             connect=10,  # Verbindungs-Timeout
             sock_read=15  # Read-Timeout
         )
@@ -62,28 +88,50 @@ class AsyncGoogleMapsClient:
         if not requests:
             return []
         
+        mode = requests[0].get("mode", "driving")
+        try:
+            batch_timeout = restzeit(self.deadline, 30, BATCH_BUDGET_ANTEIL.get(mode, 1.0))
+        except DeadlineExceeded:
+            logger.warning(f"⏰ Zeitbudget aufgebraucht - überspringe {len(requests)} Google Directions Requests")
+            return [None] * len(requests)
+        
         logger.info(f"🔄 Starte {len(requests)} parallele Google Directions Requests")
         start_time = time.time()
         
-        # Alle Requests parallel ausführen
-        tasks = []
-        for i, request in enumerate(requests):
-            task = asyncio.create_task(
-                self._single_directions_request(request, request_id=i)
-            )
-            tasks.append(task)
-        
-        # Auf alle Ergebnisse warten
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Eigener Span pro Batch - die einzelnen HTTP-Calls hängen als Kinder darunter
+        with performance_monitor.measure_operation(
+            f"google_directions_{mode}_batch", {"mode": mode, "batch_size": len(requests)}
+        ) as operation:
+            # Alle Requests parallel ausführen - jeder Task erbt den Kontext
+            # (und damit Performance-Session und Batch-Span) des aufrufenden Requests
+            tasks = []
+            for i, request in enumerate(requests):
+                task = asyncio.create_task(
+                    self._single_directions_request(request, request_id=i)
+                )
+                tasks.append(task)
+            
+            # Auf alle Ergebnisse warten - höchstens bis zum Ende des Request-Budgets
+            done, pending = await asyncio.wait(tasks, timeout=batch_timeout)
+            
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Abgebrochene Tasks beenden, damit ihre Spans vor dem Batch-Span schließen
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(f"⏰ {len(pending)} Requests nach Ablauf des Zeitbudgets abgebrochen")
+            operation["details"]["cancelled"] = len(pending)
         
-        # Exceptions handhaben
+        # Exceptions und abgebrochene Requests handhaben
         processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"❌ Request {i} fehlgeschlagen: {result}")
+        for i, task in enumerate(tasks):
+            if task in pending:
+                processed_results.append(None)
+            elif task.exception() is not None:
+                logger.error(f"❌ Request {i} fehlgeschlagen: {task.exception()}")
                 processed_results.append(None)
             else:
-                processed_results.append(result)
+                processed_results.append(task.result())
         
         duration = time.time() - start_time
         success_count = sum(1 for r in processed_results if r is not None)
@@ -122,9 +170,14 @@ class AsyncGoogleMapsClient:
             })
         
         try:
-            async with self.session.get(url, params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
+            with performance_monitor.measure_operation(
+                f"google_directions_{params['mode']}_request",
+                {"request_id": request_id, "parking_name": request_data.get("parking_name")}
+            ), track_upstream(
+                "google_directions", params["mode"], request_key=f"{params['origin']}|{params['destination']}"
+            ) as call:
+                data = await get_json_async(self.session, "google_directions", params["mode"], url, params)
+                call["error"] = data["status"] != "OK"
                 
                 if data["status"] == "OK" and data["routes"]:
                     route = data["routes"][0]
@@ -172,71 +225,17 @@ class ParallelRouteCalculator:
     """
     
     @staticmethod
-    async def calculate_all_parking_routes(start_adresse: str, parkplaetze: List, stadion) -> List[Dict[str, Any]]:
+    def _kombiniere_ergebnisse(start_adresse: str, parkplaetze: List, stadion,
+                               driving_results: List[Optional[Dict[str, Any]]],
+                               transit_results: List[Optional[Dict[str, Any]]],
+                               walking_results: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """
-        🎯 HAUPTFUNKTION: Alle Parkplatz-Routen parallel berechnen
-        
-        Reduziert 21 serielle API-Calls auf 3 parallele Batches:
-        - Batch 1: Alle Auto-Routen (Start → Parkplätze)
-        - Batch 2: Alle Transit-Routen (Parkplätze → Stadion)  
-        - Batch 3: Alle Walking-Routen (Parkplätze → Stadion)
+        Kombiniert die Batch-Ergebnisse pro Parkplatz zu Routenvorschlägen.
+        Reine Funktion ohne I/O - läuft pro Request für jeden Parkplatz (siehe benchmark_micro).
         """
+        from .utils import berechne_realistische_verkehrsbewertung, generiere_google_maps_navigation_link
         
-        if not parkplaetze:
-            return []
-        
-        logger.info(f"🚀 Starte parallele Berechnung für {len(parkplaetze)} Parkplätze")
-        
-        async with AsyncGoogleMapsClient() as client:
-            
-            # 1. BATCH 1: Alle Auto-Routen parallel (Start → Parkplätze)
-            driving_requests = []
-            for i, parkplatz in enumerate(parkplaetze):
-                driving_requests.append({
-                    "origin": start_adresse,
-                    "destination": f"{parkplatz.latitude},{parkplatz.longitude}",
-                    "mode": "driving",
-                    "departure_time": "now",
-                    "parking_index": i,
-                    "parking_id": parkplatz.id,
-                    "parking_name": parkplatz.name
-                })
-            
-            logger.info(f"📡 Batch 1: {len(driving_requests)} Auto-Routen parallel")
-            driving_results = await client.calculate_directions_batch(driving_requests)
-            
-            # 2. BATCH 2: Alle Transit-Routen parallel (Parkplätze → Stadion)
-            transit_requests = []
-            for i, parkplatz in enumerate(parkplaetze):
-                transit_requests.append({
-                    "origin": f"{parkplatz.latitude},{parkplatz.longitude}",
-                    "destination": f"{stadion.latitude},{stadion.longitude}",
-                    "mode": "transit",
-                    "departure_time": "now",
-                    "parking_index": i,
-                    "parking_id": parkplatz.id,
-                    "parking_name": parkplatz.name
-                })
-            
-            logger.info(f"🚌 Batch 2: {len(transit_requests)} Transit-Routen parallel")
-            transit_results = await client.calculate_directions_batch(transit_requests)
-            
-            # 3. BATCH 3: Alle Walking-Routen parallel (Parkplätze → Stadion)
-            walking_requests = []
-            for i, parkplatz in enumerate(parkplaetze):
-                walking_requests.append({
-                    "origin": f"{parkplatz.latitude},{parkplatz.longitude}",
-                    "destination": f"{stadion.latitude},{stadion.longitude}",
-                    "mode": "walking",
-                    "parking_index": i,
-                    "parking_id": parkplatz.id,
-                    "parking_name": parkplatz.name
-                })
-            
-            logger.info(f"🚶 Batch 3: {len(walking_requests)} Walking-Routen parallel")
-            walking_results = await client.calculate_directions_batch(walking_requests)
-        
-        # 4. ERGEBNISSE KOMBINIEREN
+        jetzt = datetime.now()
         combined_results = []
         
         for i, parkplatz in enumerate(parkplaetze):
@@ -255,21 +254,21 @@ class ParallelRouteCalculator:
             if walking_result:
                 weiterreise_optionen.append(("walking", walking_result["dauer_minuten"]))
             
-            if not weiterreise_optionen:
-                logger.warning(f"⚠️ Keine Weiterreise-Option für {parkplatz.name}")
-                continue
+            # Ohne Transit-/Walking-Route (z.B. Zeitbudget aufgebraucht) bleibt der Parkplatz
+            # mit geschätztem Fußweg im Ergebnis, statt ganz zu fehlen
+            weiterreise_geschaetzt = not weiterreise_optionen
+            if weiterreise_geschaetzt:
+                logger.warning(f"⚠️ Keine Weiterreise-Route für {parkplatz.name} - Fußweg geschätzt")
+                weiterreise_optionen.append(("walking", _geschaetzte_gehzeit_minuten(parkplatz, stadion)))
             
             beste_methode, beste_zeit = min(weiterreise_optionen, key=lambda x: x[1])
             
             # Verkehrsbewertung berechnen
-            from .utils import berechne_realistische_verkehrsbewertung, generiere_google_maps_navigation_link
-            from datetime import datetime
-            
             normal_sekunden = driving_result["dauer_sekunden"]
             traffic_sekunden = driving_result.get("dauer_traffic_sekunden", normal_sekunden)
             
             bewertung, kommentar = berechne_realistische_verkehrsbewertung(
-                normal_sekunden, traffic_sekunden, datetime.now()
+                normal_sekunden, traffic_sekunden, jetzt
             )
             
             # Navigation Links
@@ -283,7 +282,7 @@ class ParallelRouteCalculator:
             
             # Walking Navigation (falls Walking beste Option)
             walking_nav = None
-            if beste_methode == "walking" and walking_result:
+            if beste_methode == "walking":
                 walking_nav = generiere_google_maps_navigation_link(
                     f"{parkplatz.latitude},{parkplatz.longitude}",
                     stadion.latitude,
@@ -309,12 +308,13 @@ class ParallelRouteCalculator:
                 # Transit/Walking Daten
                 "dauer_transit": transit_result["dauer_minuten"] if transit_result else None,
                 "polyline_transit": transit_result["polyline"] if transit_result else None,
-                "dauer_walking": walking_result["dauer_minuten"] if walking_result else None,
+                "dauer_walking": walking_result["dauer_minuten"] if walking_result else (beste_zeit if weiterreise_geschaetzt else None),
                 "polyline_walking": walking_result["polyline"] if walking_result else None,
                 "walking_navigation": walking_nav,
                 
                 # Beste Option
                 "beste_methode": beste_methode,
+                "weiterreise_geschaetzt": weiterreise_geschaetzt,
                 "gesamtzeit": driving_result.get("dauer_traffic_minuten", driving_result["dauer_minuten"]) + beste_zeit,
                 
                 # Placeholder für Live-Daten (wird später ergänzt)
@@ -324,12 +324,89 @@ class ParallelRouteCalculator:
             
             combined_results.append(route_result)
         
+        return combined_results
+    
+    @staticmethod
+    async def calculate_all_parking_routes(start_adresse: str, parkplaetze: List, stadion, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """
+        🎯 HAUPTFUNKTION: Alle Parkplatz-Routen parallel berechnen
+        
+        Reduziert 21 serielle API-Calls auf 3 parallele Batches:
+        - Batch 1: Alle Auto-Routen (Start → Parkplätze)
+        - Batch 2: Alle Transit-Routen (Parkplätze → Stadion)  
+        - Batch 3: Alle Walking-Routen (Parkplätze → Stadion)
+        
+        Jeder Batch bekommt einen Anteil des verbleibenden Budgets (BATCH_BUDGET_ANTEIL).
+        Läuft das Zeitbudget ab, werden verbleibende Batches übersprungen und
+        die bis dahin vorliegenden Ergebnisse kombiniert - Parkplätze ohne
+        Weiterreise-Route mit geschätztem Fußweg.
+        """
+        
+        if not parkplaetze:
+            return []
+        
+        logger.info(f"🚀 Starte parallele Berechnung für {len(parkplaetze)} Parkplätze")
+        
+        async with AsyncGoogleMapsClient(deadline=deadline) as client:
+            
+            # 1. BATCH 1: Alle Auto-Routen parallel (Start → Parkplätze)
+            driving_requests = []
+            for i, parkplatz in enumerate(parkplaetze):
+                driving_requests.append({
+                    "origin": start_adresse,
+                    "destination": f"{parkplatz.latitude},{parkplatz.longitude}",
+                    "mode": "driving",
+                    "departure_time": "now",
+                    "parking_index": i,
+                    "parking_id": parkplatz.id,
+                    "parking_name": parkplatz.name
+                })
+            
+            logger.info(f"📡 Batch 1: {len(driving_requests)} Auto-Routen parallel")
+            driving_results = await client.calculate_directions_batch(driving_requests)
+            
+            # 2. BATCH 2: Alle Transit-Routen parallel (Parkplätze → Stadion)
+            transit_requests = []
+            for i, parkplatz in enumerate(parkplaetze):
+                transit_requests.append({
+                    "origin": f"{parkplatz.latitude},{parkplatz.longitude}",
+                    "destination": f"{stadion.latitude},{stadion.longitude}",
+                    "mode": "transit",
+                    "departure_time": "now",
+                    "parking_index": i,
+                    "parking_id": parkplatz.id,
+                    "parking_name": parkplatz.name
+                })
+            
+            logger.info(f"🚌 Batch 2: {len(transit_requests)} Transit-Routen parallel")
+            transit_results = await client.calculate_directions_batch(transit_requests)
+            
+            # 3. BATCH 3: Alle Walking-Routen parallel (Parkplätze → Stadion)
+            walking_requests = []
+            for i, parkplatz in enumerate(parkplaetze):
+                walking_requests.append({
+                    "origin": f"{parkplatz.latitude},{parkplatz.longitude}",
+                    "destination": f"{stadion.latitude},{stadion.longitude}",
+                    "mode": "walking",
+                    "parking_index": i,
+                    "parking_id": parkplatz.id,
+                    "parking_name": parkplatz.name
+                })
+            
+            logger.info(f"🚶 Batch 3: {len(walking_requests)} Walking-Routen parallel")
+            walking_results = await client.calculate_directions_batch(walking_requests)
+        
+        # 4. ERGEBNISSE KOMBINIEREN
+        combined_results = ParallelRouteCalculator._kombiniere_ergebnisse(
+            start_adresse, parkplaetze, stadion, driving_results, transit_results, walking_results
+        )
+        
         logger.info(f"✅ Parallele Berechnung abgeschlossen: {len(combined_results)} Routen erfolgreich")
         return combined_results
 
 
 # Wrapper-Funktion für Django (sync → async)
-def run_parallel_route_calculation(start_adresse: str, parkplaetze: List, stadion) -> List[Dict[str, Any]]:
+def run_parallel_route_calculation(start_adresse: str, parkplaetze: List, stadion, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
     """
     Synchroner Wrapper für die asynchrone Routenberechnung
     Kann direkt in Django Views verwendet werden
@@ -340,16 +417,24 @@ def run_parallel_route_calculation(start_adresse: str, parkplaetze: List, stadio
         asyncio.set_event_loop(loop)
         
         try:
-            result = loop.run_until_complete(
-                ParallelRouteCalculator.calculate_all_parking_routes(start_adresse, parkplaetze, stadion)
+            # Explizit im aktuellen Kontext laufen lassen, damit die Performance-Session
+            # des Requests an alle Tasks des Event Loops weitergegeben wird
+            context = contextvars.copy_context()
+            result = context.run(
+                loop.run_until_complete,
+                ParallelRouteCalculator.calculate_all_parking_routes(start_adresse, parkplaetze, stadion, deadline)
             )
             return result
         finally:
             loop.close()
             
+    except DeadlineExceeded as e:
+        # Kein Fallback - das Zeitbudget gilt auch für die sequenzielle Berechnung
+        logger.warning(f"⏰ Parallele Routenberechnung abgebrochen: {e}")
+        return []
     except Exception as e:
         logger.error(f"❌ Fehler bei paralleler Routenberechnung: {e}")
         # Fallback zur sequenziellen Berechnung
         from .utils import berechne_optimierte_parkplatz_empfehlung
         logger.info("⚠️ Fallback zu sequenzieller Berechnung")
-        return berechne_optimierte_parkplatz_empfehlung(start_adresse, parkplaetze, stadion)
\ No newline at end of file
+        return berechne_optimierte_parkplatz_empfehlung(start_adresse, parkplaetze, stadion, deadline=deadline)
\ No newline at end of file
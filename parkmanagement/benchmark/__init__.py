@@ -0,0 +1,14 @@
+# parkmanagement/benchmark/__init__.py
+#
+# Hermetische Benchmarks: lokale Stand-ins für Google, OpenWeatherMap, OpenAI
+# und Dortmund Open Data sowie ein Runner für RouteSuggestionView.
+
+from .standins import BENCHMARK_PROFILES, EndpointProfile, StandInServer, load_profile, standard_parkhaeuser
+
+__all__ = [
+    "BENCHMARK_PROFILES",
+    "EndpointProfile",
+    "StandInServer",
+    "load_profile",
+    "standard_parkhaeuser",
+]
@@ -0,0 +1,279 @@
+# parkmanagement/benchmark/matchday.py
+
+import logging
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+
+from ..performance_monitor import LatencyHistogram
+from ..trace_analysis import cache_hit_rates
+from ..tracing import SPAN_KIND_CLIENT, STATUS_ERROR, tracer
+from .runner import caches_leeren, jwt_tokens, sende_routen_vorschlag
+from .standins import StandInServer
+
+logger = logging.getLogger(__name__)
+
+# Ziel: p99 der Routenvorschläge in der Spitzenphase vor Anpfiff
+SLO_P99_SEKUNDEN = 5.0
+
+# Relative Anfrage-Intensität (0-1) über Minuten relativ zum Anpfiff, linear interpoliert.
+# Spitze ca. eine Stunde vor Anpfiff, danach kaum noch Anfragen.
+ANKUNFTS_PROFIL = [
+    (-180, 0.05), (-150, 0.1), (-120, 0.25), (-90, 0.55), (-75, 0.8),
+    (-60, 1.0), (-45, 0.9), (-30, 0.6), (-15, 0.3), (0, 0.1), (15, 0.02),
+]
+# Ab dieser Intensität zählt eine Anfrage zur Spitzenphase
+SPITZEN_SCHWELLE = 0.8
+
+# Herkunft der Fans: (PLZ, Ort, Gewicht) - Dortmund und Umland
+START_ORTE = [
+    ("44135", "Dortmund", 8), ("44137", "Dortmund", 8), ("44139", "Dortmund", 10),
+    ("44141", "Dortmund", 6), ("44143", "Dortmund", 5), ("44145", "Dortmund", 5),
+    ("44147", "Dortmund", 5), ("44225", "Dortmund", 4), ("44265", "Dortmund", 4),
+    ("44319", "Dortmund", 3), ("44359", "Dortmund", 3), ("44787", "Bochum", 6),
+    ("45127", "Essen", 5), ("59423", "Unna", 4), ("59065", "Hamm", 4),
+    ("58095", "Hagen", 3), ("44575", "Castrop-Rauxel", 3), ("45657", "Recklinghausen", 3),
+    ("48143", "Münster", 2), ("33602", "Bielefeld", 1), ("50667", "Köln", 2),
+]
+STRASSEN = [
+    "Hauptstraße", "Bahnhofstraße", "Kirchstraße", "Schulstraße", "Gartenstraße",
+    "Lindenstraße", "Friedrichstraße", "Mühlenweg", "Ringstraße", "Bergstraße",
+]
+# Treffpunkte, von denen viele Fans mit identischer Adresse starten
+TREFFPUNKTE = [
+    "Dortmund Hauptbahnhof", "Königswall 15, 44137 Dortmund", "Westfalenhallen, Dortmund",
+    "Bochum Hauptbahnhof", "Essen Hauptbahnhof", "Unna Bahnhof",
+]
+TREFFPUNKT_ANTEIL = 0.25
+
+
+def ankunfts_intensitaet(minute: float) -> float:
+    """Relative Intensität (0-1) zum Zeitpunkt ``minute`` relativ zum Anpfiff"""
+    if minute <= ANKUNFTS_PROFIL[0][0]:
+        return ANKUNFTS_PROFIL[0][1]
+    for (m1, w1), (m2, w2) in zip(ANKUNFTS_PROFIL, ANKUNFTS_PROFIL[1:]):
+        if minute <= m2:
+            return w1 + (w2 - w1) * (minute - m1) / (m2 - m1)
+    return ANKUNFTS_PROFIL[-1][1]
+
+
+def erzeuge_ankuenfte(peak_rps: float, dauer: float, rng: random.Random) -> List[Tuple[float, float]]:
+    """
+    Ankunftszeiten (Sekunden ab Start, Minute relativ zum Anpfiff) als
+    inhomogener Poisson-Prozess (Thinning). Das Spieltagsfenster wird auf
+    ``dauer`` Sekunden gestaucht, ``peak_rps`` gilt in der Spitze.
+    """
+    start_minute, end_minute = ANKUNFTS_PROFIL[0][0], ANKUNFTS_PROFIL[-1][0]
+    ankuenfte = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(peak_rps)
+        if t >= dauer:
+            return ankuenfte
+        minute = start_minute + t / dauer * (end_minute - start_minute)
+        if rng.random() < ankunfts_intensitaet(minute):
+            ankuenfte.append((t, minute))
+
+
+def ziehe_start_adresse(rng: random.Random) -> str:
+    """Startadresse nach Herkunftsverteilung; ein Teil startet an gemeinsamen Treffpunkten"""
+    if rng.random() < TREFFPUNKT_ANTEIL:
+        return rng.choice(TREFFPUNKTE)
+    plz, ort, _ = rng.choices(START_ORTE, weights=[gewicht for _, _, gewicht in START_ORTE])[0]
+    return f"{rng.choice(STRASSEN)} {rng.randint(1, 120)}, {plz} {ort}"
+
+
+def _perzentile(histogram: LatencyHistogram) -> Dict[str, Optional[float]]:
+    summary = histogram.summary()
+    return {
+        key: round(summary[key], 4) if summary[key] is not None else None
+        for key in ("mean", "p50", "p95", "p99", "max")
+    }
+
+
+class MatchdayLoadTest:
+    """
+    Open-Loop-Lasttest: Anfragen kommen nach der Ankunftskurve, unabhängig
+    davon, ob vorherige schon beantwortet sind. Die Latenz wird ab der
+    geplanten Ankunft gemessen und enthält damit auch die Wartezeit auf
+    einen freien Client (kein Coordinated Omission).
+    """
+
+    def __init__(self, server: StandInServer, benutzer: List[User], dauer: float = 60.0,
+                 max_concurrency: int = 64, seed: Optional[int] = None, slo_p99: float = SLO_P99_SEKUNDEN):
+        self.server = server
+        self.tokens = jwt_tokens(benutzer)
+        self.dauer = dauer
+        self.max_concurrency = max_concurrency
+        self.seed = seed
+        self.slo_p99 = slo_p99
+
+    def run(self, peak_rps: float, profile: Any) -> Dict[str, Any]:
+        """Spielt die Ankunftskurve mit ``peak_rps`` in der Spitze ab und wertet sie aus"""
+        self.server.configure(profile)
+        caches_leeren()
+
+        rng = random.Random(f"{self.seed}-{peak_rps}" if self.seed is not None else None)
+        ankuenfte = erzeuge_ankuenfte(peak_rps, self.dauer, rng)
+        jobs: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        ergebnisse: List[Dict[str, Any]] = []
+        lock = threading.Lock()
+        laufend = {"aktuell": 0, "maximum": 0}
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    job = jobs.get()
+                    if job is None:
+                        return
+                    with lock:
+                        laufend["aktuell"] += 1
+                        laufend["maximum"] = max(laufend["maximum"], laufend["aktuell"])
+                    try:
+                        ergebnis = self._anfrage(client, job)
+                    finally:
+                        with lock:
+                            laufend["aktuell"] -= 1
+                    with lock:
+                        ergebnisse.append(ergebnis)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, name=f"matchday-{i}", daemon=True)
+            for i in range(self.max_concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        logger.info(f"🏟️ Spieltag mit {peak_rps} req/s in der Spitze: {len(ankuenfte)} Anfragen in {self.dauer}s")
+        start = time.perf_counter()
+        for offset, minute in ankuenfte:
+            geplant = start + offset
+            pause = geplant - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+            jobs.put({
+                "geplant": geplant,
+                "minute": minute,
+                "start_adresse": ziehe_start_adresse(rng),
+                "token": rng.choice(self.tokens),
+            })
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+        dauer = time.perf_counter() - start
+
+        return self._auswerten(peak_rps, ankuenfte, ergebnisse, dauer, laufend["maximum"])
+
+    def _anfrage(self, client: Client, job: Dict[str, Any]) -> Dict[str, Any]:
+        wartezeit = time.perf_counter() - job["geplant"]
+        ergebnis = {"minute": job["minute"], "wartezeit": wartezeit, "spans": []}
+        try:
+            response, _ = sende_routen_vorschlag(client, job["start_adresse"], job["token"])
+        except Exception as e:
+            logger.error(f"❌ Lasttest-Request fehlgeschlagen: {e}")
+            ergebnis.update(latenz=time.perf_counter() - job["geplant"], status="exception")
+            return ergebnis
+
+        ergebnis.update(latenz=time.perf_counter() - job["geplant"], status=response.status_code)
+        trace_id = response.headers.get("X-Trace-Id")
+        if trace_id:
+            ergebnis["spans"] = tracer.get_trace(trace_id) or []
+        if response.status_code == 200:
+            data = response.json()
+            ergebnis["kommentar_status"] = data["empfohlener_parkplatz"].get("kommentar_status", "fallback")
+            ergebnis["deadline_exceeded"] = data["meta"]["deadline"]["exceeded"]
+        return ergebnis
+
+    def _auswerten(self, peak_rps: float, ankuenfte, ergebnisse: List[Dict[str, Any]],
+                   dauer: float, max_in_flight: int) -> Dict[str, Any]:
+        alle, spitze, wartezeiten = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        calls_pro_request: List[Counter] = []
+        upstream_fehler: Counter = Counter()
+        for ergebnis in ergebnisse:
+            alle.record(ergebnis["latenz"])
+            wartezeiten.record(max(ergebnis["wartezeit"], 1e-6))
+            if ankunfts_intensitaet(ergebnis["minute"]) >= SPITZEN_SCHWELLE:
+                spitze.record(ergebnis["latenz"])
+
+            calls = Counter()
+            for span in ergebnis["spans"]:
+                if span.kind == SPAN_KIND_CLIENT and span.attributes.get("upstream.api"):
+                    calls[span.attributes["upstream.api"]] += 1
+                    if span.status_code == STATUS_ERROR:
+                        upstream_fehler[span.attributes["upstream.api"]] += 1
+            calls_pro_request.append(calls)
+
+        anzahl = len(ergebnisse)
+        upstream = {
+            api: {
+                "calls": sum(c[api] for c in calls_pro_request),
+                "per_request_mean": round(sum(c[api] for c in calls_pro_request) / anzahl, 2),
+                "per_request_max": max(c[api] for c in calls_pro_request),
+            }
+            for api in sorted(set().union(*calls_pro_request))
+        }
+
+        status = Counter(str(e["status"]) for e in ergebnisse)
+        erfolgreich = status.get("200", 0)
+        p99_spitze = spitze.percentile(99)
+
+        return {
+            "peak_rps": peak_rps,
+            "offered_rps": round(len(ankuenfte) / self.dauer, 2),
+            "requests": anzahl,
+            "duration": round(dauer, 2),
+            "throughput_rps": round(anzahl / dauer, 2) if dauer else None,
+            "max_in_flight": max_in_flight,
+            "success_rate": round(erfolgreich / anzahl * 100, 1) if anzahl else None,
+            "latency": _perzentile(alle),
+            "peak_latency": _perzentile(spitze),
+            "queue_wait": _perzentile(wartezeiten),
+            "slo": {
+                "p99_seconds": self.slo_p99,
+                "peak_p99_seconds": round(p99_spitze, 4) if p99_spitze is not None else None,
+                "met": p99_spitze is not None and p99_spitze <= self.slo_p99,
+            },
+            "upstream_calls": upstream,
+            "cache_hit_rates": cache_hit_rates(e["spans"] for e in ergebnisse),
+            "errors": {
+                "status_codes": {code: n for code, n in status.items() if code != "200"},
+                "deadline_exceeded": sum(1 for e in ergebnisse if e.get("deadline_exceeded")),
+                "kommentar_status": dict(Counter(e["kommentar_status"] for e in ergebnisse if "kommentar_status" in e)),
+                "upstream_errors": dict(upstream_fehler),
+                "standins": {
+                    endpoint: {"errors": s["errors"], "throttled": s["throttled"]}
+                    for endpoint, s in self.server.stats().items() if s["errors"] or s["throttled"]
+                },
+            },
+        }
+
+
+def kapazitaet(ergebnisse: List[Dict[str, Any]], slo_p99: float = SLO_P99_SEKUNDEN) -> Dict[str, Any]:
+    """Höchste Laststufe, bis zu der alle Stufen das p99-SLO einhalten"""
+    gehalten = None
+    verletzt = None
+    for ergebnis in sorted(ergebnisse, key=lambda e: e["peak_rps"]):
+        if not ergebnis["slo"]["met"]:
+            verletzt = ergebnis
+            break
+        gehalten = ergebnis
+
+    return {
+        "slo_p99_seconds": slo_p99,
+        "max_sustained_peak_rps": gehalten["peak_rps"] if gehalten else None,
+        "max_sustained_throughput_rps": gehalten["throughput_rps"] if gehalten else None,
+        "max_sustained_in_flight": gehalten["max_in_flight"] if gehalten else None,
+        "first_breach_peak_rps": verletzt["peak_rps"] if verletzt else None,
+        "first_breach_peak_p99_seconds": verletzt["slo"]["peak_p99_seconds"] if verletzt else None,
+    }
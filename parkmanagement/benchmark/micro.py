@@ -0,0 +1,378 @@
+# parkmanagement/benchmark/micro.py
+
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rest_framework.renderers import JSONRenderer
+
+from ..async_client import ParallelRouteCalculator
+from ..dortmund_parking_api import DortmundParkingData
+from ..models import Parkplatz, Route, Stadion
+from ..renderers import ORJSONRenderer
+from ..serializers import ParkplatzLeseSerializer, ParkplatzSerializer, RouteLeseSerializer, RouteSerializer
+from ..utils import berechne_realistische_verkehrsbewertung, generiere_google_maps_navigation_link
+from .standins import SIGNAL_IDUNA_PARK, dortmund_record, standard_parkhaeuser
+
+# Messparameter (wie timeit: Anzahl Aufrufe verdoppeln bis MIN_MESSZEIT, dann Minimum über Wiederholungen)
+MIN_MESSZEIT = 0.2
+WIEDERHOLUNGEN = 5
+# Relative Verschlechterung gegenüber der Baseline, ab der eine Regression gemeldet wird
+REGRESSIONS_SCHWELLE = 0.2
+
+LIVE_ITEMS = 1000
+EINGABEN_PRO_AUFRUF = 1000
+
+Vorbereitung = Callable[[Optional[int], random.Random], Tuple[Callable[[], Any], int]]
+
+
+class MicroBenchmark:
+    """
+    Ein Micro-Benchmark: ``vorbereiten(groesse, rng)`` baut die Eingaben und
+    liefert ``(fn, ops)`` - ``fn`` ohne Argumente führt ``ops`` Operationen aus
+    (z.B. einen Aufruf pro Parkplatz), gemessen wird pro Operation.
+    """
+
+    def __init__(self, name: str, vorbereiten: Vorbereitung, groessen: Tuple[Optional[int], ...] = (None,),
+                 einheit: str = "Aufruf"):
+        self.name = name
+        self.vorbereiten = vorbereiten
+        self.groessen = groessen
+        self.einheit = einheit
+
+    def schluessel(self, groesse: Optional[int]) -> str:
+        return f"{self.name}[{groesse}]" if groesse is not None else self.name
+
+
+def _messe_zeit(fn: Callable[[], Any], anzahl: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(anzahl):
+        fn()
+    return time.perf_counter_ns() - start
+
+
+def messen(fn: Callable[[], Any], ops: int, min_zeit: float = MIN_MESSZEIT,
+           wiederholungen: int = WIEDERHOLUNGEN, allokationen: bool = True) -> Dict[str, Any]:
+    """ns/op (Minimum und Median der Wiederholungen) und Speicher-Allokationen pro Operation"""
+    gc_aktiv = gc.isenabled()
+    gc.disable()
+    try:
+        fn()  # Aufwärmen (Imports, Caches)
+        anzahl = 1
+        while _messe_zeit(fn, anzahl) < min_zeit * 1e9 and anzahl < 1 << 20:
+            anzahl *= 2
+        laeufe = [_messe_zeit(fn, anzahl) / anzahl / ops for _ in range(wiederholungen)]
+    finally:
+        if gc_aktiv:
+            gc.enable()
+
+    ergebnis = {
+        "ns_per_op": round(min(laeufe), 1),
+        "ns_per_op_median": round(statistics.median(laeufe), 1),
+        "ops_per_call": ops,
+        "calls_per_run": anzahl,
+    }
+    if allokationen:
+        ergebnis.update(_messe_allokationen(fn, ops))
+    return ergebnis
+
+
+def _messe_allokationen(fn: Callable[[], Any], ops: int) -> Dict[str, Any]:
+    """
+    Spitzen- und verbleibender Speicher pro Operation über tracemalloc.
+    (Die Anzahl einzelner Allokationen ist ohne eigenen Allocator nicht messbar.)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        vorher, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        ergebnis = fn()
+        nachher, spitze = tracemalloc.get_traced_memory()
+        del ergebnis
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_bytes_per_op": round((spitze - vorher) / ops, 1),
+        "retained_bytes_per_op": round(max(0, nachher - vorher) / ops, 1),
+    }
+
+
+# -- Synthetische Eingaben --------------------------------------------------------
+
+def _zeitstempel(rng: random.Random) -> str:
+    alter = timedelta(minutes=rng.choice([1, 3, 10, 45, 240]))
+    return (datetime.now(timezone.utc) - alter).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def synthetische_live_rohdaten(anzahl: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Rohdaten wie von der Dortmund API, teils mit fehlenden Feldern"""
+    rohdaten = []
+    for parkhaus in standard_parkhaeuser(anzahl):
+        record = dortmund_record(parkhaus, rng.randint(0, parkhaus["capacity"]), _zeitstempel(rng))
+        if rng.random() < 0.05:
+            record.pop("zeitstempel")
+        rohdaten.append(record)
+    return rohdaten
+
+
+def synthetische_parkplaetze(anzahl: int, rng: random.Random, live_namen: List[str] = ()) -> List[Parkplatz]:
+    """Ungespeicherte Parkplätze um das Stadion; ~10% heißen wie ein Live-Parkhaus"""
+    parkplaetze = []
+    for i in range(anzahl):
+        if live_namen and rng.random() < 0.1:
+            name = rng.choice(live_namen)
+        else:
+            name = f"Stellfläche {i:05d}"
+        parkplaetze.append(Parkplatz(
+            id=i + 1,
+            name=name,
+            latitude=Decimal(f"{SIGNAL_IDUNA_PARK[0] + rng.uniform(-0.03, 0.03):.6f}"),
+            longitude=Decimal(f"{SIGNAL_IDUNA_PARK[1] + rng.uniform(-0.05, 0.05):.6f}"),
+        ))
+    return parkplaetze
+
+
+def _stadion() -> Stadion:
+    return Stadion(name="Benchmark Arena", latitude=Decimal(str(SIGNAL_IDUNA_PARK[0])),
+                   longitude=Decimal(str(SIGNAL_IDUNA_PARK[1])))
+
+
+def _route_ergebnis(rng: random.Random, mode: str, min_sekunden: int, max_sekunden: int) -> Dict[str, Any]:
+    sekunden = rng.randint(min_sekunden, max_sekunden)
+    ergebnis = {
+        "dauer_sekunden": sekunden,
+        "dauer_minuten": sekunden // 60,
+        "distanz_meter": sekunden * 10,
+        "distanz_km": round(sekunden / 100, 1),
+        "polyline": "_p~iF~ps|U_ulLnnqC_mqNvxq`@",
+        "status": "success",
+        "mode": mode,
+    }
+    if mode == "driving":
+        ergebnis["dauer_traffic_sekunden"] = int(sekunden * rng.uniform(1.0, 1.8))
+        ergebnis["dauer_traffic_minuten"] = ergebnis["dauer_traffic_sekunden"] // 60
+    return ergebnis
+
+
+# -- Benchmarks ------------------------------------------------------------------------
+
+def _verkehrsbewertung(groesse, rng):
+    basis = datetime(2025, 9, 13, 0, 0)
+    eingaben = []
+    for _ in range(EINGABEN_PRO_AUFRUF):
+        normal = rng.randint(300, 3600)
+        eingaben.append((normal, int(normal * rng.uniform(1.0, 2.2)), basis + timedelta(minutes=rng.randint(0, 7 * 1440))))
+
+    def fn():
+        return [berechne_realistische_verkehrsbewertung(normal, traffic, zeit) for normal, traffic, zeit in eingaben]
+    return fn, len(eingaben)
+
+
+def _distanz(groesse, rng):
+    eingaben = [
+        (51.49 + rng.uniform(-0.1, 0.1), 7.45 + rng.uniform(-0.1, 0.1),
+         51.49 + rng.uniform(-0.1, 0.1), 7.45 + rng.uniform(-0.1, 0.1))
+        for _ in range(EINGABEN_PRO_AUFRUF)
+    ]
+    distanz = DortmundParkingData._calculate_distance
+
+    def fn():
+        return [distanz(*eingabe) for eingabe in eingaben]
+    return fn, len(eingaben)
+
+
+def _process_parking_item(groesse, rng):
+    rohdaten = synthetische_live_rohdaten(LIVE_ITEMS, rng)
+
+    def fn():
+        return [DortmundParkingData._process_parking_item(item) for item in rohdaten]
+    return fn, len(rohdaten)
+
+
+def _navigation_link(groesse, rng):
+    stadion = _stadion()
+    eingaben = [
+        (f"Hauptstraße {rng.randint(1, 200)}, 44{rng.randint(100, 999)} Dortmund", p.latitude, p.longitude)
+        for p in synthetische_parkplaetze(EINGABEN_PRO_AUFRUF, rng)
+    ]
+
+    def fn():
+        return [
+            generiere_google_maps_navigation_link(adresse, lat, lng, stadion.latitude, stadion.longitude)
+            for adresse, lat, lng in eingaben
+        ]
+    return fn, len(eingaben)
+
+
+def _find_matching_live_data(groesse, rng):
+    live_daten = [
+        item for item in (DortmundParkingData._process_parking_item(r) for r in synthetische_live_rohdaten(groesse, rng))
+        if item
+    ]
+    parkplaetze = synthetische_parkplaetze(100, rng, [item["name"] for item in live_daten])
+
+    def fn():
+        return [DortmundParkingData.find_matching_live_data(p, live_daten) for p in parkplaetze]
+    return fn, len(parkplaetze)
+
+
+def _kombiniere_ergebnisse(groesse, rng):
+    parkplaetze = synthetische_parkplaetze(groesse, rng)
+    driving = [_route_ergebnis(rng, "driving", 600, 3600) for _ in parkplaetze]
+    transit = [_route_ergebnis(rng, "transit", 300, 1800) if rng.random() < 0.9 else None for _ in parkplaetze]
+    walking = [_route_ergebnis(rng, "walking", 120, 2400) for _ in parkplaetze]
+    stadion = _stadion()
+
+    def fn():
+        return ParallelRouteCalculator._kombiniere_ergebnisse(
+            "Hauptstraße 1, 44135 Dortmund", parkplaetze, stadion, driving, transit, walking
+        )
+    return fn, len(parkplaetze)
+
+
+
+def _parkplaetze_serialisieren(serializer_class, groesse, rng):
+    parkplaetze = synthetische_parkplaetze(groesse, rng)
+    jetzt = datetime.now(timezone.utc)
+    for parkplatz in parkplaetze:
+        parkplatz.stadion_id = 1
+        parkplatz.kapazitaet = rng.randint(50, 2000)
+        parkplatz.frei = rng.randint(0, parkplatz.kapazitaet)
+        parkplatz.preis_pro_stunde = Decimal(f"{rng.uniform(0, 5):.2f}")
+        parkplatz.bewertung = Decimal(f"{rng.uniform(1, 5):.2f}")
+        parkplatz.letztes_update = jetzt - timedelta(minutes=rng.randint(0, 600))
+
+    def fn():
+        return serializer_class(parkplaetze, many=True).data
+    return fn, len(parkplaetze)
+
+
+def _routen_serialisieren(serializer_class, groesse, rng):
+    jetzt = datetime.now(timezone.utc)
+    routen = [
+        Route(
+            id=i + 1, benutzer_id=1, stadion_id=1, parkplatz_id=rng.randint(1, 50),
+            start_adresse=f"Hauptstraße {rng.randint(1, 200)}, 44{rng.randint(100, 999)} Dortmund",
+            start_latitude=Decimal(f"{SIGNAL_IDUNA_PARK[0] + rng.uniform(-0.1, 0.1):.6f}"),
+            start_longitude=Decimal(f"{SIGNAL_IDUNA_PARK[1] + rng.uniform(-0.1, 0.1):.6f}"),
+            strecke_km=Decimal(f"{rng.uniform(1, 40):.2f}"), dauer_minuten=rng.randint(5, 90),
+            transportmittel=rng.choice(["auto", "bus", "bahn", "zu_fuss"]),
+            erstelldatum=jetzt - timedelta(minutes=rng.randint(0, 100000)),
+        )
+        for i in range(groesse)
+    ]
+
+    def fn():
+        return serializer_class(routen, many=True).data
+    return fn, len(routen)
+
+
+def _vorschlaege_rendern(renderer_class, groesse, rng):
+    # Die Vorschläge sind bereits dicts/lists - hier zählt nur der Renderer
+    vorbereitet, _ = _kombiniere_ergebnisse(groesse, rng)
+    antwort = {"stadion": "Benchmark Arena", "parkplatz_vorschlaege": vorbereitet()}
+    renderer = renderer_class()
+
+    def fn():
+        return renderer.render(antwort)
+    return fn, groesse
+
+MICRO_BENCHMARKS: List[MicroBenchmark] = [
+    MicroBenchmark("berechne_realistische_verkehrsbewertung", _verkehrsbewertung),
+    MicroBenchmark("calculate_distance", _distanz),
+    MicroBenchmark("process_parking_item", _process_parking_item, einheit="Live-Item"),
+    MicroBenchmark("generiere_google_maps_navigation_link", _navigation_link),
+    MicroBenchmark("find_matching_live_data", _find_matching_live_data, groessen=(100, LIVE_ITEMS),
+                   einheit="Parkplatz gegen N Live-Items"),
+    MicroBenchmark("kombiniere_ergebnisse", _kombiniere_ergebnisse, groessen=(100, 1000, 10000),
+                   einheit="Parkplatz"),
+    MicroBenchmark("ParkplatzSerializer", partial(_parkplaetze_serialisieren, ParkplatzSerializer),
+                   groessen=(100, 1000), einheit="Parkplatz"),
+    MicroBenchmark("ParkplatzLeseSerializer", partial(_parkplaetze_serialisieren, ParkplatzLeseSerializer),
+                   groessen=(100, 1000), einheit="Parkplatz"),
+    MicroBenchmark("RouteSerializer", partial(_routen_serialisieren, RouteSerializer),
+                   groessen=(100, 1000), einheit="Route"),
+    MicroBenchmark("RouteLeseSerializer", partial(_routen_serialisieren, RouteLeseSerializer),
+                   groessen=(100, 1000), einheit="Route"),
+    MicroBenchmark("JSONRenderer", partial(_vorschlaege_rendern, JSONRenderer),
+                   groessen=(100, 1000), einheit="Parkplatz-Vorschlag"),
+    MicroBenchmark("ORJSONRenderer", partial(_vorschlaege_rendern, ORJSONRenderer),
+                   groessen=(100, 1000), einheit="Parkplatz-Vorschlag"),
+]
+
+
+def fuehre_aus(filter_text: Optional[str] = None, min_zeit: float = MIN_MESSZEIT,
+               wiederholungen: int = WIEDERHOLUNGEN, allokationen: bool = True,
+               seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Führt alle (bzw. die zum Filter passenden) Benchmarks aus"""
+    ergebnisse = {}
+    for benchmark in MICRO_BENCHMARKS:
+        for groesse in benchmark.groessen:
+            schluessel = benchmark.schluessel(groesse)
+            if filter_text and filter_text not in schluessel:
+                continue
+            fn, ops = benchmark.vorbereiten(groesse, random.Random(f"{seed}-{schluessel}"))
+            ergebnisse[schluessel] = {
+                "unit": benchmark.einheit,
+                **messen(fn, ops, min_zeit, wiederholungen, allokationen),
+            }
+    return ergebnisse
+
+
+# -- Baselines -------------------------------------------------------------------------
+
+def lade_baseline(pfad: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(pfad, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def speichere_baseline(pfad: str, ergebnisse: Dict[str, Dict[str, Any]]):
+    """Speichert die Ergebnisse mit Umgebung; bestehende Einträge anderer Benchmarks bleiben erhalten"""
+    baseline = lade_baseline(pfad) or {"results": {}}
+    baseline["results"].update(ergebnisse)
+    baseline.update({
+        "updated": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(pfad)), exist_ok=True)
+    with open(pfad, "w", encoding="utf-8") as fh:
+        json.dump(baseline, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def vergleiche(ergebnisse: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]],
+               schwelle: float = REGRESSIONS_SCHWELLE) -> Dict[str, Dict[str, Any]]:
+    """Relative Änderung von ns/op und Speicher gegenüber der Baseline; ``regression`` über ``schwelle``"""
+    if not baseline:
+        return {}
+    vergleich = {}
+    for schluessel, aktuell in ergebnisse.items():
+        alt = baseline.get("results", {}).get(schluessel)
+        if not alt:
+            continue
+        zeit = aktuell["ns_per_op"] / alt["ns_per_op"] - 1 if alt.get("ns_per_op") else None
+        speicher = None
+        if alt.get("alloc_peak_bytes_per_op") and "alloc_peak_bytes_per_op" in aktuell:
+            speicher = aktuell["alloc_peak_bytes_per_op"] / alt["alloc_peak_bytes_per_op"] - 1
+        vergleich[schluessel] = {
+            "baseline_ns_per_op": alt.get("ns_per_op"),
+            "time_change": round(zeit, 3) if zeit is not None else None,
+            "alloc_change": round(speicher, 3) if speicher is not None else None,
+            "regression": bool((zeit is not None and zeit > schwelle) or (speicher is not None and speicher > schwelle)),
+        }
+    return vergleich
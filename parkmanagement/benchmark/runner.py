@@ -0,0 +1,202 @@
+# parkmanagement/benchmark/runner.py
+
+import itertools
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..catalog import Katalog
+from ..comment_cache import VerkehrsKommentarCache
+from ..models import Parkplatz, Stadion, Verein
+from ..performance_monitor import LatencyHistogram
+from .standins import SIGNAL_IDUNA_PARK, StandInServer
+
+logger = logging.getLogger(__name__)
+
+ROUTEN_VORSCHLAG_PFAD = "/api/routen-vorschlag/"
+
+
+def erstelle_benchmark_daten(parkhaeuser: List[Dict[str, Any]], benutzer_anzahl: int) -> List[User]:
+    """
+    Legt Verein, Stadion, Parkplätze (passend zu den Stand-in-Livedaten) und
+    Benutzer mit Lieblingsverein an. Nur in einer Test-Datenbank aufrufen.
+    """
+    verein = Verein.objects.create(name="Benchmark 09", stadt="Dortmund", liga="Benchmark")
+    stadion = Stadion.objects.create(
+        name="Benchmark Arena",
+        verein=verein,
+        adresse="Strobelallee 50, 44139 Dortmund",
+        latitude=SIGNAL_IDUNA_PARK[0],
+        longitude=SIGNAL_IDUNA_PARK[1],
+    )
+    Parkplatz.objects.bulk_create([
+        Parkplatz(
+            name=p["name"],
+            kapazitaet=p["capacity"],
+            latitude=p["lat"],
+            longitude=p["lon"],
+            stadion=stadion,
+            external_id=p["id"],
+        )
+        for p in parkhaeuser
+    ])
+
+    benutzer = []
+    for i in range(benutzer_anzahl):
+        user = User.objects.create_user(username=f"benchmark{i}", password=None)
+        user.profil.lieblingsverein = verein
+        user.profil.save()
+        benutzer.append(user)
+    return benutzer
+
+
+@contextmanager
+def benchmark_umgebung(parkhaeuser: List[Dict[str, Any]], seed: Optional[int] = None):
+    """
+    Test-Datenbank, laufende Stand-ins und darauf umgeleitete Settings.
+    Liefert den ``StandInServer``; danach wird die Test-Datenbank gelöscht.
+    """
+    test_runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = test_runner.setup_databases()
+    try:
+        with StandInServer(parkhaeuser=parkhaeuser, seed=seed) as server, override_settings(
+            **server.settings_overrides(),
+            ALLOWED_HOSTS=["testserver"],
+            # Benchmark-Sessions gehören nicht in den Produktions-Store
+            PERFORMANCE_STORE_ENABLED=False,
+            PROFILING_SAMPLE_RATE=0,
+        ):
+            yield server
+    finally:
+        test_runner.teardown_databases(old_config)
+
+
+def jwt_tokens(benutzer: List[User]) -> List[str]:
+    return [str(RefreshToken.for_user(user).access_token) for user in benutzer]
+
+
+def caches_leeren():
+    """Jede Konfiguration startet mit kalten Caches"""
+    cache.clear()
+    VerkehrsKommentarCache.clear()
+    Katalog.zuruecksetzen()
+
+
+def sende_routen_vorschlag(client: Client, start_adresse: str, token: str) -> Tuple[HttpResponse, float]:
+    """POST auf RouteSuggestionView; liefert Response und Dauer in Sekunden"""
+    start = time.perf_counter()
+    response = client.post(
+        ROUTEN_VORSCHLAG_PFAD,
+        {"start_adresse": start_adresse},
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {token}",
+    )
+    return response, time.perf_counter() - start
+
+
+class RouteBenchmark:
+    """
+    Treibt ``RouteSuggestionView`` end-to-end (Middleware, JWT, View,
+    Upstream-HTTP gegen die Stand-ins) mit ``concurrency`` parallelen Clients.
+    """
+
+    def __init__(self, server: StandInServer, benutzer: List[User], requests: int = 50,
+                 concurrency: int = 4, warmup: int = 2, start_adressen: int = 20):
+        self.server = server
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.start_adressen = [f"Benchmarkstraße {i}, 44{i % 1000:03d} Dortmund" for i in range(max(1, start_adressen))]
+        self.tokens = jwt_tokens(benutzer)
+
+    def _anfrage(self, client: Client, nummer: int) -> Dict[str, Any]:
+        response, dauer = sende_routen_vorschlag(
+            client, self.start_adressen[nummer % len(self.start_adressen)], self.tokens[nummer % len(self.tokens)]
+        )
+        ergebnis = {"dauer": dauer, "status": response.status_code}
+        if response.status_code == 200:
+            data = response.json()
+            ergebnis["kommentar_status"] = data["empfohlener_parkplatz"].get("kommentar_status", "fallback")
+            ergebnis["vorschlaege"] = data["meta"]["total_options"]
+        return ergebnis
+
+    def run(self, name: str, profile: Any) -> Dict[str, Any]:
+        """Misst eine Konfiguration und liefert Durchsatz, Perzentile und Upstream-Zähler"""
+        self.server.configure(profile)
+        caches_leeren()
+
+        client = Client()
+        for i in range(self.warmup):
+            self._anfrage(client, i)
+        self.server.configure(profile)
+
+        nummern = itertools.count()
+        nummern_lock = threading.Lock()
+        ergebnisse: List[Dict[str, Any]] = []
+        ergebnisse_lock = threading.Lock()
+
+        def worker():
+            worker_client = Client()
+            try:
+                while True:
+                    with nummern_lock:
+                        nummer = next(nummern)
+                    if nummer >= self.requests:
+                        return
+                    try:
+                        ergebnis = self._anfrage(worker_client, nummer)
+                    except Exception as e:
+                        logger.error(f"❌ Benchmark-Request {nummer} fehlgeschlagen: {e}")
+                        ergebnis = {"dauer": None, "status": "exception"}
+                    with ergebnisse_lock:
+                        ergebnisse.append(ergebnis)
+            finally:
+                connections.close_all()
+
+        logger.info(f"🏁 Benchmark '{name}': {self.requests} Requests, {self.concurrency} parallel")
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, name=f"benchmark-{i}")
+            for i in range(min(self.concurrency, self.requests))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        dauer = time.perf_counter() - start
+
+        latenzen = LatencyHistogram()
+        for ergebnis in ergebnisse:
+            if ergebnis["dauer"] is not None:
+                latenzen.record(ergebnis["dauer"])
+        summary = latenzen.summary()
+        erfolgreich = sum(1 for e in ergebnisse if e["status"] == 200)
+
+        return {
+            "configuration": name,
+            "profile": {endpoint: p.to_dict() for endpoint, p in self.server.profiles.items()},
+            "requests": len(ergebnisse),
+            "concurrency": self.concurrency,
+            "duration": round(dauer, 3),
+            "throughput_rps": round(len(ergebnisse) / dauer, 2) if dauer else None,
+            "success_rate": round(erfolgreich / len(ergebnisse) * 100, 1) if ergebnisse else None,
+            "status_codes": dict(Counter(str(e["status"]) for e in ergebnisse)),
+            "kommentar_status": dict(Counter(e["kommentar_status"] for e in ergebnisse if "kommentar_status" in e)),
+            "latency": {
+                key: round(summary[key], 4) if summary[key] is not None else None
+                for key in ("mean", "min", "p50", "p95", "p99", "max")
+            },
+            "upstream": self.server.stats(),
+        }
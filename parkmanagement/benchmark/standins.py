@@ -0,0 +1,500 @@
+# parkmanagement/benchmark/standins.py
+
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Referenzpunkte für generierte Koordinaten
+DORTMUND_ZENTRUM = (51.5136, 7.4653)
+SIGNAL_IDUNA_PARK = (51.4926, 7.4519)
+
+# Durchschnittsgeschwindigkeiten (km/h) und Umwegfaktor gegenüber der Luftlinie
+GESCHWINDIGKEIT_KMH = {"driving": 35.0, "transit": 22.0, "walking": 4.8, "bicycling": 15.0}
+UMWEG_FAKTOR = 1.3
+TRANSIT_WARTEZEIT_SEKUNDEN = 300
+
+# Pfade der nachgebildeten APIs (relativ zur Server-URL)
+ENDPOINT_PFADE = {
+    "/maps/api/directions/json": "directions",
+    "/maps/api/distancematrix/json": "distancematrix",
+    "/maps/api/geocode/json": "geocode",
+    "/data/2.5/weather": "weather",
+    "/v1/chat/completions": "openai",
+    "/api/explore/v2.1/catalog/datasets/parkhauser/records": "dortmund",
+}
+ENDPOINTS = tuple(ENDPOINT_PFADE.values())
+GOOGLE_ENDPOINTS = ("directions", "distancematrix", "geocode")
+
+WETTER_VARIANTEN = [
+    (800, "klarer Himmel"),
+    (801, "ein paar Wolken"),
+    (803, "überwiegend bewölkt"),
+    (500, "leichter Regen"),
+    (521, "Regenschauer"),
+]
+
+
+class EndpointProfile:
+    """
+    Verhalten eines Stand-in-Endpoints.
+
+    Latenzen sind log-normal verteilt und über Median und p99 parametrisiert,
+    ``error_rate`` liefert HTTP 500, ``quota_per_second`` begrenzt per
+    Token-Bucket (Google antwortet dann mit OVER_QUERY_LIMIT, alle anderen mit 429).
+    """
+
+    def __init__(self, latency_median: float = 0.0, latency_p99: Optional[float] = None,
+                 error_rate: float = 0.0, quota_per_second: Optional[float] = None, burst: Optional[int] = None):
+        self.latency_median = latency_median
+        self.latency_p99 = latency_p99 if latency_p99 is not None else latency_median
+        self.error_rate = error_rate
+        self.quota_per_second = quota_per_second
+        self.burst = burst if burst is not None else (max(1, int(quota_per_second)) if quota_per_second else None)
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency_median <= 0:
+            return 0.0
+        if self.latency_p99 <= self.latency_median:
+            return self.latency_median
+        # p99 einer Log-Normalverteilung liegt 2.326 Standardabweichungen über dem Median
+        sigma = math.log(self.latency_p99 / self.latency_median) / 2.326
+        return rng.lognormvariate(math.log(self.latency_median), sigma)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_median": self.latency_median,
+            "latency_p99": self.latency_p99,
+            "error_rate": self.error_rate,
+            "quota_per_second": self.quota_per_second,
+            "burst": self.burst,
+        }
+
+
+# Vordefinierte Konfigurationen: Endpoint -> Parameter von EndpointProfile
+BENCHMARK_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    # Ohne Latenz - misst nur den eigenen Code (Threads, Serialisierung, DB)
+    "instant": {},
+    # Grob an den Produktionsmessungen der externen APIs orientiert
+    "realistic": {
+        "directions": {"latency_median": 0.18, "latency_p99": 0.6},
+        "distancematrix": {"latency_median": 0.2, "latency_p99": 0.7},
+        "geocode": {"latency_median": 0.08, "latency_p99": 0.3},
+        "weather": {"latency_median": 0.12, "latency_p99": 0.4},
+        "openai": {"latency_median": 1.2, "latency_p99": 4.0},
+        "dortmund": {"latency_median": 0.35, "latency_p99": 1.5},
+    },
+    # Langsame Ausreißer und sporadische Fehler aller Upstreams
+    "degraded": {
+        "directions": {"latency_median": 0.3, "latency_p99": 3.0, "error_rate": 0.05},
+        "distancematrix": {"latency_median": 0.3, "latency_p99": 3.0, "error_rate": 0.05},
+        "geocode": {"latency_median": 0.15, "latency_p99": 1.0, "error_rate": 0.05},
+        "weather": {"latency_median": 0.3, "latency_p99": 2.0, "error_rate": 0.1},
+        "openai": {"latency_median": 3.0, "latency_p99": 15.0, "error_rate": 0.1},
+        "dortmund": {"latency_median": 1.0, "latency_p99": 8.0, "error_rate": 0.1},
+    },
+    # Realistische Latenzen, aber knappe Quotas wie bei einem kleinen API-Kontingent
+    "quota": {
+        "directions": {"latency_median": 0.18, "latency_p99": 0.6, "quota_per_second": 50},
+        "distancematrix": {"latency_median": 0.2, "latency_p99": 0.7, "quota_per_second": 10},
+        "geocode": {"latency_median": 0.08, "latency_p99": 0.3, "quota_per_second": 10},
+        "weather": {"latency_median": 0.12, "latency_p99": 0.4, "quota_per_second": 1},
+        "openai": {"latency_median": 1.2, "latency_p99": 4.0, "quota_per_second": 0.5, "burst": 2},
+        "dortmund": {"latency_median": 0.35, "latency_p99": 1.5, "quota_per_second": 2},
+    },
+}
+
+
+def load_profile(profile: Any = None) -> Dict[str, EndpointProfile]:
+    """
+    Profil für alle Endpoints aus einem Namen aus BENCHMARK_PROFILES oder
+    einem Dict ``{endpoint: {latency_median: ..., ...}}``.
+
+    Raises:
+        ValueError: bei unbekanntem Profilnamen oder Endpoint
+    """
+    if profile is None:
+        profile = {}
+    elif isinstance(profile, str):
+        if profile not in BENCHMARK_PROFILES:
+            raise ValueError(f"Unbekanntes Profil '{profile}', verfügbar: {', '.join(BENCHMARK_PROFILES)}")
+        profile = BENCHMARK_PROFILES[profile]
+
+    unbekannt = set(profile) - set(ENDPOINTS)
+    if unbekannt:
+        raise ValueError(f"Unbekannte Endpoints: {', '.join(sorted(unbekannt))}")
+    return {endpoint: EndpointProfile(**profile.get(endpoint, {})) for endpoint in ENDPOINTS}
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def _hash_anteil(text: str, salt: str = "") -> float:
+    """Deterministischer Wert in [0, 1) - gleiche Eingaben liefern gleiche Antworten"""
+    digest = hashlib.sha1(f"{salt}|{text}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def koordinaten_fuer(text: str) -> Tuple[float, float]:
+    """``"lat,lng"`` direkt, sonst ein stabiler Punkt im Umkreis von ~8 km um die Dortmunder Innenstadt"""
+    teile = text.split(",")
+    if len(teile) == 2:
+        try:
+            return float(teile[0]), float(teile[1])
+        except ValueError:
+            pass
+    winkel = _hash_anteil(text, "winkel") * 2 * math.pi
+    radius_km = 1 + _hash_anteil(text, "radius") * 7
+    return (
+        DORTMUND_ZENTRUM[0] + radius_km / 111.0 * math.sin(winkel),
+        DORTMUND_ZENTRUM[1] + radius_km / (111.0 * math.cos(math.radians(DORTMUND_ZENTRUM[0]))) * math.cos(winkel),
+    )
+
+
+def _distanz_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+def _encode_polyline(punkte: List[Tuple[float, float]]) -> str:
+    """Google Encoded Polyline Algorithm Format"""
+    ergebnis = []
+    prev_lat = prev_lng = 0
+    for lat, lng in punkte:
+        ilat, ilng = int(round(lat * 1e5)), int(round(lng * 1e5))
+        for delta in (ilat - prev_lat, ilng - prev_lng):
+            wert = ~(delta << 1) if delta < 0 else delta << 1
+            while wert >= 0x20:
+                ergebnis.append(chr((0x20 | (wert & 0x1f)) + 63))
+                wert >>= 5
+            ergebnis.append(chr(wert + 63))
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(ergebnis)
+
+
+def _strecke(origin: str, destination: str, mode: str) -> Dict[str, Any]:
+    start, ziel = koordinaten_fuer(origin), koordinaten_fuer(destination)
+    meter = max(50, int(_distanz_km(start, ziel) * UMWEG_FAKTOR * 1000))
+    sekunden = int(meter / 1000 / GESCHWINDIGKEIT_KMH.get(mode, GESCHWINDIGKEIT_KMH["driving"]) * 3600)
+    if mode == "transit":
+        sekunden += TRANSIT_WARTEZEIT_SEKUNDEN
+    strecke = {
+        "start": start,
+        "ziel": ziel,
+        "distance": {"value": meter, "text": f"{meter / 1000:.1f} km"},
+        "duration": {"value": sekunden, "text": f"{sekunden // 60} Min."},
+    }
+    if mode == "driving":
+        # Stabiler Verkehrsfaktor je Strecke zwischen 1.0 und 1.6
+        traffic = int(sekunden * (1 + 0.6 * _hash_anteil(f"{origin}|{destination}", "traffic")))
+        strecke["duration_in_traffic"] = {"value": traffic, "text": f"{traffic // 60} Min."}
+    return strecke
+
+
+def standard_parkhaeuser(anzahl: int = 8) -> List[Dict[str, Any]]:
+    """Parkhäuser im Ring um den Signal Iduna Park - Basis für Stand-in-Livedaten und Benchmark-Fixtures"""
+    parkhaeuser = []
+    for i in range(1, anzahl + 1):
+        winkel = i * 2 * math.pi / anzahl
+        radius_km = 0.5 + (i % 4) * 0.5
+        parkhaeuser.append({
+            "id": f"benchmark-{i:03d}",
+            # Eindeutige Namen, damit find_matching_live_data per Name zuordnet
+            "name": f"P{i} Benchmark{i:03d}",
+            "lat": round(SIGNAL_IDUNA_PARK[0] + radius_km / 111.0 * math.sin(winkel), 6),
+            "lon": round(SIGNAL_IDUNA_PARK[1] + radius_km / 69.0 * math.cos(winkel), 6),
+            "capacity": 200 + 100 * (i % 5),
+        })
+    return parkhaeuser
+
+
+def dortmund_record(parkhaus: Dict[str, Any], frei: int, zeitstempel: str) -> Dict[str, Any]:
+    """Ein Record im Format der Dortmund Explore API (``parkhauser/records``)"""
+    return {
+        "id": parkhaus["id"],
+        "name": parkhaus["name"],
+        "type": "Parkhaus",
+        "geo_point_2d": {"lat": parkhaus["lat"], "lon": parkhaus["lon"]},
+        "capacity": parkhaus["capacity"],
+        "frei": frei,
+        "zeitstempel": zeitstempel,
+        "zeitstempel_status": "aktuell",
+        "parkeinrichtung": "Parkhaus",
+        "stand": zeitstempel,
+    }
+
+
+class StandInServer:
+    """
+    Lokaler HTTP-Server, der Directions, Distance Matrix, Geocoding,
+    OpenWeatherMap, OpenAI Chat Completions und die Dortmund Explore API
+    nachbildet. Antworten sind aus den Eingaben abgeleitet und damit stabil;
+    nur Latenz, Fehler und Belegung sind zufällig (per ``seed`` reproduzierbar).
+    """
+
+    def __init__(self, profile: Any = None, host: str = "127.0.0.1", port: int = 0,
+                 parkhaeuser: Optional[List[Dict[str, Any]]] = None, seed: Optional[int] = None):
+        self.parkhaeuser = parkhaeuser if parkhaeuser is not None else standard_parkhaeuser()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.configure(profile)
+
+        self.httpd = ThreadingHTTPServer((host, port), _StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.standin = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, profile: Any = None):
+        """Setzt ein neues Profil und die Zähler zurück"""
+        profiles = load_profile(profile)
+        with self._lock:
+            self.profiles = profiles
+            self._buckets = {
+                endpoint: _TokenBucket(p.quota_per_second, p.burst)
+                for endpoint, p in profiles.items() if p.quota_per_second
+            }
+            self._stats = {
+                endpoint: {"requests": 0, "errors": 0, "throttled": 0, "latency_total": 0.0}
+                for endpoint in ENDPOINTS
+            }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Zähler pro Endpoint seit dem letzten ``configure``"""
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": s["requests"],
+                    "errors": s["errors"],
+                    "throttled": s["throttled"],
+                    "mean_injected_latency": round(s["latency_total"] / max(1, s["requests"] - s["throttled"]), 4),
+                }
+                for endpoint, s in self._stats.items() if s["requests"]
+            }
+
+    def settings_overrides(self) -> Dict[str, str]:
+        """Settings, die alle Upstream-Calls der App auf diesen Server umleiten"""
+        return {
+            "GOOGLE_MAPS_API_BASE_URL": f"{self.url}/maps/api",
+            "OPENWEATHERMAP_API_BASE_URL": f"{self.url}/data/2.5",
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "DORTMUND_API_URL": f"{self.url}/api/explore/v2.1/catalog/datasets/parkhauser/records",
+            "GOOGLE_MAPS_API_KEY": "standin",
+            "OPENWEATHERMAP_KEY": "standin",
+            "OPENAI_API_KEY": "standin",
+        }
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="api-standins", daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 API-Stand-ins laufen auf {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # -- Anfragebehandlung -------------------------------------------------
+
+    def handle(self, endpoint: str, query: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Wendet Quota, Latenz und Fehlerrate an und liefert (HTTP-Status, JSON-Body)"""
+        profile = self.profiles[endpoint]
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats["requests"] += 1
+            latenz = profile.sample_latency(self._rng)
+            fehler = self._rng.random() < profile.error_rate
+            bucket = self._buckets.get(endpoint)
+
+        if bucket is not None and not bucket.take():
+            with self._lock:
+                stats["throttled"] += 1
+            if endpoint in GOOGLE_ENDPOINTS:
+                return 200, {"status": "OVER_QUERY_LIMIT", "error_message": "Stand-in Quota überschritten",
+                             "routes": [], "rows": [], "results": []}
+            return 429, {"error": {"message": "Rate limit exceeded (Stand-in)", "type": "rate_limit"}}
+
+        with self._lock:
+            stats["latency_total"] += latenz
+        time.sleep(latenz)
+
+        if fehler:
+            with self._lock:
+                stats["errors"] += 1
+            return 500, {"error": {"message": "Stand-in Fehler", "type": "server_error"}}
+
+        return 200, getattr(self, f"_antwort_{endpoint}")(query, body)
+
+    def _antwort_directions(self, query, body):
+        origin, destination = query.get("origin", ""), query.get("destination", "")
+        mode = query.get("mode", "driving")
+        strecke = _strecke(origin, destination, mode)
+        leg = {
+            "distance": strecke["distance"],
+            "duration": strecke["duration"],
+            "start_address": origin,
+            "end_address": destination,
+            "start_location": {"lat": strecke["start"][0], "lng": strecke["start"][1]},
+            "end_location": {"lat": strecke["ziel"][0], "lng": strecke["ziel"][1]},
+            "steps": [{
+                "html_instructions": f"Weiter nach <b>{destination}</b>",
+                "distance": strecke["distance"],
+                "duration": strecke["duration"],
+                "travel_mode": mode.upper(),
+            }],
+        }
+        if "duration_in_traffic" in strecke:
+            leg["duration_in_traffic"] = strecke["duration_in_traffic"]
+        return {
+            "status": "OK",
+            "routes": [{
+                "summary": "Stand-in Route",
+                "legs": [leg],
+                "overview_polyline": {"points": _encode_polyline([strecke["start"], strecke["ziel"]])},
+            }],
+        }
+
+    def _antwort_distancematrix(self, query, body):
+        origins = [o for o in query.get("origins", "").split("|") if o]
+        destinations = [d for d in query.get("destinations", "").split("|") if d]
+        mode = query.get("mode", "driving")
+        rows = []
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                strecke = _strecke(origin, destination, mode)
+                element = {"status": "OK", "distance": strecke["distance"], "duration": strecke["duration"]}
+                if "duration_in_traffic" in strecke:
+                    element["duration_in_traffic"] = strecke["duration_in_traffic"]
+                elements.append(element)
+            rows.append({"elements": elements})
+        return {"status": "OK", "origin_addresses": origins, "destination_addresses": destinations, "rows": rows}
+
+    def _antwort_geocode(self, query, body):
+        adresse = query.get("address", "")
+        if not adresse:
+            return {"status": "ZERO_RESULTS", "results": []}
+        lat, lng = koordinaten_fuer(adresse)
+        return {
+            "status": "OK",
+            "results": [{
+                "formatted_address": f"{adresse}, Deutschland",
+                "geometry": {"location": {"lat": lat, "lng": lng}, "location_type": "APPROXIMATE"},
+                "place_id": hashlib.sha1(adresse.encode("utf-8")).hexdigest()[:27],
+            }],
+        }
+
+    def _antwort_weather(self, query, body):
+        ort = f"{query.get('lat')},{query.get('lon')}"
+        wetter_id, beschreibung = WETTER_VARIANTEN[int(_hash_anteil(ort, "wetter") * len(WETTER_VARIANTEN))]
+        return {
+            "coord": {"lat": float(query.get("lat", 0)), "lon": float(query.get("lon", 0))},
+            "weather": [{"id": wetter_id, "main": "Stand-in", "description": beschreibung}],
+            "main": {"temp": round(4 + 18 * _hash_anteil(ort, "temp"), 1), "humidity": 70},
+            "name": "Dortmund",
+        }
+
+    def _antwort_openai(self, query, body):
+        anzahl = int(body.get("n") or 1)
+        return {
+            "id": f"chatcmpl-standin-{self._rng.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [
+                {
+                    "index": i,
+                    "message": {
+                        "role": "assistant",
+                        "content": f"Der Verkehr rollt rund ums Stadion, plane etwas Puffer ein (Variante {i + 1}).",
+                    },
+                    "finish_reason": "stop",
+                }
+                for i in range(anzahl)
+            ],
+            "usage": {"prompt_tokens": 80, "completion_tokens": 30 * anzahl, "total_tokens": 80 + 30 * anzahl},
+        }
+
+    def _antwort_dortmund(self, query, body):
+        zeitstempel = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        with self._lock:
+            belegung = [self._rng.random() for _ in self.parkhaeuser]
+        limit = int(query.get("limit", 100))
+        results = [
+            dortmund_record(p, int(p["capacity"] * (1 - anteil)), zeitstempel)
+            for p, anteil in zip(self.parkhaeuser, belegung)
+        ][:limit]
+        return {"total_count": len(self.parkhaeuser), "results": results}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        body = {}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = {}
+
+        endpoint = ENDPOINT_PFADE.get(parsed.path.rstrip("/"))
+        if endpoint is None:
+            status, payload = 404, {"error": {"message": f"Unbekannter Stand-in Pfad {parsed.path}"}}
+        else:
+            status, payload = self.server.standin.handle(endpoint, query, body)
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("🧪 Stand-in: " + format % args)
@@ -0,0 +1,226 @@
+# parkmanagement/catalog.py
+
+import gzip
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from .models import KatalogStand, Parkplatz, Stadion, Verein
+from .renderers import ORJSONRenderer
+from .serializers import ParkplatzLeseSerializer, StadionSerializer, VereinSerializer
+
+logger = logging.getLogger(__name__)
+
+KATALOG_STAND_ID = 1  # Einzige Zeile in KatalogStand
+
+
+class VereinEintrag(NamedTuple):
+    id: int
+    name: str
+    stadt: Optional[str]
+    liga: Optional[str]
+    logo_url: Optional[str]
+
+
+class StadionEintrag(NamedTuple):
+    id: int
+    name: str
+    verein_id: int
+    adresse: str
+    latitude: Decimal
+    longitude: Decimal
+    bild_url: Optional[str]
+
+
+class ParkplatzEintrag(NamedTuple):
+    id: int
+    name: str
+    stadion_id: Optional[int]
+    adresse: Optional[str]
+    latitude: Decimal
+    longitude: Decimal
+    kapazitaet: Optional[int]
+    preis_pro_stunde: Optional[Decimal]
+    bewertung: Optional[Decimal]
+    verfuegbar: bool
+    external_id: Optional[str]
+
+
+class KatalogSnapshot(NamedTuple):
+    """
+    Unveränderlicher Stand aller Vereine, Stadien und Parkplätze.
+
+    Die Einträge haben die Attribute der Modelle, die Routing, Wetter und
+    Live-Daten-Matching lesen (``id``, ``name``, ``latitude``, ...), und
+    können statt der Model-Instanzen übergeben werden. ``daten`` enthält die
+    serialisierte Darstellung der Katalog-Endpoints pro Modell und ID.
+    """
+    stempel: str
+    vereine: Mapping[int, VereinEintrag]
+    stadien: Mapping[int, StadionEintrag]
+    parkplaetze: Mapping[int, ParkplatzEintrag]
+    stadien_pro_verein: Mapping[int, Tuple[StadionEintrag, ...]]
+    parkplaetze_pro_stadion: Mapping[int, Tuple[ParkplatzEintrag, ...]]
+    daten: Mapping[str, Mapping[int, Dict[str, Any]]]
+
+    def stadion_fuer_verein(self, verein_id: Optional[int]) -> Optional[StadionEintrag]:
+        """Erstes Stadion des Vereins (wie ``verein.stadien.first()``)"""
+        stadien = self.stadien_pro_verein.get(verein_id, ())
+        return stadien[0] if stadien else None
+
+    def parkplaetze_fuer_stadion(self, stadion_id: int) -> Tuple[ParkplatzEintrag, ...]:
+        return self.parkplaetze_pro_stadion.get(stadion_id, ())
+
+
+class KatalogPayload(NamedTuple):
+    """Vorberechnete Antwort des ``catalog/`` Endpoints für einen Stempel"""
+    stempel: str
+    json: bytes
+    gzip: bytes
+
+
+class Katalog:
+    """
+    In-Process-Snapshot der Stammdaten (ändern sich etwa wöchentlich).
+
+    Jeder Worker hält einen Snapshot samt Versionsstempel aus ``KatalogStand``.
+    Änderungen an Verein/Stadion/Parkplatz setzen per Signal nach dem Commit
+    einen neuen Stempel und verwerfen den lokalen Snapshot sofort; andere
+    Worker vergleichen den Stempel höchstens alle KATALOG_PRUEFINTERVALL_SEKUNDEN
+    und laden bei Abweichung neu.
+    """
+
+    _snapshot: Optional[KatalogSnapshot] = None
+    _payload: Optional[KatalogPayload] = None
+    _geprueft = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def snapshot() -> KatalogSnapshot:
+        snapshot = Katalog._snapshot
+        intervall = getattr(settings, "KATALOG_PRUEFINTERVALL_SEKUNDEN", 5.0)
+        if snapshot is not None and time.monotonic() - Katalog._geprueft < intervall:
+            return snapshot
+
+        with Katalog._lock:
+            # Ein anderer Thread hat inzwischen geladen bzw. geprüft
+            if Katalog._snapshot is not None and time.monotonic() - Katalog._geprueft < intervall:
+                return Katalog._snapshot
+            stempel = Katalog._stempel()
+            if Katalog._snapshot is None or Katalog._snapshot.stempel != stempel:
+                Katalog._snapshot = Katalog._laden(stempel)
+            Katalog._geprueft = time.monotonic()
+            return Katalog._snapshot
+
+    @staticmethod
+    def payload() -> KatalogPayload:
+        """Alle Vereine, Stadien und Parkplätze als JSON und gzip - einmal pro Stempel erzeugt"""
+        snapshot = Katalog.snapshot()
+        payload = Katalog._payload
+        if payload is None or payload.stempel != snapshot.stempel:
+            inhalt = ORJSONRenderer().render({
+                "version": snapshot.stempel,
+                "vereine": list(snapshot.daten["verein"].values()),
+                "stadien": list(snapshot.daten["stadion"].values()),
+                "parkplaetze": list(snapshot.daten["parkplatz"].values()),
+            })
+            payload = KatalogPayload(snapshot.stempel, inhalt, gzip.compress(inhalt, compresslevel=9, mtime=0))
+            Katalog._payload = payload
+        return payload
+
+    @staticmethod
+    def stempel() -> str:
+        """Versionsstempel des aktuellen Snapshots"""
+        return Katalog.snapshot().stempel
+
+    @staticmethod
+    def vorladen():
+        """Lädt den Snapshot beim Worker-Start (vor migrate ohne Tabellen: nur Warnung)"""
+        try:
+            snapshot = Katalog.snapshot()
+            logger.info(
+                f"📚 Katalog geladen: {len(snapshot.vereine)} Vereine, {len(snapshot.stadien)} Stadien, "
+                f"{len(snapshot.parkplaetze)} Parkplätze"
+            )
+        except DatabaseError as e:
+            logger.warning(f"⚠️ Katalog konnte nicht vorgeladen werden: {e}")
+
+    @staticmethod
+    def zuruecksetzen():
+        """Verwirft den lokalen Snapshot (nächster Zugriff lädt neu)"""
+        Katalog._snapshot = None
+
+    @staticmethod
+    def geaendert():
+        """Signal-Handler: neuer Stempel nach dem Commit der Änderung"""
+        transaction.on_commit(Katalog._stempel_erneuern)
+
+    @staticmethod
+    def _stempel_erneuern():
+        stempel = uuid.uuid4().hex
+        if not KatalogStand.objects.filter(pk=KATALOG_STAND_ID).update(stempel=stempel):
+            KatalogStand.objects.update_or_create(pk=KATALOG_STAND_ID, defaults={"stempel": stempel})
+        Katalog._snapshot = None
+
+    @staticmethod
+    def _stempel() -> str:
+        stand, _ = KatalogStand.objects.get_or_create(
+            pk=KATALOG_STAND_ID, defaults={"stempel": uuid.uuid4().hex}
+        )
+        return stand.stempel
+
+    @staticmethod
+    def _laden(stempel: str) -> KatalogSnapshot:
+        """Eine Abfrage pro Modell; der Stempel wurde vorher gelesen, damit kein neuerer Stand verloren geht"""
+        vereine = list(Verein.objects.order_by("pk"))
+        stadien = list(Stadion.objects.order_by("pk"))
+        parkplaetze = list(Parkplatz.objects.order_by("pk"))
+
+        stadien_pro_verein: Dict[int, list] = {}
+        stadion_eintraege = {}
+        for stadion in stadien:
+            eintrag = StadionEintrag(
+                stadion.id, stadion.name, stadion.verein_id, stadion.adresse,
+                stadion.latitude, stadion.longitude, stadion.bild_url,
+            )
+            stadion_eintraege[stadion.id] = eintrag
+            stadien_pro_verein.setdefault(stadion.verein_id, []).append(eintrag)
+
+        parkplaetze_pro_stadion: Dict[int, list] = {}
+        parkplatz_eintraege = {}
+        for parkplatz in parkplaetze:
+            eintrag = ParkplatzEintrag(
+                parkplatz.id, parkplatz.name, parkplatz.stadion_id, parkplatz.adresse,
+                parkplatz.latitude, parkplatz.longitude, parkplatz.kapazitaet,
+                parkplatz.preis_pro_stunde, parkplatz.bewertung, parkplatz.verfuegbar,
+                parkplatz.external_id,
+            )
+            parkplatz_eintraege[parkplatz.id] = eintrag
+            parkplaetze_pro_stadion.setdefault(parkplatz.stadion_id, []).append(eintrag)
+
+        def je_id(objekte, serializer_class) -> Mapping[int, Dict[str, Any]]:
+            return MappingProxyType({obj.id: daten for obj, daten in zip(objekte, serializer_class(objekte, many=True).data)})
+
+        return KatalogSnapshot(
+            stempel=stempel,
+            vereine=MappingProxyType({
+                verein.id: VereinEintrag(verein.id, verein.name, verein.stadt, verein.liga, verein.logo_url)
+                for verein in vereine
+            }),
+            stadien=MappingProxyType(stadion_eintraege),
+            parkplaetze=MappingProxyType(parkplatz_eintraege),
+            stadien_pro_verein=MappingProxyType({k: tuple(v) for k, v in stadien_pro_verein.items()}),
+            parkplaetze_pro_stadion=MappingProxyType({k: tuple(v) for k, v in parkplaetze_pro_stadion.items()}),
+            daten=MappingProxyType({
+                "verein": je_id(vereine, VereinSerializer),
+                "stadion": je_id(stadien, StadionSerializer),
+                "parkplatz": je_id(parkplaetze, ParkplatzLeseSerializer),
+            }),
+        )
@@ -0,0 +1,297 @@
+# parkmanagement/comment_cache.py
+
+import logging
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .metrics import track_cache_lookup
+from .models import KommentarJob
+from .performance_monitor import submit_with_context
+from .upstream import cached_value
+
+logger = logging.getLogger(__name__)
+
+# Pool-Konfiguration
+KOMMENTAR_POOL_SIZE = 5  # Vorgenerierte Varianten pro Bucket
+KOMMENTAR_TOPUP_WORKERS = 2  # Parallele GPT-Calls zum Auffüllen
+
+# Job-Konfiguration für die nicht-blockierende Anreicherung
+KOMMENTAR_BUDGET_SEKUNDEN = 1.0  # Max. Wartezeit im Request auf den GPT-Kommentar
+KOMMENTAR_JOB_WORKERS = 4
+KOMMENTAR_JOB_TIMEOUT = 300  # 5 Minuten abrufbar über den Follow-up Endpoint
+
+# Bucket-Definitionen - die GPT-Eingaben werden auf wenige diskrete Werte abgebildet
+VERZOEGERUNG_BUCKETS = [
+    (1, "keine", "keine nennenswerte"),
+    (5, "gering", "etwa 2-5 Minuten"),
+    (15, "mittel", "etwa 6-15 Minuten"),
+    (30, "hoch", "etwa 16-30 Minuten"),
+]
+VERZOEGERUNG_EXTREM = ("extrem", "mehr als 30 Minuten")
+
+ZEIT_KONTEXTE = {
+    "morgen": "zur Hauptverkehrszeit am Morgen",
+    "feierabend": "im Feierabendverkehr",
+    "mittag": "zur Mittagszeit",
+    "nacht": "zur verkehrsarmen Nachtzeit",
+    "tag": "zur aktuellen Zeit",
+}
+
+WETTER_KATEGORIEN = {
+    "schlecht": "Schlechtwetter mit Einfluss auf den Verkehr",
+    "gut": "schönes Wetter",
+    "normal": "durchschnittliches Wetter",
+    "unbekannt": "unbekannt",
+}
+
+Bucket = Tuple[int, str, str, str]
+
+
+def verzoegerung_bucket(verzoegerung_min) -> str:
+    """Ordnet eine Verzögerung in Minuten einem Bucket zu."""
+    minuten = verzoegerung_min or 0
+    for grenze, name, _ in VERZOEGERUNG_BUCKETS:
+        if minuten <= grenze:
+            return name
+    return VERZOEGERUNG_EXTREM[0]
+
+
+def verzoegerung_text(bucket_name: str) -> str:
+    """Lesbare Beschreibung eines Verzögerungs-Buckets für den GPT-Prompt."""
+    for _, name, text in VERZOEGERUNG_BUCKETS:
+        if name == bucket_name:
+            return text
+    return VERZOEGERUNG_EXTREM[1]
+
+
+def tageszeit_bucket(tageszeit) -> str:
+    """Ordnet eine Uhrzeit den Tageszeit-Kontexten des GPT-Prompts zu."""
+    if tageszeit is None or isinstance(tageszeit, str):
+        tageszeit = datetime.now()
+    hour = tageszeit.hour if isinstance(tageszeit, datetime) else tageszeit
+
+    if 7 <= hour <= 9:
+        return "morgen"
+    elif 17 <= hour <= 19:
+        return "feierabend"
+    elif 12 <= hour <= 14:
+        return "mittag"
+    elif 22 <= hour or hour <= 6:
+        return "nacht"
+    return "tag"
+
+
+def wetter_bucket(wetter_data: Optional[Dict[str, Any]]) -> str:
+    """Ordnet Wetterdaten anhand ihres Verkehrseinflusses einer Kategorie zu."""
+    if not wetter_data or wetter_data.get("temperatur") is None:
+        return "unbekannt"
+
+    einfluss = wetter_data.get("verkehr_einfluss", 1)
+    if einfluss > 1.2:
+        return "schlecht"
+    elif einfluss < 0.95:
+        return "gut"
+    return "normal"
+
+
+class VerkehrsKommentarCache:
+    """
+    Cache für GPT-Verkehrskommentare, gruppiert nach diskreten Buckets
+    (Score 1-5, Verzögerung, Tageszeit, Wetterkategorie).
+
+    Pro Bucket wird ein Pool von Varianten vorgehalten. Der Request-Pfad ist
+    ein reiner Dictionary-Lookup, GPT wird nur im Hintergrund zum Auffüllen
+    des Pools aufgerufen.
+    """
+
+    _pools: Dict[Bucket, List[str]] = {}
+    _lock = threading.Lock()
+    _in_flight = set()
+    _executor = ThreadPoolExecutor(max_workers=KOMMENTAR_TOPUP_WORKERS, thread_name_prefix="kommentar-topup")
+
+    @staticmethod
+    def bucket_fuer(verkehr_score, verzoegerung_min, wetter_data, tageszeit) -> Bucket:
+        """Bildet die Kommentar-Eingaben auf einen Cache-Bucket ab."""
+        score = min(5, max(1, int(verkehr_score or 3)))
+        return (
+            score,
+            verzoegerung_bucket(verzoegerung_min),
+            tageszeit_bucket(tageszeit),
+            wetter_bucket(wetter_data),
+        )
+
+    @staticmethod
+    def get(bucket: Bucket, nachfuellen_bei_miss: bool = True) -> Optional[str]:
+        """
+        Liefert eine zufällige Variante aus dem Pool oder None bei Cache-Miss.
+
+        Ist der Pool nicht voll, wird im Hintergrund nachgefüllt. Bei einem
+        leeren Pool nur mit ``nachfuellen_bei_miss`` - ein Aufrufer, der dann
+        selbst synchron generiert, würde sonst einen zweiten GPT-Call auslösen.
+        """
+        with track_cache_lookup("verkehrs_kommentar") as lookup, VerkehrsKommentarCache._lock:
+            pool = VerkehrsKommentarCache._pools.get(bucket)
+            kommentar = random.choice(pool) if pool else None
+            pool_size = len(pool) if pool else 0
+            kommentar = cached_value("verkehrs_kommentar", str(bucket), kommentar)
+            lookup["hit"] = kommentar is not None
+
+        if pool_size < KOMMENTAR_POOL_SIZE and (pool_size or nachfuellen_bei_miss):
+            VerkehrsKommentarCache.top_up_async(bucket)
+
+        return kommentar
+
+    @staticmethod
+    def add(bucket: Bucket, varianten: Iterable[str]):
+        """Fügt neue Varianten zum Pool eines Buckets hinzu."""
+        with VerkehrsKommentarCache._lock:
+            pool = VerkehrsKommentarCache._pools.setdefault(bucket, [])
+            for kommentar in varianten:
+                if kommentar and kommentar not in pool and len(pool) < KOMMENTAR_POOL_SIZE:
+                    pool.append(kommentar)
+
+    @staticmethod
+    def top_up_async(bucket: Bucket):
+        """Plant das Auffüllen eines Pools (dedupliziert pro Bucket)."""
+        with VerkehrsKommentarCache._lock:
+            if bucket in VerkehrsKommentarCache._in_flight:
+                return None
+            VerkehrsKommentarCache._in_flight.add(bucket)
+
+        return VerkehrsKommentarCache._executor.submit(VerkehrsKommentarCache._top_up, bucket)
+
+    @staticmethod
+    def _top_up(bucket: Bucket) -> int:
+        from .utils import generiere_gpt_kommentar_varianten
+
+        try:
+            with VerkehrsKommentarCache._lock:
+                fehlend = KOMMENTAR_POOL_SIZE - len(VerkehrsKommentarCache._pools.get(bucket, []))
+            if fehlend <= 0:
+                return 0
+
+            varianten = generiere_gpt_kommentar_varianten(bucket, anzahl=fehlend)
+            VerkehrsKommentarCache.add(bucket, varianten)
+            logger.info(f"💬 Kommentar-Pool {bucket} um {len(varianten)} Varianten aufgefüllt")
+            return len(varianten)
+
+        except Exception as e:
+            logger.error(f"❌ Kommentar-Pool {bucket} konnte nicht aufgefüllt werden: {e}")
+            return 0
+
+        finally:
+            with VerkehrsKommentarCache._lock:
+                VerkehrsKommentarCache._in_flight.discard(bucket)
+
+    @staticmethod
+    def prewarm(buckets: Iterable[Bucket]) -> List:
+        """Füllt die Pools der angegebenen Buckets im Hintergrund."""
+        return [f for f in (VerkehrsKommentarCache.top_up_async(b) for b in buckets) if f is not None]
+
+    @staticmethod
+    def clear():
+        with VerkehrsKommentarCache._lock:
+            VerkehrsKommentarCache._pools.clear()
+
+
+class KommentarJobs:
+    """
+    Nebenläufige Kommentar-Generierung mit abrufbarem Ergebnis.
+
+    Der Request wartet höchstens ein festes Budget auf den Kommentar. Nur
+    Jobs, die dabei nicht fertig werden, legt ``zuruecklegen`` in
+    ``KommentarJob`` ab (für alle Worker sichtbar); ihr Ergebnis kann über
+    den Follow-up Endpoint ``routen-vorschlag/kommentar/<job_id>/``
+    abgeholt werden. Rechtzeitig fertige Jobs kosten keine DB-Abfrage.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=KOMMENTAR_JOB_WORKERS, thread_name_prefix="kommentar-job")
+    _lock = threading.Lock()
+    _laufend: Dict[str, Dict[str, Any]] = {}  # job_id -> Besitzer, Sperre, ob fertig bzw. abgelegt
+
+    @staticmethod
+    def starten(benutzer_id: int, generator: Callable[..., str], **kwargs):
+        """
+        Startet die Kommentar-Generierung im Hintergrund.
+
+        Returns:
+            Tuple aus Job-ID und Future mit dem Kommentar
+        """
+        job_id = uuid.uuid4().hex
+        with KommentarJobs._lock:
+            KommentarJobs._laufend[job_id] = {
+                "benutzer_id": benutzer_id, "lock": threading.Lock(), "fertig": False, "abgelegt": False,
+            }
+        # Kontext mitnehmen, damit der GPT-Call der Session des Requests zugeordnet wird
+        future = submit_with_context(KommentarJobs._executor, KommentarJobs._ausfuehren, job_id, generator, kwargs)
+        return job_id, future
+
+    @staticmethod
+    def zuruecklegen(job_id: str) -> bool:
+        """
+        Legt einen noch laufenden Job für den Follow-up Endpoint ab.
+
+        Returns:
+            False, falls der Job inzwischen fertig ist (Ergebnis direkt aus dem Future)
+        """
+        with KommentarJobs._lock:
+            zustand = KommentarJobs._laufend.get(job_id)
+        if zustand is None:
+            return False
+        # Sperre pro Job: das Ergebnis wird erst nach dem Anlegen der Zeile geschrieben
+        with zustand["lock"]:
+            if zustand["fertig"]:
+                return False
+            KommentarJob.objects.create(job_id=job_id, benutzer_id=zustand["benutzer_id"])
+            zustand["abgelegt"] = True
+        return True
+
+    @staticmethod
+    def _ausfuehren(job_id: str, generator: Callable[..., str], kwargs: Dict[str, Any]) -> str:
+        status, kommentar = "failed", None
+        try:
+            kommentar = generator(**kwargs)
+            status = "ready"
+            return kommentar
+        except Exception as e:
+            logger.error(f"❌ Kommentar-Job {job_id} fehlgeschlagen: {e}")
+            raise
+        finally:
+            with KommentarJobs._lock:
+                zustand = KommentarJobs._laufend.pop(job_id)
+            with zustand["lock"]:
+                zustand["fertig"] = True
+            if zustand["abgelegt"]:
+                KommentarJobs._speichern(job_id, status, kommentar)
+
+    @staticmethod
+    def _speichern(job_id: str, status: str, kommentar: Optional[str]):
+        try:
+            KommentarJob.objects.filter(job_id=job_id).update(status=status, verkehr_kommentar=kommentar)
+            KommentarJob.objects.filter(
+                erstellt__lt=timezone.now() - timedelta(seconds=KOMMENTAR_JOB_TIMEOUT)
+            ).delete()
+        except DatabaseError as e:
+            logger.error(f"❌ Kommentar-Job {job_id} konnte nicht gespeichert werden: {e}")
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def ergebnis(job_id: str, benutzer_id: int) -> Optional[Dict[str, Any]]:
+        """Liefert den Job-Status für den Besitzer oder None, falls unbekannt oder abgelaufen."""
+        return (
+            KommentarJob.objects.filter(
+                job_id=job_id,
+                benutzer_id=benutzer_id,
+                erstellt__gte=timezone.now() - timedelta(seconds=KOMMENTAR_JOB_TIMEOUT),
+            )
+            .values("status", "verkehr_kommentar")
+            .first()
+        )
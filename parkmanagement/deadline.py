@@ -0,0 +1,78 @@
+# parkmanagement/deadline.py
+
+import time
+from typing import Optional
+
+# Gesamtbudget für einen Routenvorschlag inkl. Routing, Live-Daten und Kommentar
+ROUTEN_VORSCHLAG_BUDGET_SEKUNDEN = 12.0
+
+# Fester Anteil für die Dortmunder Live-Daten - sie sind optional und dürfen das Routing nicht verdrängen
+LIVE_DATEN_TIMEOUT_SEKUNDEN = 2.0
+
+# Untergrenze für Timeouts, damit fast abgelaufene Budgets nicht zu 0s-Timeouts führen
+MIN_TIMEOUT_SEKUNDEN = 0.05
+
+
+class DeadlineExceeded(Exception):
+    """Das Zeitbudget des Requests ist aufgebraucht."""
+
+
+class Deadline:
+    """
+    Request-bezogenes Zeitbudget.
+
+    Wird in RouteSuggestionView erzeugt und an Routing, Live-Daten und
+    GPT-Aufrufe durchgereicht. Jeder Sub-Call leitet seinen Timeout aus dem
+    verbleibenden Budget ab, statt eigene feste Timeouts zu addieren.
+    """
+
+    def __init__(self, budget_sekunden: float):
+        self.budget = budget_sekunden
+        self.start = time.monotonic()
+        self.ende = self.start + budget_sekunden
+
+    def remaining(self) -> float:
+        """Verbleibende Zeit in Sekunden (nie negativ)."""
+        return max(0.0, self.ende - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.ende
+
+    def timeout(self, maximum: Optional[float] = None) -> float:
+        """
+        Timeout für einen Sub-Call: das verbleibende Budget, höchstens ``maximum``.
+
+        Raises:
+            DeadlineExceeded: wenn das Budget bereits aufgebraucht ist
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Zeitbudget von {self.budget:.1f}s überschritten")
+        if maximum is not None:
+            remaining = min(remaining, maximum)
+        return max(remaining, MIN_TIMEOUT_SEKUNDEN)
+
+    def to_dict(self):
+        return {
+            "budget_seconds": self.budget,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "exceeded": self.expired,
+        }
+
+
+def restzeit(deadline: Optional[Deadline], maximum: float, anteil: float = 1.0) -> float:
+    """
+    Timeout aus einer optionalen Deadline: höchstens ``anteil`` des verbleibenden
+    Budgets und höchstens ``maximum``. Ohne Deadline gilt ``maximum``.
+    """
+    if deadline is None:
+        return maximum
+    return deadline.timeout(min(maximum, deadline.remaining() * anteil))
+
+
+def ist_abgelaufen(deadline: Optional[Deadline]) -> bool:
+    return deadline is not None and deadline.expired
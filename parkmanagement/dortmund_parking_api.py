@@ -1,16 +1,21 @@
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List, Any
 from django.conf import settings
 from django.core.cache import cache
 import math
 
+from .metrics import record_live_data_fetch, track_cache_lookup, track_upstream
+from .upstream import cached_value, get_json
+
 logger = logging.getLogger(__name__)
 
 # Cache-Konfiguration
 CACHE_TIMEOUT = 300  # 5 Minuten Cache für Live-Daten
-DORTMUND_API_URL = "https://open-data.dortmund.de/api/explore/v2.1/catalog/datasets/parkhauser/records"
+LIVE_DATA_CACHE_KEY = "dortmund_parking_live_data"
 
 class DortmundParkingData:
     """
@@ -18,18 +23,27 @@ class DortmundParkingData:
     Stellt Live-Verfügbarkeitsdaten für Parkplätze bereit
     """
     
+    _refresh_lock = threading.Lock()
+    _refresh_in_flight = False
+    _refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dortmund-refresh")
+
     @staticmethod
-    def fetch_live_parking_data() -> Optional[List[Dict[str, Any]]]:
+    def fetch_live_parking_data(timeout: float = 10) -> Optional[List[Dict[str, Any]]]:
         """
         Holt aktuelle Parkplatzdaten von der Dortmund Open Data API.
         
+        Args:
+            timeout: HTTP-Timeout in Sekunden (z.B. Restbudget des Requests)
+        
         Returns:
             List[Dict]: Live-Parkplatzdaten oder None bei Fehler
         """
-        cache_key = "dortmund_parking_live_data"
+        cache_key = LIVE_DATA_CACHE_KEY
         
         # Prüfe Cache zuerst
-        cached_data = cache.get(cache_key)
+        with track_cache_lookup("dortmund_live_data") as lookup:
+            cached_data = cached_value("dortmund_live_data", cache_key, cache.get(cache_key))
+            lookup["hit"] = bool(cached_data)
         if cached_data:
             logger.info("📦 Dortmund Parkdaten aus Cache geladen")
             return cached_data
@@ -37,20 +51,19 @@ class DortmundParkingData:
         try:
             logger.info("🔄 Lade Live-Parkdaten von Dortmund Open Data API...")
             
-            response = requests.get(
-                DORTMUND_API_URL,
-                params={
-                    "limit": 100,  # Alle verfügbaren Parkplätze
-                    "timezone": "Europe/Berlin"
-                },
-                timeout=10,
-                headers={
-                    'User-Agent': 'MatchRoute-Research-App/1.0'
-                }
-            )
-            
-            response.raise_for_status()
-            api_data = response.json()
+            with track_upstream("dortmund_open_data", "parkhaeuser"):
+                api_data = get_json(
+                    "dortmund_open_data", "parkhaeuser",
+                    settings.DORTMUND_API_URL,
+                    params={
+                        "limit": 100,  # Alle verfügbaren Parkplätze
+                        "timezone": "Europe/Berlin"
+                    },
+                    timeout=timeout,
+                    headers={
+                        'User-Agent': 'MatchRoute-Research-App/1.0'
+                    }
+                )
             
             if "results" not in api_data:
                 logger.error("❌ Unerwartete API-Struktur von Dortmund Open Data")
@@ -66,6 +79,13 @@ class DortmundParkingData:
             # In Cache speichern
             cache.set(cache_key, parking_data, CACHE_TIMEOUT)
             
+            # Alter der Live-Daten für /metrics (jüngster Quell-Zeitstempel)
+            source_timestamps = [
+                datetime.fromisoformat(item["last_update"]).timestamp()
+                for item in parking_data if item.get("last_update")
+            ]
+            record_live_data_fetch(max(source_timestamps) if source_timestamps else None)
+            
             logger.info(f"✅ {len(parking_data)} Dortmund Parkplätze erfolgreich geladen")
             return parking_data
             
@@ -79,6 +99,36 @@ class DortmundParkingData:
             logger.error(f"❌ Unerwarteter Fehler bei Dortmund API: {e}")
             return None
     
+    @staticmethod
+    def cached_live_parking_data() -> Optional[List[Dict[str, Any]]]:
+        """
+        Live-Daten nur aus dem Cache (kein API-Call im Request-Pfad).
+        Bei einem Miss wird im Hintergrund nachgeladen.
+        """
+        with track_cache_lookup("dortmund_live_data") as lookup:
+            cached_data = cache.get(LIVE_DATA_CACHE_KEY)
+            lookup["hit"] = bool(cached_data)
+        if not cached_data:
+            DortmundParkingData.refresh_async()
+        return cached_data
+
+    @staticmethod
+    def refresh_async():
+        """Lädt die Live-Daten im Hintergrund in den Cache (dedupliziert)"""
+        with DortmundParkingData._refresh_lock:
+            if DortmundParkingData._refresh_in_flight:
+                return None
+            DortmundParkingData._refresh_in_flight = True
+
+        def laden():
+            try:
+                return DortmundParkingData.fetch_live_parking_data()
+            finally:
+                with DortmundParkingData._refresh_lock:
+                    DortmundParkingData._refresh_in_flight = False
+
+        return DortmundParkingData._refresh_executor.submit(laden)
+
     @staticmethod
     def _process_parking_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,84 @@
+# parkmanagement/management/commands/benchmark_micro.py
+
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.benchmark.micro import (
+    MIN_MESSZEIT,
+    REGRESSIONS_SCHWELLE,
+    WIEDERHOLUNGEN,
+    fuehre_aus,
+    lade_baseline,
+    speichere_baseline,
+    vergleiche,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-Benchmarks der Hot-Path-Funktionen (pro Parkplatz/Live-Item und Request) mit "
+        "ns/op, Speicher pro Operation und Vergleich gegen eine gespeicherte Baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filter", help="Nur Benchmarks, deren Name den Text enthält")
+        parser.add_argument("--min-time", type=float, default=MIN_MESSZEIT, help="Mindestdauer pro Messlauf (s)")
+        parser.add_argument("--repeat", type=int, default=WIEDERHOLUNGEN, help="Messläufe, gewertet wird das Minimum")
+        parser.add_argument("--no-alloc", action="store_true", help="Speichermessung (tracemalloc) überspringen")
+        parser.add_argument("--baseline", default=os.path.join(settings.BASE_DIR, "benchmarks", "micro_baseline.json"),
+                            help="Baseline-Datei")
+        parser.add_argument("--save-baseline", action="store_true", help="Ergebnisse als neue Baseline speichern")
+        parser.add_argument("--threshold", type=float, default=REGRESSIONS_SCHWELLE,
+                            help="Relative Verschlechterung, ab der eine Regression gemeldet wird")
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit-Code 1 bei Regressionen")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+
+    def handle(self, *args, **options):
+        ergebnisse = fuehre_aus(
+            filter_text=options["filter"],
+            min_zeit=options["min_time"],
+            wiederholungen=options["repeat"],
+            allokationen=not options["no_alloc"],
+        )
+        if not ergebnisse:
+            raise CommandError(f"Kein Benchmark passt zum Filter '{options['filter']}'")
+
+        vergleich = vergleiche(ergebnisse, lade_baseline(options["baseline"]), options["threshold"])
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps({"results": ergebnisse, "comparison": vergleich}, indent=2))
+        else:
+            self.stdout.write(self._als_text(ergebnisse, vergleich))
+
+        if options["save_baseline"]:
+            speichere_baseline(options["baseline"], ergebnisse)
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline gespeichert: {options['baseline']}"))
+
+        regressionen = [name for name, v in vergleich.items() if v["regression"]]
+        if regressionen and options["fail_on_regression"]:
+            raise CommandError(f"Regressionen: {', '.join(regressionen)}")
+
+    def _als_text(self, ergebnisse, vergleich):
+        zeilen = [
+            f"{'Benchmark':<46} {'ns/op':>12} {'Median':>12} {'Peak B/op':>10} {'Rest B/op':>10}  Baseline",
+        ]
+        for name, r in ergebnisse.items():
+            v = vergleich.get(name)
+            if v is None:
+                baseline = "-"
+            else:
+                baseline = f"{v['time_change'] * 100:+.1f}% Zeit" if v["time_change"] is not None else "?"
+                if v["alloc_change"] is not None:
+                    baseline += f", {v['alloc_change'] * 100:+.1f}% Speicher"
+                if v["regression"]:
+                    baseline = self.style.ERROR(f"{baseline}  REGRESSION")
+            zeilen.append(
+                f"{name:<46} {r['ns_per_op']:>12,.0f} {r['ns_per_op_median']:>12,.0f}"
+                f" {r.get('alloc_peak_bytes_per_op', 0):>10,.0f} {r.get('retained_bytes_per_op', 0):>10,.0f}  {baseline}"
+            )
+        zeilen.append("")
+        zeilen.append("Operation = " + "; ".join(sorted({f"{n.split('[')[0]}: {r['unit']}" for n, r in ergebnisse.items()})))
+        return "\n".join(zeilen)
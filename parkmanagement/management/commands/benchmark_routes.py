@@ -0,0 +1,105 @@
+# parkmanagement/management/commands/benchmark_routes.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.benchmark import BENCHMARK_PROFILES, load_profile, standard_parkhaeuser
+from parkmanagement.benchmark.runner import RouteBenchmark, benchmark_umgebung, erstelle_benchmark_daten
+
+
+class Command(BaseCommand):
+    help = (
+        "Hermetischer End-to-End-Benchmark von RouteSuggestionView gegen lokale API-Stand-ins "
+        "(Google, OpenWeatherMap, OpenAI, Dortmund) - ohne API-Keys, in einer Test-Datenbank."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", action="append", dest="configs",
+                            help=f"Profil (mehrfach möglich): {', '.join(BENCHMARK_PROFILES)}. "
+                                 "Standard: instant und realistic")
+        parser.add_argument("--config-file",
+                            help='JSON-Datei {"name": {"directions": {"latency_median": 0.2, ...}, ...}}')
+        parser.add_argument("--requests", type=int, default=50, help="Gemessene Requests pro Konfiguration")
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallele Clients")
+        parser.add_argument("--warmup", type=int, default=2, help="Ungemessene Requests vor jeder Konfiguration")
+        parser.add_argument("--parkplaetze", type=int, default=8, help="Parkplätze am Benchmark-Stadion")
+        parser.add_argument("--users", type=int, default=10, help="Benutzer (JWT) im Wechsel")
+        parser.add_argument("--start-adressen", type=int, default=20,
+                            help="Verschiedene Startadressen - weniger bedeutet mehr Cache-Treffer")
+        parser.add_argument("--seed", type=int, help="Seed für Latenzen, Fehler und Belegung")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+        parser.add_argument("--output", help="Ergebnis in Datei schreiben statt auf stdout")
+
+    def handle(self, *args, **options):
+        konfigurationen = self._konfigurationen(options)
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests und --concurrency müssen mindestens 1 sein")
+
+        parkhaeuser = standard_parkhaeuser(options["parkplaetze"])
+        with benchmark_umgebung(parkhaeuser, seed=options["seed"]) as server:
+            benchmark = RouteBenchmark(
+                server,
+                erstelle_benchmark_daten(parkhaeuser, options["users"]),
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                warmup=options["warmup"],
+                start_adressen=options["start_adressen"],
+            )
+            ergebnisse = []
+            for name, profile in konfigurationen:
+                self.stderr.write(f"🏁 {name} ...")
+                ergebnisse.append(benchmark.run(name, profile))
+
+        if options["format"] == "json":
+            ausgabe = json.dumps({"results": ergebnisse}, indent=2)
+        else:
+            ausgabe = self._als_text(ergebnisse)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(ausgabe + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Benchmark geschrieben: {options['output']}"))
+        else:
+            self.stdout.write(ausgabe)
+
+    def _konfigurationen(self, options):
+        konfigurationen = []
+        if options["config_file"]:
+            try:
+                with open(options["config_file"], encoding="utf-8") as fh:
+                    konfigurationen.extend(json.load(fh).items())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Konfigurationsdatei nicht lesbar: {e}")
+        for name in options["configs"] or ([] if konfigurationen else ["instant", "realistic"]):
+            konfigurationen.append((name, name))
+
+        for name, profile in konfigurationen:
+            try:
+                load_profile(profile)
+            except (TypeError, ValueError) as e:
+                raise CommandError(f"Konfiguration '{name}': {e}")
+        return konfigurationen
+
+    def _als_text(self, ergebnisse):
+        zeilen = [
+            "📊 RouteSuggestionView Benchmark (Latenzen in ms)",
+            f"{'Konfiguration':<16} {'Requests':>8} {'par.':>4} {'req/s':>7} {'OK %':>6}"
+            f" {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}",
+        ]
+        for r in ergebnisse:
+            latenz = {k: (v * 1000 if v is not None else float("nan")) for k, v in r["latency"].items()}
+            zeilen.append(
+                f"{r['configuration']:<16} {r['requests']:>8} {r['concurrency']:>4} {r['throughput_rps']:>7.2f}"
+                f" {r['success_rate']:>6.1f} {latenz['p50']:>8.1f} {latenz['p95']:>8.1f}"
+                f" {latenz['p99']:>8.1f} {latenz['max']:>8.1f}"
+            )
+
+        for r in ergebnisse:
+            zeilen += ["", f"{r['configuration']}: Status {r['status_codes']}, Kommentar {r['kommentar_status']}"]
+            for endpoint, stats in sorted(r["upstream"].items()):
+                zeilen.append(
+                    f"  {endpoint:<15} {stats['requests']:>6} Calls  {stats['errors']:>4} Fehler"
+                    f"  {stats['throttled']:>4} gedrosselt  Ø {stats['mean_injected_latency'] * 1000:.0f} ms Latenz"
+                )
+        return "\n".join(zeilen)
@@ -0,0 +1,59 @@
+# parkmanagement/management/commands/export_stream.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.models import Stadion
+from parkmanagement.performance_statistics import parse_zeitpunkt
+from parkmanagement.streaming_export import EXPORT_CHUNK_SIZE, SPALTEN, FORMATE, StreamingExport
+
+
+class Command(BaseCommand):
+    help = (
+        "Exportiert Routen-Historie oder Monitoring-Daten (Sessions/Operationen aus dem "
+        "Performance-Store) blockweise als CSV, Parquet oder Arrow IPC - auch für Zeiträume, "
+        "die nicht in den Speicher passen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", choices=list(SPALTEN), default="routes")
+        parser.add_argument("--format", choices=list(FORMATE), default="csv",
+                            help="parquet und arrow benötigen pyarrow")
+        parser.add_argument("--since", help="Beginn, relativ (z.B. 7d) oder ISO-Datum")
+        parser.add_argument("--until", help="Ende (exklusiv), relativ oder ISO-Datum")
+        parser.add_argument("--stadion", type=int, help="Nur Daten zu diesem Stadion (ID)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE,
+                            help="Zeilen pro DB-Fetch und pro Block")
+        parser.add_argument("--output", help="Zieldatei (für parquet/arrow erforderlich, sonst stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            StreamingExport.pruefen(options["dataset"], options["format"])
+            since = parse_zeitpunkt(options["since"])
+            until = parse_zeitpunkt(options["until"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size muss positiv sein")
+        if options["format"] != "csv" and not options["output"]:
+            raise CommandError(f"Format '{options['format']}' nur mit --output")
+
+        stadion = None
+        if options["stadion"] is not None:
+            stadion = Stadion.objects.filter(pk=options["stadion"]).first()
+            if stadion is None:
+                raise CommandError(f"Stadion nicht gefunden: {options['stadion']}")
+
+        bloecke = StreamingExport.stream(
+            options["dataset"], options["format"], since, until, stadion, options["chunk_size"]
+        )
+        if not options["output"]:
+            for block in bloecke:
+                self.stdout.write(block.decode("utf-8"), ending="")
+            return
+
+        groesse = 0
+        with open(options["output"], "wb") as fh:
+            for block in bloecke:
+                fh.write(block)
+                groesse += len(block)
+        self.stdout.write(self.style.SUCCESS(f"✅ Export geschrieben: {options['output']} ({groesse} Bytes)"))
@@ -0,0 +1,140 @@
+# parkmanagement/management/commands/loadtest_matchday.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.benchmark import BENCHMARK_PROFILES, load_profile, standard_parkhaeuser
+from parkmanagement.benchmark.matchday import SLO_P99_SEKUNDEN, MatchdayLoadTest, kapazitaet
+from parkmanagement.benchmark.runner import benchmark_umgebung, erstelle_benchmark_daten
+
+
+class Command(BaseCommand):
+    help = (
+        "Spieltags-Lasttest: spielt eine Anpfiff-Ankunftskurve authentifizierter Benutzer gegen "
+        "RouteSuggestionView (mit lokalen API-Stand-ins) in steigenden Laststufen ab und "
+        "ermittelt, bis zu welcher Last das p99-SLO gehalten wird."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peak-rps", type=float, nargs="+", default=[1, 2, 4, 8],
+                            help="Laststufen: Anfragen pro Sekunde in der Spitze vor Anpfiff")
+        parser.add_argument("--dauer", type=float, default=60,
+                            help="Sekunden, auf die das Spieltagsfenster (3h vor bis 15min nach Anpfiff) gestaucht wird")
+        parser.add_argument("--profile", default="realistic", help=f"Stand-in-Profil: {', '.join(BENCHMARK_PROFILES)}")
+        parser.add_argument("--config-file", help="JSON-Datei mit einem Stand-in-Profil {endpoint: {...}}")
+        parser.add_argument("--slo-p99", type=float, default=SLO_P99_SEKUNDEN, help="p99-Ziel in Sekunden (Spitzenphase)")
+        parser.add_argument("--users", type=int, default=200, help="Authentifizierte Benutzer (JWT)")
+        parser.add_argument("--parkplaetze", type=int, default=8)
+        parser.add_argument("--max-concurrency", type=int, default=64, help="Maximal gleichzeitig offene Requests")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--alle-stufen", action="store_true",
+                            help="Auch nach der ersten SLO-Verletzung weitere Stufen messen")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+        parser.add_argument("--output", help="Report in Datei schreiben statt auf stdout")
+
+    def handle(self, *args, **options):
+        profile = options["profile"]
+        if options["config_file"]:
+            try:
+                with open(options["config_file"], encoding="utf-8") as fh:
+                    profile = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Konfigurationsdatei nicht lesbar: {e}")
+        try:
+            load_profile(profile)
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e))
+        if min(options["peak_rps"]) <= 0 or options["dauer"] <= 0 or options["max_concurrency"] < 1:
+            raise CommandError("--peak-rps, --dauer und --max-concurrency müssen positiv sein")
+
+        parkhaeuser = standard_parkhaeuser(options["parkplaetze"])
+        with benchmark_umgebung(parkhaeuser, seed=options["seed"]) as server:
+            lasttest = MatchdayLoadTest(
+                server,
+                erstelle_benchmark_daten(parkhaeuser, options["users"]),
+                dauer=options["dauer"],
+                max_concurrency=options["max_concurrency"],
+                seed=options["seed"],
+                slo_p99=options["slo_p99"],
+            )
+            stufen = []
+            for peak_rps in sorted(options["peak_rps"]):
+                self.stderr.write(f"🏟️ Laststufe {peak_rps} req/s ...")
+                ergebnis = lasttest.run(peak_rps, profile)
+                stufen.append(ergebnis)
+                if not ergebnis["slo"]["met"] and not options["alle_stufen"]:
+                    break
+
+        report = {
+            "profile": profile if isinstance(profile, str) else "custom",
+            "window_seconds": options["dauer"],
+            "capacity": kapazitaet(stufen, options["slo_p99"]),
+            "levels": stufen,
+        }
+
+        if options["format"] == "json":
+            ausgabe = json.dumps(report, indent=2)
+        else:
+            ausgabe = self._als_text(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(ausgabe + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Kapazitäts-Report geschrieben: {options['output']}"))
+        else:
+            self.stdout.write(ausgabe)
+
+    def _als_text(self, report):
+        def ms(wert):
+            return f"{wert * 1000:8.0f}" if wert is not None else f"{'-':>8}"
+
+        capacity = report["capacity"]
+        zeilen = [
+            f"🏟️ Spieltags-Kapazität (Profil {report['profile']}, Fenster {report['window_seconds']}s, "
+            f"SLO p99 ≤ {capacity['slo_p99_seconds']}s in der Spitze)",
+            "",
+            f"{'Spitze':>7} {'Anfr.':>6} {'req/s':>7} {'max par.':>8} {'OK %':>6}"
+            f" {'p50':>8} {'p95':>8} {'p99':>8} {'p99 Sp.':>8} {'Warten':>8}  SLO",
+        ]
+        for s in report["levels"]:
+            zeilen.append(
+                f"{s['peak_rps']:>7.1f} {s['requests']:>6} {s['throughput_rps']:>7.2f} {s['max_in_flight']:>8}"
+                f" {s['success_rate'] if s['success_rate'] is not None else 0:>6.1f}"
+                f" {ms(s['latency']['p50'])} {ms(s['latency']['p95'])} {ms(s['latency']['p99'])}"
+                f" {ms(s['peak_latency']['p99'])} {ms(s['queue_wait']['p95'])}  {'✅' if s['slo']['met'] else '❌'}"
+            )
+
+        zeilen.append("")
+        if capacity["max_sustained_peak_rps"] is None:
+            zeilen.append("❌ Schon die niedrigste Stufe verletzt das SLO.")
+        else:
+            zeilen.append(
+                f"✅ SLO gehalten bis {capacity['max_sustained_peak_rps']} req/s in der Spitze "
+                f"({capacity['max_sustained_throughput_rps']} req/s Durchsatz, "
+                f"bis zu {capacity['max_sustained_in_flight']} gleichzeitige Requests)"
+            )
+        if capacity["first_breach_peak_rps"] is not None:
+            zeilen.append(
+                f"❌ Verletzt ab {capacity['first_breach_peak_rps']} req/s "
+                f"(p99 Spitze {capacity['first_breach_peak_p99_seconds']}s)"
+            )
+
+        for s in report["levels"]:
+            zeilen += ["", f"Stufe {s['peak_rps']} req/s:"]
+            zeilen.append("  Upstream-Calls pro Request: " + ", ".join(
+                f"{api} Ø {u['per_request_mean']} (max {u['per_request_max']})"
+                for api, u in s["upstream_calls"].items()
+            ))
+            zeilen.append("  Cache-Hit-Raten: " + (", ".join(
+                f"{name} {c['hit_rate'] * 100:.0f}% von {c['lookups']}"
+                for name, c in s["cache_hit_rates"].items()
+            ) or "-"))
+            fehler = s["errors"]
+            zeilen.append(
+                f"  Fehler: Status {fehler['status_codes'] or '-'}, Deadline überschritten {fehler['deadline_exceeded']}, "
+                f"Kommentar {fehler['kommentar_status']}"
+            )
+            if fehler["upstream_errors"] or fehler["standins"]:
+                zeilen.append(f"  Upstream: {fehler['upstream_errors']}, Stand-ins {fehler['standins']}")
+        return "\n".join(zeilen)
@@ -0,0 +1,95 @@
+# parkmanagement/management/commands/performance_report.py
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.performance_statistics import (
+    erstelle_performance_report,
+    forschungsdaten_aus_store,
+    parse_zeitpunkt,
+)
+from parkmanagement.performance_store import performance_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Statistische Auswertung der Performance-Sessions aus dem dauerhaften Store "
+        "(alle Worker, beliebiger Zeitraum)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Beginn: relativ (30m, 24h, 7d) oder ISO-Datum")
+        parser.add_argument("--until", help="Ende: relativ (30m, 24h, 7d) oder ISO-Datum")
+        parser.add_argument("--session-name", help="Nur Sessions mit diesem Namen, z.B. optimized_route_calculation_parallel")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+        parser.add_argument("--output", help="Report in Datei schreiben statt auf stdout")
+        parser.add_argument("--include-sessions", action="store_true",
+                            help="Rohdaten aller Sessions in den JSON-Report aufnehmen")
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_zeitpunkt(options["since"])
+            until = parse_zeitpunkt(options["until"])
+        except ValueError as e:
+            raise CommandError(f"Ungültige Zeitangabe: {e}")
+
+        research_data = forschungsdaten_aus_store(since, until, options["session_name"])
+        report = erstelle_performance_report(research_data)
+        if options["include_sessions"]:
+            report["all_sessions"] = research_data["all_sessions"]
+
+        if options["format"] == "json":
+            ausgabe = json.dumps(report, indent=2, default=str)
+        else:
+            ausgabe = self._als_text(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(ausgabe + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Report geschrieben: {options['output']}"))
+        else:
+            self.stdout.write(ausgabe)
+
+    def _als_text(self, report):
+        meta = report["monitoring_metadata"]
+        zeilen = [
+            f"📊 Performance-Report ({performance_store.directory})",
+            f"Sessions: {meta['total_sessions']} aus {meta['workers']} Worker(n), "
+            f"Zeitraum: {meta['range']['since'] or 'Anfang'} bis {meta['range']['until'] or 'jetzt'}",
+        ]
+        if not meta["total_sessions"]:
+            zeilen.append("Keine Sessions im Zeitraum gefunden.")
+            return "\n".join(zeilen)
+
+        stats = report["statistical_analysis"]
+        aggregated = report["aggregated_statistics"]
+        dauer = stats["duration_statistics"]
+        perzentile = aggregated["session_duration_percentiles"]
+        zeilen += [
+            "",
+            "Session-Dauer (s):",
+            f"  mean {dauer['mean']}  median {dauer['median']}  min {dauer['min']}  max {dauer['max']}",
+            f"  p50 {perzentile['p50']:.2f}  p95 {perzentile['p95']:.2f}  p99 {perzentile['p99']:.2f}",
+            "Klassifikation: " + ", ".join(f"{k} {v}" for k, v in stats["performance_classification"].items()),
+            "",
+            "Operationen (Anzahl, p50/p95/p99 in s, Erfolgsrate):",
+        ]
+        for name, count in sorted(aggregated["operation_frequency"].items(), key=lambda x: x[1], reverse=True):
+            p = aggregated["operation_latency_percentiles"][name]
+            zeilen.append(
+                f"  {name:<45} {count:>6}  {p['p50']:.3f}/{p['p95']:.3f}/{p['p99']:.3f}"
+                f"  {aggregated['success_rates'][name]:.1f}%"
+            )
+
+        trends = report["performance_trends"]
+        zeilen += ["", f"Trend: {trends.get('trend_direction', trends.get('note'))}"]
+
+        zeilen += ["", "Tagesverlauf (Sessions, mean, p50, p95):"]
+        for tag in report["daily_breakdown"]:
+            zeilen.append(f"  {tag['date']}  {tag['sessions']:>6}  {tag['mean']:.2f}  {tag['p50']:.2f}  {tag['p95']:.2f}")
+
+        zeilen += ["", "Empfehlungen:"]
+        for empfehlung in report["production_recommendations"]:
+            zeilen.append(f"  [{empfehlung['priority']}] {empfehlung['area']}: {empfehlung['recommendation']}")
+        return "\n".join(zeilen)
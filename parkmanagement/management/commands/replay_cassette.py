@@ -0,0 +1,182 @@
+# parkmanagement/management/commands/replay_cassette.py
+
+import json
+import statistics
+import time
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from parkmanagement.benchmark.runner import caches_leeren
+from parkmanagement.models import Verein
+from parkmanagement.upstream import CassetteStore, replaying, response_summary
+
+# Nicht erreichbarer Upstream: Hintergrund-Refreshes (Wetter, Kommentar-Pool)
+# laufen außerhalb der Kassette und sollen sofort scheitern statt echte APIs zu treffen
+OFFLINE_UPSTREAM = "http://127.0.0.1:9"
+
+
+class Command(BaseCommand):
+    help = (
+        "Spielt eine mit 'X-Record-Cassette: 1' aufgezeichnete Anfrage offline gegen den aktuellen "
+        "Code ab: Upstream-Antworten, Cache-Werte und DB-Stand kommen aus der Kassette, die "
+        "Upstream-Latenzen werden (skaliert mit --speed) nachgestellt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("cassette", nargs="?", help="Kassetten-ID aus CASSETTE_DIR oder Pfad zu einer .json.gz")
+        parser.add_argument("--list", action="store_true", help="Neueste Kassetten auflisten")
+        parser.add_argument("--repeat", type=int, default=1, help="Anzahl Wiederholungen")
+        parser.add_argument("--speed", type=float, default=1.0,
+                            help="Faktor auf die aufgezeichneten Upstream-Dauern (0 = ohne Wartezeit)")
+        parser.add_argument("--profile", action="store_true",
+                            help="Replays mit dem Sampling-Profiler aufzeichnen (X-Profile-Id im Report)")
+        parser.add_argument("--strict", action="store_true",
+                            help="Exit-Code 1 bei nicht aufgezeichneten Calls oder abweichendem Ergebnis")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+        parser.add_argument("--output", help="Report in Datei schreiben statt auf stdout")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for cassette_id, mtime in CassetteStore.liste():
+                self.stdout.write(f"{cassette_id}  {datetime.fromtimestamp(mtime):%Y-%m-%d %H:%M:%S}")
+            return
+        if not options["cassette"]:
+            raise CommandError("Kassetten-ID oder Pfad angeben (oder --list)")
+        if options["repeat"] < 1 or options["speed"] < 0:
+            raise CommandError("--repeat muss positiv und --speed nicht negativ sein")
+
+        data = CassetteStore.laden(options["cassette"])
+        if data is None:
+            raise CommandError(f"Kassette nicht gefunden: {options['cassette']}")
+        meta = data.get("meta", {})
+        if "status_code" not in meta:
+            raise CommandError("Kassette ohne Aufnahme-Metadaten (Aufnahme nicht abgeschlossen?)")
+
+        test_runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = test_runner.setup_databases()
+        try:
+            with override_settings(
+                GOOGLE_MAPS_API_BASE_URL=f"{OFFLINE_UPSTREAM}/maps/api",
+                OPENWEATHERMAP_API_BASE_URL=f"{OFFLINE_UPSTREAM}/data/2.5",
+                OPENAI_BASE_URL=f"{OFFLINE_UPSTREAM}/v1",
+                DORTMUND_API_URL=f"{OFFLINE_UPSTREAM}/records",
+                ALLOWED_HOSTS=["testserver"],
+                # Replays gehören nicht in den Produktions-Store
+                PERFORMANCE_STORE_ENABLED=False,
+                PROFILING_SAMPLE_RATE=0,
+            ):
+                token = self._lade_fixtures(data)
+                laeufe = [self._replay(data, token, options) for _ in range(options["repeat"])]
+        finally:
+            test_runner.teardown_databases(old_config)
+
+        dauern = [lauf["duration"] for lauf in laeufe]
+        report = {
+            "cassette_id": data.get("cassette_id"),
+            "request": {"method": meta.get("method"), "path": meta.get("path"), "body": meta.get("body")},
+            "recorded": {
+                "status_code": meta["status_code"],
+                "duration": meta.get("duration"),
+                "summary": meta.get("summary"),
+                "trace_id": meta.get("trace_id"),
+                "upstream_calls": len(data.get("interactions", [])),
+                "upstream_seconds": round(sum(i["duration"] for i in data.get("interactions", [])), 4),
+            },
+            "speed": options["speed"],
+            "replay": {
+                "min": round(min(dauern), 4),
+                "median": round(statistics.median(dauern), 4),
+                "max": round(max(dauern), 4),
+            },
+            "runs": laeufe,
+        }
+
+        if options["format"] == "json":
+            ausgabe = json.dumps(report, indent=2)
+        else:
+            ausgabe = self._als_text(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(ausgabe + "\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Replay-Report geschrieben: {options['output']}"))
+        else:
+            self.stdout.write(ausgabe)
+
+        abweichungen = [lauf for lauf in laeufe if lauf["misses"] or not lauf["matches_recording"]]
+        if abweichungen and options["strict"]:
+            raise CommandError(f"{len(abweichungen)} von {len(laeufe)} Replays weichen von der Aufnahme ab")
+
+    def _lade_fixtures(self, data):
+        """Legt Verein, Stadion und Parkplätze aus der Kassette an; liefert ein JWT eines Staff-Benutzers"""
+        for obj in serializers.deserialize("json", json.dumps(data.get("fixtures", []))):
+            obj.save()
+
+        user = User.objects.create_user(username="cassette_replay", password=None, is_staff=True)
+        verein = Verein.objects.order_by("pk").first()
+        if verein is not None:
+            user.profil.lieblingsverein = verein
+            user.profil.save()
+        return str(RefreshToken.for_user(user).access_token)
+
+    def _replay(self, data, token, options):
+        meta = data["meta"]
+        caches_leeren()
+        header = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        if options["profile"]:
+            header["HTTP_X_PROFILE"] = "1"
+
+        client = Client()
+        with replaying(data, speed=options["speed"]) as cassette:
+            start = time.perf_counter()
+            response = client.generic(
+                meta["method"], meta["path"], (meta.get("body") or "").encode("utf-8"),
+                content_type=meta.get("content_type") or "application/json", **header,
+            )
+            dauer = time.perf_counter() - start
+
+        summary = response_summary(response)
+        return {
+            "duration": round(dauer, 4),
+            "status_code": response.status_code,
+            "summary": summary,
+            "matches_recording": response.status_code == meta["status_code"] and summary == meta.get("summary"),
+            "served": cassette.served,
+            "misses": cassette.misses,
+            "unused": cassette.unused(),
+            "trace_id": response.get("X-Trace-Id"),
+            "profile_id": response.get("X-Profile-Id"),
+        }
+
+    def _als_text(self, report):
+        recorded = report["recorded"]
+        zeilen = [
+            f"📼 Kassette {report['cassette_id']}: {report['request']['method']} {report['request']['path']}",
+            f"   Aufnahme: Status {recorded['status_code']}, {recorded['duration']}s, "
+            f"{recorded['upstream_calls']} Upstream-Calls ({recorded['upstream_seconds']}s), {recorded['summary']}",
+            f"   Replay (speed {report['speed']}): min {report['replay']['min']}s, "
+            f"median {report['replay']['median']}s, max {report['replay']['max']}s",
+            "",
+        ]
+        for nummer, lauf in enumerate(report["runs"], 1):
+            status = "✅" if lauf["matches_recording"] and not lauf["misses"] else "❌"
+            zeile = (
+                f"{status} #{nummer}: {lauf['duration']}s, Status {lauf['status_code']}, "
+                f"{lauf['served']} Calls aus der Kassette, {len(lauf['misses'])} nicht aufgezeichnet, "
+                f"{lauf['unused']} ungenutzt"
+            )
+            if lauf["profile_id"]:
+                zeile += f", Profil {lauf['profile_id']}"
+            zeilen.append(zeile)
+            if not lauf["matches_recording"]:
+                zeilen.append(f"     Ergebnis weicht ab: {lauf['summary']}")
+            for signatur in lauf["misses"]:
+                zeilen.append(f"     Nicht aufgezeichnet: {signatur[:160]}")
+        return "\n".join(zeilen)
@@ -0,0 +1,42 @@
+# parkmanagement/management/commands/rollup_routes.py
+
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.route_rollups import RouteRollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rechnet abgeschlossene Tage inkrementell in die Routen-Tagesstatistik für "
+        "research_data_export ein (z.B. täglich per Cron nach Mitternacht)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bis", type=date.fromisoformat,
+                            help="Tage bis ausschließlich YYYY-MM-DD einrechnen (Standard: heute)")
+        parser.add_argument("--neu-berechnen", nargs=2, metavar=("VON", "BIS"), type=date.fromisoformat,
+                            help="Bereits eingerechnete Tage [VON, BIS) neu berechnen")
+        parser.add_argument("--format", choices=["text", "json"], default="text")
+
+    def handle(self, *args, **options):
+        ergebnis = {}
+        if options["neu_berechnen"]:
+            von, bis = options["neu_berechnen"]
+            if von >= bis:
+                raise CommandError("VON muss vor BIS liegen")
+            ergebnis["recomputed_rows"] = RouteRollups.neu_berechnen(von, bis)
+
+        ergebnis.update(RouteRollups.aktualisieren(options["bis"]))
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps(ergebnis, indent=2, default=str))
+            return
+        if "recomputed_rows" in ergebnis:
+            self.stdout.write(f"🔁 {ergebnis['recomputed_rows']} Rollup-Zeilen neu berechnet")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {ergebnis['days']} Tage eingerechnet ({ergebnis['rows']} Zeilen), "
+            f"Wasserstand: {ergebnis['watermark']}"
+        ))
@@ -0,0 +1,52 @@
+# parkmanagement/management/commands/standin_apis.py
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parkmanagement.benchmark import BENCHMARK_PROFILES, StandInServer, load_profile
+
+# Settings, deren Umgebungsvariable anders heißt (siehe matchroute/settings.py)
+UMGEBUNGSVARIABLEN = {"OPENAI_API_KEY": "OPEN_AI_KEY"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Startet die lokalen API-Stand-ins (Google, OpenWeatherMap, OpenAI, Dortmund) als "
+        "eigenständigen Server, z.B. für Lasttests gegen einen laufenden Django-Server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--profile", default="realistic", help=f"{', '.join(BENCHMARK_PROFILES)}")
+        parser.add_argument("--config-file", help="JSON-Datei mit einem Profil {endpoint: {...}}")
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, **options):
+        profile = options["profile"]
+        if options["config_file"]:
+            try:
+                with open(options["config_file"], encoding="utf-8") as fh:
+                    profile = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Konfigurationsdatei nicht lesbar: {e}")
+        try:
+            load_profile(profile)
+        except (TypeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        server = StandInServer(profile, host=options["host"], port=options["port"], seed=options["seed"]).start()
+        self.stdout.write(self.style.SUCCESS(f"🧪 Stand-ins laufen auf {server.url} - Umgebung für den App-Server:"))
+        for key, value in server.settings_overrides().items():
+            self.stdout.write(f"export {UMGEBUNGSVARIABLEN.get(key, key)}={value}")
+
+        try:
+            while True:
+                time.sleep(60)
+                self.stdout.write(json.dumps(server.stats()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
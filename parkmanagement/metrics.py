@@ -0,0 +1,336 @@
+# parkmanagement/metrics.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from .tracing import SPAN_KIND_CLIENT, STATUS_ERROR, tracer
+
+logger = logging.getLogger(__name__)
+
+# Registry-Konfiguration
+METRICS_FLUSH_INTERVAL = 1.0  # Sekunden zwischen zwei Snapshots pro Worker
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Metrik-Definitionen: name -> (typ, hilfe, label-namen, gauge-aggregation)
+METRIC_DEFINITIONS = {
+    "matchroute_http_request_duration_seconds": (
+        "histogram", "Latenz der HTTP-Requests pro View", ("view", "method"), None),
+    "matchroute_http_requests_in_flight": (
+        "gauge", "Aktuell laufende HTTP-Requests", (), "sum"),
+    "matchroute_upstream_request_duration_seconds": (
+        "histogram", "Latenz der Upstream-API-Calls", ("api", "mode"), None),
+    "matchroute_upstream_errors": (
+        "counter", "Fehlgeschlagene Upstream-API-Calls", ("api", "mode"), None),
+    "matchroute_cache_requests": (
+        "counter", "Cache-Zugriffe nach Ergebnis", ("cache", "result"), None),
+    "matchroute_live_data_fetch_timestamp_seconds": (
+        "gauge", "Zeitpunkt des letzten erfolgreichen Live-Daten-Abrufs", (), "max"),
+    "matchroute_live_data_source_timestamp_seconds": (
+        "gauge", "Jüngster Quell-Zeitstempel der Live-Parkdaten", (), "max"),
+}
+
+
+def _metrics_dir() -> str:
+    return getattr(settings, "METRICS_DIR", None) or os.path.join(tempfile.gettempdir(), "matchroute_metrics")
+
+
+def _labels_key(label_names: Iterable[str], labels: Dict[str, Any]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in label_names)
+
+
+class MetricsRegistry:
+    """
+    Prozess-lokale Metrik-Registry mit dateibasiertem Austausch zwischen Workern.
+
+    Jeder Worker schreibt seinen Stand periodisch als JSON-Snapshot nach
+    ``METRICS_DIR/<pid>.json``. Der /metrics Endpoint liest alle Snapshots und
+    aggregiert: Counter und Histogramme werden summiert, Gauges je nach
+    Definition summiert oder maximiert. Gauges beendeter Worker werden
+    ignoriert, ihre Counter bleiben erhalten.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in METRIC_DEFINITIONS}
+        self._dirty = False
+        self._flusher = None
+
+    @property
+    def directory(self) -> str:
+        return self._directory or _metrics_dir()
+
+    # -- Schreiben ---------------------------------------------------------
+
+    def inc(self, name: str, labels: Dict[str, Any] = None, amount: float = 1.0):
+        key = _labels_key(METRIC_DEFINITIONS[name][2], labels or {})
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0.0) + amount
+            self._dirty = True
+        self._ensure_flusher()
+
+    def set_gauge(self, name: str, value: float, labels: Dict[str, Any] = None):
+        key = _labels_key(METRIC_DEFINITIONS[name][2], labels or {})
+        with self._lock:
+            self._values[name][key] = float(value)
+            self._dirty = True
+        self._ensure_flusher()
+
+    def observe(self, name: str, value: float, labels: Dict[str, Any] = None):
+        key = _labels_key(METRIC_DEFINITIONS[name][2], labels or {})
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {"buckets": [0] * len(DEFAULT_LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(DEFAULT_LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+            self._dirty = True
+        self._ensure_flusher()
+
+    # -- Austausch zwischen Workern ------------------------------------------
+
+    def _snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._dirty = False
+            return {
+                "pid": os.getpid(),
+                "written_at": time.time(),
+                "metrics": {
+                    name: [[list(key), value] for key, value in series.items()]
+                    for name, series in self._values.items() if series
+                },
+            }
+
+    def flush(self):
+        """Schreibt den Snapshot dieses Workers atomar in das Metrik-Verzeichnis"""
+        directory = self.directory
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Metrik-Snapshot konnte nicht geschrieben werden: {e}")
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher[0] == os.getpid():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher[0] == os.getpid():
+                return
+            thread = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+            # PID merken, damit geforkte Worker einen eigenen Flusher starten
+            self._flusher = (os.getpid(), thread)
+            thread.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            if self._dirty:
+                self.flush()
+
+    def _read_snapshots(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        directory = self.directory
+        if not os.path.isdir(directory):
+            return snapshots
+
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def collect(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        """Aggregiert die Snapshots aller Worker"""
+        self.flush()
+
+        merged: Dict[str, Dict[Tuple[str, ...], Any]] = {name: {} for name in METRIC_DEFINITIONS}
+        for snapshot in self._read_snapshots():
+            alive = self._process_alive(snapshot.get("pid", 0))
+
+            for name, series in snapshot.get("metrics", {}).items():
+                if name not in METRIC_DEFINITIONS:
+                    continue
+                metric_type, _, _, gauge_mode = METRIC_DEFINITIONS[name]
+                if metric_type == "gauge" and not alive:
+                    continue
+
+                target = merged[name]
+                for key, value in series:
+                    key = tuple(key)
+                    if metric_type == "histogram":
+                        current = target.setdefault(key, {"buckets": [0] * len(DEFAULT_LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+                        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                    elif metric_type == "gauge" and gauge_mode == "max":
+                        target[key] = max(target.get(key, value), value)
+                    else:
+                        target[key] = target.get(key, 0.0) + value
+        return merged
+
+
+registry = MetricsRegistry()
+
+
+# -- Instrumentierung --------------------------------------------------------
+
+@contextmanager
+def track_upstream(api: str, mode: str = "", request_key: Optional[str] = None):
+    """
+    Misst einen Upstream-Call (Metrik + Client-Span). Fehler werden bei
+    Exceptions oder über ``call["error"] = True`` (z.B. bei API-Status != OK) gezählt.
+
+    ``request_key`` identifiziert gleiche Anfragen (z.B. Start|Ziel) und wird
+    gehasht am Span abgelegt - Basis für die gemessene Wiederholungsrate in
+    der Trace-Analyse.
+    """
+    call = {"error": False}
+    start = time.perf_counter()
+    span_name = f"{api} {mode}" if mode else api
+    attributes = {
+        "upstream.api": api,
+        "upstream.mode": mode or None,
+        "upstream.request_key": hashlib.sha1(request_key.encode()).hexdigest()[:16] if request_key else None,
+    }
+    with tracer.start_span(span_name, attributes, kind=SPAN_KIND_CLIENT) as span:
+        try:
+            yield call
+        except Exception:
+            call["error"] = True
+            raise
+        finally:
+            labels = {"api": api, "mode": mode}
+            registry.observe("matchroute_upstream_request_duration_seconds", time.perf_counter() - start, labels)
+            if call["error"]:
+                registry.inc("matchroute_upstream_errors", labels)
+                if span is not None:
+                    span.status_code = STATUS_ERROR
+
+
+def record_cache_lookup(cache_name: str, hit: bool):
+    registry.inc("matchroute_cache_requests", {"cache": cache_name, "result": "hit" if hit else "miss"})
+
+
+@contextmanager
+def track_cache_lookup(cache_name: str):
+    """
+    Misst einen Cache-Zugriff (Span + Hit/Miss-Zähler). Treffer über
+    ``lookup["hit"] = True`` melden.
+    """
+    lookup = {"hit": False}
+    with tracer.start_span(f"cache.get {cache_name}", {"cache.name": cache_name}) as span:
+        yield lookup
+        if span is not None:
+            span.set_attribute("cache.hit", lookup["hit"])
+    record_cache_lookup(cache_name, lookup["hit"])
+
+
+def record_live_data_fetch(source_timestamp: Optional[float] = None):
+    registry.set_gauge("matchroute_live_data_fetch_timestamp_seconds", time.time())
+    if source_timestamp:
+        registry.set_gauge("matchroute_live_data_source_timestamp_seconds", source_timestamp)
+
+
+# -- OpenMetrics Exposition ---------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: Iterable[str], key: Iterable[str], extra: Dict[str, str] = None) -> str:
+    pairs = [(name, value) for name, value in zip(label_names, key)]
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_openmetrics() -> str:
+    """Rendert die aggregierten Metriken aller Worker im OpenMetrics-Textformat"""
+    merged = registry.collect()
+    lines = []
+
+    for name, (metric_type, help_text, label_names, _) in METRIC_DEFINITIONS.items():
+        series = merged.get(name, {})
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"# HELP {name} {_escape(help_text)}")
+
+        for key, value in sorted(series.items()):
+            if metric_type == "histogram":
+                cumulative = 0
+                for bound, count in zip(DEFAULT_LATENCY_BUCKETS, value["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(label_names, key, {'le': _format_value(bound)})} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(label_names, key, {'le': '+Inf'})} {value['count']}")
+                lines.append(f"{name}_count{_format_labels(label_names, key)} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(label_names, key)} {_format_value(value['sum'])}")
+            elif metric_type == "counter":
+                lines.append(f"{name}_total{_format_labels(label_names, key)} {_format_value(value)}")
+            else:
+                lines.append(f"{name}{_format_labels(label_names, key)} {_format_value(value)}")
+
+    # Abgeleitete Gauges: Cache-Hit-Ratio und Alter der Live-Daten
+    cache_totals: Dict[str, Dict[str, float]] = {}
+    for (cache_name, result), value in merged.get("matchroute_cache_requests", {}).items():
+        cache_totals.setdefault(cache_name, {"hit": 0.0, "miss": 0.0})[result] = value
+
+    lines.append("# TYPE matchroute_cache_hit_ratio gauge")
+    lines.append("# HELP matchroute_cache_hit_ratio Anteil der Cache-Treffer pro Cache")
+    for cache_name, totals in sorted(cache_totals.items()):
+        total = totals["hit"] + totals["miss"]
+        ratio = totals["hit"] / total if total else 0.0
+        lines.append(f"matchroute_cache_hit_ratio{_format_labels(('cache',), (cache_name,))} {_format_value(ratio)}")
+
+    now = time.time()
+    lines.append("# TYPE matchroute_live_data_age_seconds gauge")
+    lines.append("# HELP matchroute_live_data_age_seconds Alter der Live-Parkdaten (Abruf bzw. Quelle)")
+    for kind, metric in (("fetch", "matchroute_live_data_fetch_timestamp_seconds"),
+                         ("source", "matchroute_live_data_source_timestamp_seconds")):
+        timestamp = merged.get(metric, {}).get(())
+        if timestamp:
+            lines.append(f"matchroute_live_data_age_seconds{_format_labels(('kind',), (kind,))} {_format_value(max(0.0, now - timestamp))}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,218 @@
+# parkmanagement/middleware.py
+
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import registry
+from .profiling import ProfileStore, profile_request
+from .query_instrumentation import QUERY_WARN_THRESHOLD, track_queries
+from .tracing import SPAN_KIND_SERVER, STATUS_ERROR, current_trace_id, db_query_span, parse_traceparent, tracer
+from .upstream import CassetteStore, recording, response_summary
+
+logger = logging.getLogger(__name__)
+
+
+def _staff_benutzer(request):
+    """
+    Staff-Benutzer aus dem JWT des Requests oder None. Die Views
+    authentifizieren erst nach der Middleware - Opt-in-Instrumentierung muss
+    vorher entscheiden, ob sie überhaupt startet.
+    """
+    try:
+        ergebnis = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if ergebnis is None or not ergebnis[0].is_staff:
+        return None
+    return ergebnis[0]
+
+
+class RequestMetricsMiddleware:
+    """
+    Erfasst Latenz und laufende Requests pro View für den /metrics Endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        registry.inc("matchroute_http_requests_in_flight")
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            registry.inc("matchroute_http_requests_in_flight", amount=-1)
+            resolver_match = getattr(request, "resolver_match", None)
+            view_name = resolver_match.view_name if resolver_match and resolver_match.view_name else "unresolved"
+            registry.observe(
+                "matchroute_http_request_duration_seconds",
+                time.perf_counter() - start,
+                {"view": view_name, "method": request.method},
+            )
+
+
+class TracingMiddleware:
+    """
+    Root-Span pro Request; alle Operationen, HTTP-Calls und DB-Queries des
+    Requests hängen als Kind-Spans darunter. Die Trace-ID wird als
+    ``X-Trace-Id`` Header zurückgegeben.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace_id, parent_span_id = parse_traceparent(request.META.get("HTTP_TRACEPARENT"))
+
+        with tracer.start_span(
+            f"{request.method} {request.path}",
+            {"http.method": request.method, "http.target": request.path},
+            kind=SPAN_KIND_SERVER,
+            trace_id=trace_id,
+            parent_span_id=parent_span_id,
+        ) as span, ExitStack() as stack:
+            if span is None:
+                return self.get_response(request)
+
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(db_query_span))
+
+            response = self.get_response(request)
+
+            resolver_match = getattr(request, "resolver_match", None)
+            if resolver_match and resolver_match.route:
+                # Span nach dem URL-Pattern benennen, damit gleiche Endpoints gruppiert werden
+                span.name = f"{request.method} /{resolver_match.route}"
+                span.set_attribute("http.route", resolver_match.route)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.status_code = STATUS_ERROR
+            response["X-Trace-Id"] = span.trace_id
+            return response
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Zählt Queries und DB-Zeit pro Request und meldet N+1-Muster.
+
+    Muss vor ``TracingMiddleware`` stehen: der Zähl-Wrapper umschließt dann
+    den DB-Span und ordnet die Queries dem Span der auslösenden Operation zu.
+    Im DEBUG-Modus werden die Werte als ``X-DB-*`` Header zurückgegeben.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_queries() as stats:
+            response = self.get_response(request)
+
+        for muster in stats.n_plus_one():
+            logger.warning(
+                f"🔁 N+1 Verdacht bei {request.method} {request.path}: {muster['count']}x "
+                f"'{muster['shape'][:200]}' in {', '.join(muster['spans']) or 'unbekannt'}"
+            )
+        if stats.count > QUERY_WARN_THRESHOLD:
+            logger.warning(f"🐢 {request.method} {request.path}: {stats.count} Queries, "
+                           f"{stats.total_time * 1000:.1f}ms DB-Zeit")
+
+        if settings.DEBUG:
+            response["X-DB-Query-Count"] = str(stats.count)
+            response["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.1f}"
+            response["X-DB-Duplicate-Queries"] = str(stats.duplicates())
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in Sampling-Profiler pro Request.
+
+    Aktiv bei ``X-Profile: 1`` (nur Staff, per JWT vor dem Request geprüft)
+    oder zufällig für ``PROFILING_SAMPLE_RATE`` der Requests. Der Header von
+    anderen Clients wird ignoriert, ohne den Profiler zu starten. Die
+    Profil-ID kommt als ``X-Profile-Id`` Header zurück.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        staff = None
+        if request.META.get("HTTP_X_PROFILE") == "1":
+            staff = _staff_benutzer(request)
+            if staff is None:
+                logger.warning(f"🔬 Profiling-Header von Nicht-Staff ignoriert: {request.path}")
+        angefordert = staff is not None
+        sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        gesampelt = not angefordert and sample_rate > 0 and random.random() < sample_rate
+        if not (angefordert or gesampelt):
+            return self.get_response(request)
+
+        with profile_request(f"{request.method} {request.path}") as session:
+            response = self.get_response(request)
+
+        if session is None:
+            return response
+
+        user = staff or getattr(request, "user", None)
+        profile_id = ProfileStore.speichern(session, {
+            "method": request.method,
+            "path": request.path,
+            "status_code": response.status_code,
+            "trigger": "header" if angefordert else "sampled",
+            "user": user.username if user is not None and user.is_authenticated else None,
+            "trace_id": current_trace_id(),
+        })
+        response["X-Profile-Id"] = profile_id
+        return response
+
+
+class CassetteMiddleware:
+    """
+    Record-and-Replay: zeichnet bei ``X-Record-Cassette: 1`` alle
+    Upstream-Antworten, gelesenen Cache-Werte und DB-Fixtures eines
+    Requests als Kassette auf (nur Staff, per JWT vor dem Request geprüft
+    wie beim Profiling). Die Kassetten-ID kommt als ``X-Cassette-Id`` Header
+    zurück und lässt sich mit ``replay_cassette`` offline wiederholen.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.META.get("HTTP_X_RECORD_CASSETTE") != "1":
+            return self.get_response(request)
+
+        user = _staff_benutzer(request)
+        if user is None:
+            logger.warning(f"📼 Kassetten-Header von Nicht-Staff ignoriert: {request.path}")
+            return self.get_response(request)
+
+        # Body vor der View lesen, Django hält ihn danach für DRF vor
+        body = request.body.decode("utf-8", errors="replace")
+        start = time.perf_counter()
+        with recording({"method": request.method, "path": request.path, "body": body}) as cassette:
+            response = self.get_response(request)
+        dauer = time.perf_counter() - start
+
+        cassette.meta.update({
+            "content_type": request.META.get("CONTENT_TYPE"),
+            "status_code": response.status_code,
+            "duration": round(dauer, 4),
+            "summary": response_summary(response),
+            "user": user.username,
+            "trace_id": current_trace_id(),
+            "recorded_at": time.time(),
+        })
+        # Noch laufende Calls (z.B. GPT-Kommentar im Hintergrund) gehören mit in die Kassette
+        cassette.finish(CassetteStore.speichern)
+        response["X-Cassette-Id"] = cassette.cassette_id
+        return response
+
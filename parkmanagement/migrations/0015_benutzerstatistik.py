@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+LETZTE_ROUTEN = 5
+
+
+def statistik_befuellen(apps, schema_editor):
+    """Legt die Statistik für alle Benutzer mit bestehenden Routen an"""
+    Route = apps.get_model('parkmanagement', 'Route')
+    BenutzerStatistik = apps.get_model('parkmanagement', 'BenutzerStatistik')
+
+    zaehler = {}
+    for benutzer_id, parkplatz_id, anzahl in (
+        Route.objects.filter(parkplatz__isnull=False)
+        .values_list('benutzer_id', 'parkplatz_id')
+        .annotate(anzahl=Count('id'))
+        .order_by()
+    ):
+        zaehler.setdefault(benutzer_id, {})[str(parkplatz_id)] = anzahl
+
+    statistiken = []
+    for zeile in Route.objects.values('benutzer_id').annotate(
+        anzahl=Count('id'), summe=Sum('dauer_minuten'), mit_dauer=Count('dauer_minuten')
+    ).order_by():
+        benutzer_id = zeile['benutzer_id']
+        parkplaetze = zaehler.get(benutzer_id, {})
+        statistiken.append(BenutzerStatistik(
+            benutzer_id=benutzer_id,
+            anzahl_routen=zeile['anzahl'],
+            summe_dauer_minuten=zeile['summe'] or 0,
+            anzahl_mit_dauer=zeile['mit_dauer'],
+            parkplatz_zaehler=parkplaetze,
+            lieblings_parkplatz_id=int(max(parkplaetze, key=parkplaetze.get)) if parkplaetze else None,
+            letzte_route_ids=list(
+                Route.objects.filter(benutzer_id=benutzer_id)
+                .order_by('-erstelldatum', '-id')
+                .values_list('id', flat=True)[:LETZTE_ROUTEN]
+            ),
+        ))
+    BenutzerStatistik.objects.bulk_create(statistiken, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0014_alter_parkplatz_live_data_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenutzerStatistik',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anzahl_routen', models.PositiveIntegerField(default=0)),
+                ('summe_dauer_minuten', models.BigIntegerField(default=0)),
+                ('anzahl_mit_dauer', models.PositiveIntegerField(default=0, help_text='Routen mit Dauer (Basis für den Durchschnitt)')),
+                ('parkplatz_zaehler', models.JSONField(blank=True, default=dict, help_text='Anzahl Routen pro Parkplatz-ID')),
+                ('letzte_route_ids', models.JSONField(blank=True, default=list, help_text='IDs der letzten 5 Routen, neueste zuerst')),
+                ('aktualisiert', models.DateTimeField(auto_now=True)),
+                ('benutzer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistik', to=settings.AUTH_USER_MODEL)),
+                ('lieblings_parkplatz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='parkmanagement.parkplatz')),
+            ],
+            options={
+                'verbose_name': 'Benutzerstatistik',
+                'verbose_name_plural': 'Benutzerstatistiken',
+            },
+        ),
+        migrations.RunPython(statistik_befuellen, migrations.RunPython.noop),
+    ]
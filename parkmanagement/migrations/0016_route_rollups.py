@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def stadion_besucher_befuellen(apps, schema_editor):
+    """Übernimmt alle bestehenden (Stadion, Benutzer)-Paare aus den Routen"""
+    Route = apps.get_model('parkmanagement', 'Route')
+    StadionBesucher = apps.get_model('parkmanagement', 'StadionBesucher')
+    paare = Route.objects.values_list('stadion_id', 'benutzer_id').distinct().order_by()
+    StadionBesucher.objects.bulk_create(
+        [StadionBesucher(stadion_id=stadion_id, benutzer_id=benutzer_id) for stadion_id, benutzer_id in paare],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0015_benutzerstatistik'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWasserstand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('bis_tag', models.DateField()),
+                ('aktualisiert', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RouteTagesStatistik',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.DateField()),
+                ('transportmittel', models.CharField(max_length=50)),
+                ('anzahl_routen', models.PositiveIntegerField(default=0)),
+                ('summe_dauer_minuten', models.BigIntegerField(default=0)),
+                ('anzahl_mit_dauer', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Routen-Tagesstatistik',
+                'verbose_name_plural': 'Routen-Tagesstatistiken',
+            },
+        ),
+        migrations.CreateModel(
+            name='StadionBesucher',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Stadionbesucher',
+                'verbose_name_plural': 'Stadionbesucher',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['erstelldatum'], name='route_erstelldatum_idx'),
+        ),
+        migrations.AddField(
+            model_name='routetagesstatistik',
+            name='parkplatz',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='parkmanagement.parkplatz'),
+        ),
+        migrations.AddField(
+            model_name='routetagesstatistik',
+            name='stadion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='parkmanagement.stadion'),
+        ),
+        migrations.AddField(
+            model_name='stadionbesucher',
+            name='benutzer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stadionbesucher',
+            name='stadion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='besucher', to='parkmanagement.stadion'),
+        ),
+        migrations.AddConstraint(
+            model_name='routetagesstatistik',
+            constraint=models.UniqueConstraint(fields=('tag', 'stadion', 'parkplatz', 'transportmittel'), name='routetagesstatistik_eindeutig'),
+        ),
+        migrations.AddConstraint(
+            model_name='stadionbesucher',
+            constraint=models.UniqueConstraint(fields=('stadion', 'benutzer'), name='stadionbesucher_eindeutig'),
+        ),
+        # Tages-Rollups werden nicht hier, sondern vom ersten rollup_routes-Lauf erzeugt
+        migrations.RunPython(stadion_besucher_befuellen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0016_route_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['benutzer', '-erstelldatum', '-id'], name='route_benutzer_datum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['stadion', 'erstelldatum'], name='route_stadion_datum_idx'),
+        ),
+    ]
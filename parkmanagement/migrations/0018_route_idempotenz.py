@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0017_route_history_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='idempotenz_schluessel',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='route',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotenz_schluessel__isnull', False)), fields=('benutzer', 'idempotenz_schluessel'), name='route_idempotenz_eindeutig'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0018_route_idempotenz'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KatalogStand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stempel', models.CharField(max_length=32)),
+                ('aktualisiert', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0019_katalogstand'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KommentarJob',
+            fields=[
+                ('job_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Läuft'), ('ready', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=10)),
+                ('verkehr_kommentar', models.TextField(blank=True, null=True)),
+                ('erstellt', models.DateTimeField(auto_now_add=True)),
+                ('benutzer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['erstellt'], name='kommentarjob_erstellt_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:27
+
+import django.db.models.deletion
+import rest_framework.utils.encoders
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkmanagement', '0020_kommentarjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutenVorschlagDetail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vorschlag_id', models.CharField(max_length=32)),
+                ('parkplatz_id', models.IntegerField()),
+                ('vorschlag', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('erstellt', models.DateTimeField(auto_now_add=True)),
+                ('benutzer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['erstellt'], name='routenvorschlag_erstellt_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vorschlag_id', 'parkplatz_id'), name='routenvorschlag_parkplatz_eindeutig')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import django.db.models.deletion
+import rest_framework.utils.encoders
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Eine Zeile pro vorschlag_id statt pro Parkplatz. Die Vorschläge leben nur
+    # VORSCHLAG_DETAIL_TIMEOUT Sekunden, die Tabelle wird daher neu angelegt.
+
+    dependencies = [
+        ('parkmanagement', '0021_routenvorschlagdetail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='RoutenVorschlagDetail',
+        ),
+        migrations.CreateModel(
+            name='RoutenVorschlagDetail',
+            fields=[
+                ('vorschlag_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('vorschlaege', models.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('erstellt', models.DateTimeField(auto_now_add=True)),
+                ('benutzer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['erstellt'], name='routenvorschlag_erstellt_idx')],
+            },
+        ),
+    ]
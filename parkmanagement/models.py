@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from rest_framework.utils.encoders import JSONEncoder
 
 # Model für Parkplatz
 class Parkplatz(models.Model):
@@ -95,6 +96,16 @@ class Stadion(models.Model):
     def __str__(self):
         return f"{self.name} ({self.verein})"
     
+# Versionsstempel des Stammdaten-Katalogs (Vereine, Stadien, Parkplätze)
+# Jede Änderung setzt per Signal einen neuen Stempel; die Worker laden ihren
+# In-Process-Snapshot daraufhin neu (siehe catalog.py). Genau eine Zeile.
+class KatalogStand(models.Model):
+    stempel = models.CharField(max_length=32)
+    aktualisiert = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Katalog {self.stempel} ({self.aktualisiert})"
+
 class Route(models.Model):
     benutzer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='routen')
     stadion = models.ForeignKey(Stadion, on_delete=models.CASCADE, related_name='routen')
@@ -107,6 +118,141 @@ class Route(models.Model):
     transportmittel = models.CharField(max_length=50, choices=[('auto', 'Auto'), ('bus', 'Bus'), ('bahn', 'Bahn'), ('zu_fuss', 'zu Fuß')], default='auto')
     erstelldatum = models.DateTimeField(auto_now_add=True)
     route_url = models.URLField(blank=True, null=True)
+    # Vom Client vergebener Schlüssel: wiederholtes Speichern (Doppel-Tap, Offline-Sync) legt keine Duplikate an
+    idempotenz_schluessel = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['benutzer', 'idempotenz_schluessel'],
+                condition=models.Q(idempotenz_schluessel__isnull=False),
+                name='route_idempotenz_eindeutig',
+            ),
+        ]
+        indexes = [
+            # Live-Aggregation des laufenden Tages und Rollups einzelner Tage
+            models.Index(fields=['erstelldatum'], name='route_erstelldatum_idx'),
+            # Routen-Historie eines Benutzers (Keyset-Pagination, neueste zuerst)
+            models.Index(fields=['benutzer', '-erstelldatum', '-id'], name='route_benutzer_datum_idx'),
+            # Auswertungen pro Stadion über Zeiträume
+            models.Index(fields=['stadion', 'erstelldatum'], name='route_stadion_datum_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Schreiben und Fortschreiben der Rollups (Signals) in einer Transaktion, siehe RouteRollups.route_geaendert
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.benutzer.username} beantragt Route von {self.start_adresse} zu {self.stadion.name} am {self.erstelldatum.date()}"
+
+# Materialisierte Dashboard-Statistik pro Benutzer
+# Wird beim Speichern/Löschen von Routen über Signals fortgeschrieben (siehe user_statistics.py),
+# damit das Dashboard unabhängig von der Anzahl gespeicherter Routen eine Zeile liest.
+class BenutzerStatistik(models.Model):
+    benutzer = models.OneToOneField(User, on_delete=models.CASCADE, related_name='statistik')
+    anzahl_routen = models.PositiveIntegerField(default=0)
+    summe_dauer_minuten = models.BigIntegerField(default=0)
+    anzahl_mit_dauer = models.PositiveIntegerField(default=0, help_text="Routen mit Dauer (Basis für den Durchschnitt)")
+    parkplatz_zaehler = models.JSONField(default=dict, blank=True, help_text="Anzahl Routen pro Parkplatz-ID")
+    lieblings_parkplatz = models.ForeignKey(Parkplatz, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    letzte_route_ids = models.JSONField(default=list, blank=True, help_text="IDs der letzten 5 Routen, neueste zuerst")
+    aktualisiert = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Benutzerstatistik"
+        verbose_name_plural = "Benutzerstatistiken"
+
+    def __str__(self):
+        return f"{self.benutzer.username}: {self.anzahl_routen} Routen"
+
+    @property
+    def durchschnitt_dauer_minuten(self):
+        return self.summe_dauer_minuten / self.anzahl_mit_dauer if self.anzahl_mit_dauer else 0
+
+
+# Tages-Rollups für research_data_export
+# Abgeschlossene Tage werden von route_rollups.py (rollup_routes / Export) eingerechnet,
+# der laufende Tag wird beim Export live aggregiert.
+class RouteTagesStatistik(models.Model):
+    tag = models.DateField()
+    stadion = models.ForeignKey(Stadion, on_delete=models.CASCADE, related_name='+')
+    parkplatz = models.ForeignKey(Parkplatz, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    transportmittel = models.CharField(max_length=50)
+    anzahl_routen = models.PositiveIntegerField(default=0)
+    summe_dauer_minuten = models.BigIntegerField(default=0)
+    anzahl_mit_dauer = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Routen-Tagesstatistik"
+        verbose_name_plural = "Routen-Tagesstatistiken"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'stadion', 'parkplatz', 'transportmittel'],
+                name='routetagesstatistik_eindeutig',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tag} {self.stadion_id}/{self.parkplatz_id}/{self.transportmittel}: {self.anzahl_routen}"
+
+
+# Benutzer mit mindestens einer Route zum Stadion (Basis für "unique_users" im Export)
+class StadionBesucher(models.Model):
+    stadion = models.ForeignKey(Stadion, on_delete=models.CASCADE, related_name='besucher')
+    benutzer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        verbose_name = "Stadionbesucher"
+        verbose_name_plural = "Stadionbesucher"
+        constraints = [
+            models.UniqueConstraint(fields=['stadion', 'benutzer'], name='stadionbesucher_eindeutig'),
+        ]
+
+
+# Fortschritt inkrementeller Rollups: alle Tage vor "bis_tag" sind eingerechnet
+class RollupWasserstand(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    bis_tag = models.DateField()
+    aktualisiert = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: bis {self.bis_tag}"
+
+
+# Status der nebenläufigen GPT-Kommentare aus RouteSuggestionView (siehe comment_cache.py)
+# In der DB statt im prozesslokalen Cache, damit jeder Worker den Follow-up Endpoint bedienen kann.
+class KommentarJob(models.Model):
+    job_id = models.CharField(max_length=32, primary_key=True)
+    benutzer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=10, choices=[('pending', 'Läuft'), ('ready', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending')
+    verkehr_kommentar = models.TextField(null=True, blank=True)
+    erstellt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Aufräumen abgelaufener Jobs
+            models.Index(fields=['erstellt'], name='kommentarjob_erstellt_idx'),
+        ]
+
+    def __str__(self):
+        return f"Kommentar-Job {self.job_id}: {self.status}"
+
+
+# Vollständige Routenvorschläge einer gekürzten Antwort (view=compact, fields=...)
+class RoutenVorschlagDetail(models.Model):
+    vorschlag_id = models.CharField(max_length=32, primary_key=True)
+    benutzer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Vorschläge nach Parkplatz-ID (als String), wie in der API-Antwort kodiert
+    # (Decimal als Zahl, datetimes als ISO 8601)
+    vorschlaege = models.JSONField(encoder=JSONEncoder)
+    erstellt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Aufräumen abgelaufener Vorschläge
+            models.Index(fields=['erstellt'], name='routenvorschlag_erstellt_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.benutzer.username} beantragt Route von {self.start_adresse} zu {self.stadion.name} am {self.erstelldatum.date()}"
\ No newline at end of file
+        return f"Routenvorschlag {self.vorschlag_id}"
@@ -0,0 +1,15 @@
+# parkmanagement/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class RoutenCursorPagination(CursorPagination):
+    """
+    Keyset-Pagination der Routen-Historie: jede Seite ist eine Index-Abfrage
+    auf (benutzer, erstelldatum) ab dem Cursor - unabhängig davon, wie weit
+    zurückgeblättert wird. Die ID bricht Gleichstände bei gleichem Zeitstempel.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-erstelldatum", "-id")
@@ -1,53 +1,213 @@
 # parkmanagement/performance_monitor.py
 
+import asyncio
+import contextvars
+import math
+import threading
 import time
 import logging
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from contextlib import contextmanager
 from functools import wraps
 import json
 
+from .performance_store import performance_store
+from .profiling import run_profiled
+from .tracing import current_trace_id, tracer
+
 logger = logging.getLogger(__name__)
 
+# Speicher-Grenzen - der Monitor belegt auch in langlebigen Workern konstanten Speicher
+MAX_SESSIONS = 200  # Ring-Buffer der zuletzt beendeten Sessions
+MAX_OPERATIONS_PER_SESSION = 500  # Weitere Operationen fließen nur noch in die Aggregate
+
+# Aktive Session pro Request - Threads und asyncio-Tasks sehen jeweils ihre eigene.
+# asyncio.create_task kopiert den Kontext, Tasks von AsyncGoogleMapsClient erben die Session.
+_current_session: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "performance_session", default=None
+)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed Latenz-Histogramm (HDR-Stil) mit konstantem Speicherbedarf.
+
+    Bucket-Grenzen wachsen geometrisch um den Faktor ``gamma``; Perzentile
+    haben dadurch einen relativen Fehler von höchstens (gamma - 1) / (gamma + 1),
+    bei gamma=1.02 also rund 1%. Werte außerhalb von [min_value, max_value]
+    landen im ersten bzw. letzten Bucket.
+    """
+    
+    def __init__(self, min_value: float = 1e-6, max_value: float = 3600.0, gamma: float = 1.02):
+        self.min_value = min_value
+        self.gamma = gamma
+        self._log_gamma = math.log(gamma)
+        self.bucket_count = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+        return min(index, self.bucket_count - 1)
+    
+    def _bucket_value(self, index: int) -> float:
+        # Repräsentativer Wert des Buckets (min_value * gamma^(i-1), min_value * gamma^i]
+        return self.min_value * (self.gamma ** index) * 2 / (1 + self.gamma)
+    
+    def record(self, value: float):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Wert am q-ten Perzentil (0-100) oder None ohne Messwerte"""
+        if not self.count:
+            return None
+        
+        rank = max(1, int(math.ceil(q / 100 * self.count)))
+        cumulative = 0
+        for index in sorted(self.counts):
+            cumulative += self.counts[index]
+            if cumulative >= rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class OperationAggregate:
+    """Streaming-Aggregat für einen Operationstyp über alle Sessions"""
+    
+    def __init__(self):
+        self.success_count = 0
+        self.histogram = LatencyHistogram()
+    
+    def record(self, duration: float, success: bool):
+        self.histogram.record(duration)
+        if success:
+            self.success_count += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        summary = self.histogram.summary()
+        return {
+            "count": summary["count"],
+            "total_time": self.histogram.total,
+            "avg_time": summary["mean"],
+            "min_time": summary["min"],
+            "max_time": summary["max"],
+            "p50_time": summary["p50"],
+            "p95_time": summary["p95"],
+            "p99_time": summary["p99"],
+            "success_rate": (self.success_count / summary["count"]) * 100 if summary["count"] else 0,
+        }
+
+
 class PerformanceMonitor:
     """
     Detailliertes Performance-Monitoring für wissenschaftliche Auswertung
+
+    Sessions sind request-bezogen und liegen in einer ContextVar, damit
+    nebenläufige Requests (Threads oder asyncio-Tasks) sich nicht gegenseitig
+    überschreiben.
+
+    Beendete Sessions werden in einem Ring-Buffer (``MAX_SESSIONS``) gehalten,
+    dauerhafte Statistiken laufen über Streaming-Aggregate mit Histogrammen.
     """
     
-    def __init__(self):
-        self.metrics = []
-        self.current_session = None
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.metrics = deque(maxlen=max_sessions)
+        self.operation_aggregates: Dict[str, OperationAggregate] = {}
+        self.session_durations = LatencyHistogram()
+        self.total_sessions = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def current_session(self) -> Optional[Dict[str, Any]]:
+        """Session des aktuellen Kontexts (Thread bzw. asyncio-Task)"""
+        return _current_session.get()
         
     def start_session(self, session_name: str, context: Dict[str, Any] = None):
-        """Startet eine neue Monitoring-Session"""
-        self.current_session = {
+        """Startet eine neue Monitoring-Session im aktuellen Kontext"""
+        session = {
             "session_name": session_name,
             "start_time": time.time(),
             "start_datetime": datetime.now().isoformat(),
             "context": context or {},
             "operations": [],
-            "total_duration": None
+            "dropped_operations": 0,
+            "total_duration": None,
+            "trace_id": current_trace_id()
         }
+        token = _current_session.set(session)
+        session["_token"] = token
+        session["_closed"] = False
         logger.info(f"🔍 Performance Session gestartet: {session_name}")
         
     def end_session(self):
-        """Beendet die aktuelle Session und speichert Ergebnisse"""
-        if self.current_session:
-            self.current_session["total_duration"] = time.time() - self.current_session["start_time"]
-            self.current_session["end_datetime"] = datetime.now().isoformat()
-            
-            self.metrics.append(self.current_session.copy())
-            
-            logger.info(f"✅ Session '{self.current_session['session_name']}' beendet: "
-                       f"{self.current_session['total_duration']:.2f}s")
+        """Beendet die Session des aktuellen Kontexts und speichert Ergebnisse"""
+        session = _current_session.get()
+        if not session:
+            return
+        
+        token = session.pop("_token", None)
+        
+        with self._lock:
+            session["_closed"] = True
+            session["total_duration"] = time.time() - session["start_time"]
+            session["end_datetime"] = datetime.now().isoformat()
             
-            # Reset für nächste Session
-            self.current_session = None
+            snapshot = {k: v for k, v in session.items() if not k.startswith("_")}
+            snapshot["operations"] = list(session["operations"])
+            self.metrics.append(snapshot)
+            self.session_durations.record(session["total_duration"])
+            self.total_sessions += 1
+        
+        # Dauerhaft und worker-übergreifend ablegen (asynchron, blockiert nicht)
+        performance_store.append("session", snapshot)
+        
+        logger.info(f"✅ Session '{session['session_name']}' beendet: "
+                   f"{session['total_duration']:.2f}s")
+        
+        # Vorherige Session (z.B. bei verschachtelten Sessions) wiederherstellen
+        try:
+            _current_session.reset(token)
+        except (ValueError, TypeError):
+            # Session wurde in einem anderen Kontext gestartet
+            _current_session.set(None)
     
     @contextmanager
     def measure_operation(self, operation_name: str, details: Dict[str, Any] = None):
-        """Context Manager für einzelne Operationen"""
+        """Context Manager für einzelne Operationen (thread- und asyncio-sicher)"""
+        # Session beim Start festhalten - die Operation zählt zu dem Request, der sie gestartet hat
+        session = _current_session.get()
         start_time = time.time()
         operation_data = {
             "operation": operation_name,
@@ -58,70 +218,64 @@ class PerformanceMonitor:
             "error": None
         }
         
-        try:
-            logger.info(f"⏱️  Starte: {operation_name}")
-            yield operation_data
+        # Jede Operation ist zugleich ein Span - verschachtelte Operationen bilden den Trace-Baum
+        with tracer.start_span(operation_name, operation_data["details"]):
+            try:
+                logger.info(f"⏱️  Starte: {operation_name}")
+                yield operation_data
             
-        except Exception as e:
-            operation_data["success"] = False
-            operation_data["error"] = str(e)
-            logger.error(f"❌ Fehler bei {operation_name}: {e}")
-            raise
+            except Exception as e:
+                operation_data["success"] = False
+                operation_data["error"] = str(e)
+                logger.error(f"❌ Fehler bei {operation_name}: {e}")
+                raise
             
-        finally:
-            operation_data["duration"] = time.time() - start_time
+            finally:
+                operation_data["duration"] = time.time() - start_time
             
-            if self.current_session:
-                self.current_session["operations"].append(operation_data)
+                with self._lock:
+                    aggregate = self.operation_aggregates.get(operation_name)
+                    if aggregate is None:
+                        aggregate = self.operation_aggregates[operation_name] = OperationAggregate()
+                    aggregate.record(operation_data["duration"], operation_data["success"])
+                
+                    # Nach end_session eintreffende Operationen (z.B. späte Hintergrund-Jobs) verwerfen
+                    if session is not None and not session.get("_closed"):
+                        if len(session["operations"]) < MAX_OPERATIONS_PER_SESSION:
+                            session["operations"].append(operation_data)
+                        else:
+                            session["dropped_operations"] += 1
             
-            status = "✅" if operation_data["success"] else "❌"
-            logger.info(f"{status} {operation_name}: {operation_data['duration']:.2f}s")
+                status = "✅" if operation_data["success"] else "❌"
+                logger.info(f"{status} {operation_name}: {operation_data['duration']:.2f}s")
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Gibt eine Zusammenfassung der letzten Session zurück"""
-        if not self.metrics:
-            return {"error": "Keine Monitoring-Daten verfügbar"}
-        
-        last_session = self.metrics[-1]
+        with self._lock:
+            if not self.metrics:
+                return {"error": "Keine Monitoring-Daten verfügbar"}
+            
+            last_session = self.metrics[-1]
         operations = last_session["operations"]
         
         # Operationen nach Typ gruppieren
-        operation_types = {}
+        aggregates: Dict[str, OperationAggregate] = {}
         for op in operations:
-            op_type = op["operation"]
-            if op_type not in operation_types:
-                operation_types[op_type] = {
-                    "count": 0,
-                    "total_time": 0,
-                    "avg_time": 0,
-                    "min_time": float('inf'),
-                    "max_time": 0,
-                    "success_rate": 0
-                }
-            
-            stats = operation_types[op_type]
-            stats["count"] += 1
-            stats["total_time"] += op["duration"]
-            stats["min_time"] = min(stats["min_time"], op["duration"])
-            stats["max_time"] = max(stats["max_time"], op["duration"])
-            
-            if op["success"]:
-                stats["success_rate"] += 1
+            aggregates.setdefault(op["operation"], OperationAggregate()).record(op["duration"], op["success"])
         
-        # Durchschnitte berechnen
-        for stats in operation_types.values():
-            if stats["count"] > 0:
-                stats["avg_time"] = stats["total_time"] / stats["count"]
-                stats["success_rate"] = (stats["success_rate"] / stats["count"]) * 100
+        operation_types = {name: aggregate.to_dict() for name, aggregate in aggregates.items()}
         
         return {
             "session_info": {
                 "name": last_session["session_name"],
                 "total_duration": last_session["total_duration"],
                 "total_operations": len(operations),
-                "context": last_session["context"]
+                "dropped_operations": last_session.get("dropped_operations", 0),
+                "context": last_session["context"],
+                "trace_id": last_session.get("trace_id")
             },
             "operation_breakdown": operation_types,
+            "global_operation_statistics": self.get_operation_statistics(),
             "bottlenecks": self._identify_bottlenecks(operation_types),
             "recommendations": self._generate_recommendations(operation_types, last_session["total_duration"])
         }
@@ -172,59 +326,52 @@ class PerformanceMonitor:
         
         return recommendations
     
+    def get_operation_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Streaming-Statistiken (inkl. p50/p95/p99) pro Operation über alle Sessions"""
+        with self._lock:
+            return {name: aggregate.to_dict() for name, aggregate in self.operation_aggregates.items()}
+    
     def export_for_research(self) -> Dict[str, Any]:
         """Exportiert alle Daten für wissenschaftliche Auswertung"""
+        with self._lock:
+            sessions = list(self.metrics)
+            total_sessions = self.total_sessions
+        
         return {
             "monitoring_metadata": {
-                "total_sessions": len(self.metrics),
+                "total_sessions": total_sessions,
+                "retained_sessions": len(sessions),
                 "export_timestamp": datetime.now().isoformat(),
                 "purpose": "Masterarbeit Performance-Analyse"
             },
-            "all_sessions": self.metrics,
+            "all_sessions": sessions,
             "aggregated_statistics": self._calculate_aggregated_stats()
         }
     
     def _calculate_aggregated_stats(self) -> Dict[str, Any]:
-        """Berechnet aggregierte Statistiken über alle Sessions"""
-        if not self.metrics:
-            return {}
+        """Aggregierte Statistiken aus den Streaming-Aggregaten (alle Sessions seit Start)"""
+        operation_stats = self.get_operation_statistics()
         
-        all_operations = []
-        for session in self.metrics:
-            all_operations.extend(session["operations"])
+        with self._lock:
+            if not self.total_sessions:
+                return {}
+            session_summary = self.session_durations.summary()
         
         return {
-            "total_operations": len(all_operations),
-            "avg_session_duration": sum(s["total_duration"] for s in self.metrics) / len(self.metrics),
-            "operation_frequency": self._get_operation_frequency(all_operations),
-            "success_rates": self._get_success_rates(all_operations)
+            "total_operations": sum(stats["count"] for stats in operation_stats.values()),
+            "avg_session_duration": session_summary["mean"],
+            "session_duration_percentiles": {
+                "p50": session_summary["p50"],
+                "p95": session_summary["p95"],
+                "p99": session_summary["p99"],
+            },
+            "operation_frequency": {name: stats["count"] for name, stats in operation_stats.items()},
+            "success_rates": {name: stats["success_rate"] for name, stats in operation_stats.items()},
+            "operation_latency_percentiles": {
+                name: {"p50": stats["p50_time"], "p95": stats["p95_time"], "p99": stats["p99_time"]}
+                for name, stats in operation_stats.items()
+            }
         }
-    
-    def _get_operation_frequency(self, operations: List[Dict]) -> Dict[str, int]:
-        """Häufigkeit der verschiedenen Operationen"""
-        frequency = {}
-        for op in operations:
-            op_name = op["operation"]
-            frequency[op_name] = frequency.get(op_name, 0) + 1
-        return frequency
-    
-    def _get_success_rates(self, operations: List[Dict]) -> Dict[str, float]:
-        """Erfolgsraten der verschiedenen Operationen"""
-        success_rates = {}
-        operation_counts = {}
-        
-        for op in operations:
-            op_name = op["operation"]
-            operation_counts[op_name] = operation_counts.get(op_name, 0) + 1
-            
-            if op["success"]:
-                success_rates[op_name] = success_rates.get(op_name, 0) + 1
-        
-        # In Prozent umrechnen
-        for op_name in success_rates:
-            success_rates[op_name] = (success_rates[op_name] / operation_counts[op_name]) * 100
-        
-        return success_rates
 
 
 # Singleton Instance für globale Nutzung
@@ -233,18 +380,34 @@ performance_monitor = PerformanceMonitor()
 
 # Decorator für automatisches Monitoring von Funktionen
 def monitor_performance(operation_name: str = None):
-    """Decorator für automatisches Performance-Monitoring"""
+    """Decorator für automatisches Performance-Monitoring (sync und async Funktionen)"""
     def decorator(func):
+        op_name = operation_name or f"{func.__module__}.{func.__name__}"
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with performance_monitor.measure_operation(op_name, {"args_count": len(args), "kwargs_keys": list(kwargs.keys())}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            op_name = operation_name or f"{func.__module__}.{func.__name__}"
-            
             with performance_monitor.measure_operation(op_name, {"args_count": len(args), "kwargs_keys": list(kwargs.keys())}):
                 return func(*args, **kwargs)
         return wrapper
     return decorator
 
 
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    Übergibt eine Funktion an einen ThreadPoolExecutor und nimmt den aktuellen
+    Kontext (inkl. Performance-Session, Span und Profil) in den Worker-Thread mit.
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, run_profiled, fn, *args, **kwargs)
+
+
 # Hilfsfunktionen für einfache Nutzung
 def start_route_monitoring(start_adresse: str, parkplatz_count: int):
     """Startet Monitoring für Routenberechnung"""
@@ -0,0 +1,243 @@
+# parkmanagement/performance_statistics.py
+
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .performance_monitor import LatencyHistogram, OperationAggregate
+from .performance_store import performance_store
+
+
+# Statistische Auswertungen für die Masterarbeit - genutzt von den Performance-Views
+# und vom Management-Command ``performance_report``
+
+def calculate_api_efficiency(operation_breakdown: Dict[str, Dict]) -> Dict[str, Any]:
+    """Berechnet API-Effizienz-Metriken"""
+    api_operations = {k: v for k, v in operation_breakdown.items() 
+                     if any(term in k.lower() for term in ['google', 'api', 'dortmund', 'gpt'])}
+    
+    total_api_time = sum(op["total_time"] for op in api_operations.values())
+    total_api_calls = sum(op["count"] for op in api_operations.values())
+    
+    return {
+        "total_api_time_seconds": round(total_api_time, 2),
+        "total_api_calls": total_api_calls,
+        "average_api_latency": round(total_api_time / total_api_calls, 2) if total_api_calls > 0 else 0,
+        "api_time_percentage": round((total_api_time / sum(op["total_time"] for op in operation_breakdown.values())) * 100, 1),
+        "efficiency_rating": "poor" if total_api_time > 20 else "fair" if total_api_time > 10 else "good"
+    }
+
+
+def calculate_parallelization_potential(operation_breakdown: Dict[str, Dict]) -> Dict[str, Any]:
+    """Berechnet das Potenzial für Parallelisierung"""
+    parallelizable_ops = {k: v for k, v in operation_breakdown.items() 
+                         if 'google_directions' in k or 'live_data' in k}
+    
+    sequential_time = sum(op["total_time"] for op in parallelizable_ops.values())
+    parallel_time = max(op["max_time"] for op in parallelizable_ops.values()) if parallelizable_ops else 0
+    
+    time_savings = sequential_time - parallel_time
+    improvement_percentage = (time_savings / sequential_time * 100) if sequential_time > 0 else 0
+    
+    return {
+        "current_sequential_time": round(sequential_time, 2),
+        "estimated_parallel_time": round(parallel_time, 2),
+        "potential_time_savings": round(time_savings, 2),
+        "improvement_percentage": round(improvement_percentage, 1),
+        "parallelizable_operations": len(parallelizable_ops),
+        "recommendation": "High Priority" if improvement_percentage > 50 else "Medium Priority" if improvement_percentage > 25 else "Low Priority"
+    }
+
+
+def generate_statistical_analysis(research_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Generiert statistische Auswertung für Masterarbeit"""
+    sessions = research_data.get("all_sessions", [])
+    
+    if not sessions:
+        return {"error": "Keine Sessions für Analyse verfügbar"}
+    
+    durations = [s["total_duration"] for s in sessions]
+    
+    return {
+        "session_count": len(sessions),
+        "duration_statistics": {
+            "mean": round(sum(durations) / len(durations), 2),
+            "min": round(min(durations), 2),
+            "max": round(max(durations), 2),
+            "median": round(sorted(durations)[len(durations)//2], 2)
+        },
+        "performance_classification": {
+            "excellent": sum(1 for d in durations if d < 5),
+            "good": sum(1 for d in durations if 5 <= d < 10),
+            "acceptable": sum(1 for d in durations if 10 <= d < 20),
+            "poor": sum(1 for d in durations if d >= 20)
+        }
+    }
+
+
+def analyze_performance_trends(research_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Analysiert Performance-Trends über Zeit"""
+    sessions = research_data.get("all_sessions", [])
+    
+    if len(sessions) < 2:
+        return {"note": "Mindestens 2 Sessions für Trend-Analyse erforderlich"}
+    
+    # Chronologische Sortierung
+    sorted_sessions = sorted(sessions, key=lambda x: x.get("start_datetime", ""))
+    
+    recent_avg = sum(s["total_duration"] for s in sorted_sessions[-3:]) / min(3, len(sorted_sessions))
+    early_avg = sum(s["total_duration"] for s in sorted_sessions[:3]) / min(3, len(sorted_sessions))
+    
+    trend = "improving" if recent_avg < early_avg else "stable" if abs(recent_avg - early_avg) < 1 else "degrading"
+    
+    return {
+        "trend_direction": trend,
+        "early_average": round(early_avg, 2),
+        "recent_average": round(recent_avg, 2),
+        "performance_change": round(((recent_avg - early_avg) / early_avg) * 100, 1) if early_avg > 0 else 0
+    }
+
+
+def generate_production_recommendations(research_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Generiert Empfehlungen für Produktivsystem"""
+    avg_duration = research_data.get("aggregated_statistics", {}).get("avg_session_duration", 0)
+    
+    recommendations = []
+    
+    if avg_duration > 15:
+        recommendations.append({
+            "priority": "CRITICAL",
+            "area": "Architecture",
+            "recommendation": "Implementierung von asynchroner Verarbeitung und Parallelisierung",
+            "expected_improvement": "70-80% Zeitreduktion",
+            "implementation_effort": "High"
+        })
+    
+    if avg_duration > 10:
+        recommendations.append({
+            "priority": "HIGH", 
+            "area": "API Optimization",
+            "recommendation": "Google Distance Matrix API für Batch-Requests nutzen",
+            "expected_improvement": "40-60% weniger API-Calls",
+            "implementation_effort": "Medium"
+        })
+    
+    recommendations.append({
+        "priority": "MEDIUM",
+        "area": "Caching",
+        "recommendation": "Redis-basiertes Caching für Routenberechnungen (5-15min TTL)",
+        "expected_improvement": "85-95% bei wiederholten Anfragen",
+        "implementation_effort": "Low"
+    })
+    
+    return recommendations
+
+
+# Auswertung des dauerhaften Performance-Stores (alle Worker, beliebige Zeiträume)
+
+def parse_zeitpunkt(wert: Optional[str]) -> Optional[float]:
+    """
+    Zeitangabe als Unix-Zeitstempel: relativ zu jetzt (``30m``, ``24h``, ``7d``)
+    oder als ISO-Datum/-Zeitpunkt (``2025-05-01``, ``2025-05-01T18:30``).
+
+    Raises:
+        ValueError: bei unbekanntem Format
+    """
+    if not wert:
+        return None
+    einheiten = {"m": 60, "h": 3600, "d": 86400}
+    if wert[-1] in einheiten and wert[:-1].isdigit():
+        return time.time() - int(wert[:-1]) * einheiten[wert[-1]]
+    return datetime.fromisoformat(wert).timestamp()
+
+
+def aggregiere_sessions(sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregierte Statistiken wie ``PerformanceMonitor._calculate_aggregated_stats``, aus Session-Records"""
+    if not sessions:
+        return {}
+
+    session_durations = LatencyHistogram()
+    aggregates: Dict[str, OperationAggregate] = defaultdict(OperationAggregate)
+    for session in sessions:
+        session_durations.record(session["total_duration"])
+        for op in session.get("operations", []):
+            if op.get("duration") is not None:
+                aggregates[op["operation"]].record(op["duration"], op.get("success", True))
+
+    operation_stats = {name: aggregate.to_dict() for name, aggregate in aggregates.items()}
+    summary = session_durations.summary()
+    return {
+        "total_operations": sum(stats["count"] for stats in operation_stats.values()),
+        "avg_session_duration": summary["mean"],
+        "session_duration_percentiles": {"p50": summary["p50"], "p95": summary["p95"], "p99": summary["p99"]},
+        "operation_frequency": {name: stats["count"] for name, stats in operation_stats.items()},
+        "success_rates": {name: stats["success_rate"] for name, stats in operation_stats.items()},
+        "operation_latency_percentiles": {
+            name: {"p50": stats["p50_time"], "p95": stats["p95_time"], "p99": stats["p99_time"]}
+            for name, stats in operation_stats.items()
+        },
+    }
+
+
+def forschungsdaten_aus_store(since: Optional[float] = None, until: Optional[float] = None,
+                              session_name: Optional[str] = None) -> Dict[str, Any]:
+    """Forschungsdaten im Format von ``get_research_export``, aber über alle Worker und Neustarts"""
+    sessions = []
+    worker = set()
+    for record in performance_store.read(["session"], since=since, until=until):
+        session = record["data"]
+        if session_name and session.get("session_name") != session_name:
+            continue
+        if session.get("total_duration") is None:
+            continue
+        sessions.append(session)
+        worker.add(record["pid"])
+
+    return {
+        "monitoring_metadata": {
+            "total_sessions": len(sessions),
+            "retained_sessions": len(sessions),
+            "workers": len(worker),
+            "source": "performance_store",
+            "range": {
+                "since": datetime.fromtimestamp(since).isoformat() if since else None,
+                "until": datetime.fromtimestamp(until).isoformat() if until else None,
+            },
+            "export_timestamp": datetime.now().isoformat(),
+            "purpose": "Masterarbeit Performance-Analyse"
+        },
+        "all_sessions": sessions,
+        "aggregated_statistics": aggregiere_sessions(sessions),
+    }
+
+
+def tagesverlauf(sessions: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Session-Dauern pro Kalendertag (Anzahl, Mittelwert, p50, p95)"""
+    tage: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+    for session in sessions:
+        tag = datetime.fromtimestamp(session["start_time"]).date().isoformat()
+        tage[tag].record(session["total_duration"])
+
+    return [
+        {
+            "date": tag,
+            "sessions": histogram.count,
+            "mean": round(histogram.total / histogram.count, 3),
+            "p50": round(histogram.percentile(50), 3),
+            "p95": round(histogram.percentile(95), 3),
+        }
+        for tag, histogram in sorted(tage.items())
+    ]
+
+
+def erstelle_performance_report(research_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Vollständiger Report: Statistik, Trends, Tagesverlauf und Empfehlungen"""
+    return {
+        "monitoring_metadata": research_data["monitoring_metadata"],
+        "aggregated_statistics": research_data["aggregated_statistics"],
+        "statistical_analysis": generate_statistical_analysis(research_data),
+        "performance_trends": analyze_performance_trends(research_data),
+        "daily_breakdown": tagesverlauf(research_data["all_sessions"]),
+        "production_recommendations": generate_production_recommendations(research_data),
+    }
@@ -0,0 +1,172 @@
+# parkmanagement/performance_store.py
+
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Store-Konfiguration
+STORE_QUEUE_SIZE = 10000  # Bei voller Queue werden Records verworfen statt Requests zu blockieren
+STORE_FLUSH_INTERVAL = 2.0  # Sekunden zwischen zwei Schreibvorgängen
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Unkomprimiert, danach neues Segment
+SEGMENT_MAX_AGE = 3600  # Sekunden, danach neues Segment
+STORE_RETENTION_DAYS = 30
+
+_SEGMENT_NAME = re.compile(r"^(?P<pid>\d+)-(?P<start>\d+)\.jsonl\.gz$")
+
+
+class PerformanceStore:
+    """
+    Append-only Ablage von Sessions und Traces als gzip-komprimierte JSONL-Segmente.
+
+    Jeder Worker schreibt in eigene Segmente (``<pid>-<startzeit>.jsonl.gz``),
+    rotiert nach Größe/Alter und löscht Segmente nach ``STORE_RETENTION_DAYS``.
+    Geschrieben wird aus einem Hintergrund-Thread; jeder Flush ist ein
+    vollständiges gzip-Member, ein Absturz verliert höchstens den letzten Batch.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=STORE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._segment = None
+        self._segment_started = 0.0
+        self._segment_bytes = 0
+        self.dropped_records = 0
+
+    @property
+    def directory(self) -> str:
+        return (self._directory or getattr(settings, "PERFORMANCE_STORE_DIR", None)
+                or os.path.join(tempfile.gettempdir(), "matchroute_performance"))
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, "PERFORMANCE_STORE_ENABLED", True)
+
+    # -- Schreiben ---------------------------------------------------------
+
+    def append(self, record_type: str, data: Dict[str, Any]):
+        """Reiht einen Record zum Schreiben ein (blockiert nie)"""
+        if not self.enabled():
+            return
+        record = {"type": record_type, "pid": os.getpid(), "recorded_at": time.time(), "data": data}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+            return
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._write_loop, name="performance-store", daemon=True)
+                self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(STORE_FLUSH_INTERVAL)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                logger.error(f"❌ Performance-Store: {len(batch)} Records nicht geschrieben: {e}")
+
+    def _segment_path(self) -> str:
+        now = time.time()
+        if (self._segment is None or self._segment_bytes >= SEGMENT_MAX_BYTES
+                or now - self._segment_started >= SEGMENT_MAX_AGE
+                or not self._segment.startswith(self.directory)):
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment = os.path.join(self.directory, f"{os.getpid()}-{int(now)}.jsonl.gz")
+            self._segment_started = now
+            self._segment_bytes = 0
+            self._cleanup()
+        return self._segment
+
+    def write(self, records: List[Dict[str, Any]]):
+        """Schreibt Records synchron als ein gzip-Member in das aktuelle Segment"""
+        payload = "".join(json.dumps(r, default=str) + "\n" for r in records)
+        with gzip.open(self._segment_path(), "at", encoding="utf-8") as fh:
+            fh.write(payload)
+        self._segment_bytes += len(payload)
+
+    def _cleanup(self):
+        grenze = time.time() - STORE_RETENTION_DAYS * 86400
+        for segment in self.segments():
+            if os.path.getmtime(segment) < grenze:
+                try:
+                    os.remove(segment)
+                except OSError:
+                    pass
+
+    # -- Lesen -------------------------------------------------------------
+
+    def segments(self) -> List[str]:
+        """Alle Segmente aller Worker, nach Startzeit sortiert"""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                found.append((int(match["start"]), os.path.join(self.directory, name)))
+        return [path for _, path in sorted(found)]
+
+    def read(self, record_types: Iterable[str] = None, since: Optional[float] = None,
+             until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Liest Records aller Worker im Zeitraum [since, until).
+
+        Abgeschnittene Segmente (laufende oder abgestürzte Worker) werden bis
+        zum letzten vollständigen Record gelesen.
+        """
+        record_types = set(record_types) if record_types else None
+        for segment in self.segments():
+            # Segmente, die nach dem Zeitraum begonnen haben, enthalten nichts Relevantes
+            start = int(_SEGMENT_NAME.match(os.path.basename(segment))["start"])
+            if until is not None and start >= until:
+                continue
+            if since is not None and os.path.getmtime(segment) < since:
+                continue
+
+            try:
+                with gzip.open(segment, "rt", encoding="utf-8") as fh:
+                    for line in fh:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record_types and record.get("type") not in record_types:
+                            continue
+                        recorded_at = record.get("recorded_at", 0)
+                        if since is not None and recorded_at < since:
+                            continue
+                        if until is not None and recorded_at >= until:
+                            continue
+                        yield record
+            except (EOFError, OSError, zlib.error) as e:
+                logger.warning(f"⚠️ Segment {os.path.basename(segment)} unvollständig gelesen: {e}")
+
+
+# Singleton Instance für globale Nutzung
+performance_store = PerformanceStore()
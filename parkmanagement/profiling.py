@@ -0,0 +1,254 @@
+# parkmanagement/profiling.py
+
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Profiler-Konfiguration
+PROFILE_SAMPLE_INTERVAL = 0.005  # 200 Hz - ein Sampler-Thread für alle aktiven Profile
+MAX_CONCURRENT_PROFILES = 2  # Weitere Profil-Anfragen laufen unprofiliert
+MAX_STORED_PROFILES = 200  # Älteste Profile werden gelöscht
+MAX_STACK_DEPTH = 128
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Aktives Profil des Requests - submit_with_context nimmt es in Worker-Threads mit
+_active_profile: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    base_dir = str(getattr(settings, "BASE_DIR", ""))
+    if base_dir and filename.startswith(base_dir):
+        filename = os.path.relpath(filename, base_dir)
+    elif "site-packages" in filename:
+        filename = filename.split("site-packages", 1)[1].lstrip(os.sep)
+    return filename.replace(";", "_")
+
+
+def _fold(thread_name: str, frame) -> str:
+    """Stack eines Threads im Folded-Format (``root;caller;callee``)"""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.append(thread_name.replace(";", "_"))
+    return ";".join(reversed(stack))
+
+
+class ProfileSession:
+    """Gesammelte Stack-Samples eines Requests"""
+
+    def __init__(self, name: str):
+        self.profile_id = uuid.uuid4().hex
+        self.name = name
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started = time.time()
+        self.duration = None
+        self._lock = threading.Lock()
+        self._threads: Dict[int, str] = {threading.get_ident(): threading.current_thread().name}
+
+    def threads(self) -> Dict[int, str]:
+        with self._lock:
+            return dict(self._threads)
+
+    @contextmanager
+    def attach_current_thread(self):
+        """Bezieht den aktuellen Thread (z.B. einen Executor-Worker) in das Profil ein"""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = threading.current_thread().name
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.pop(ident, None)
+
+    def folded(self) -> str:
+        """Flamegraph-Eingabe (flamegraph.pl, speedscope, inferno)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+class SamplingProfiler:
+    """
+    Sampling-Profiler auf Basis von ``sys._current_frames()``.
+
+    Ein einzelner Daemon-Thread nimmt alle ``interval`` Sekunden die Stacks
+    der Threads aller aktiven Profile auf. Ohne aktive Profile schläft er -
+    unprofilierte Requests zahlen nichts.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, max_concurrent: int = MAX_CONCURRENT_PROFILES):
+        self.interval = interval
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._thread = None
+
+    def start(self, name: str) -> Optional[ProfileSession]:
+        """Startet ein Profil für den aktuellen Thread (None wenn alle Slots belegt sind)"""
+        if not self._slots.acquire(blocking=False):
+            logger.info(f"🔬 Profiling übersprungen - bereits {MAX_CONCURRENT_PROFILES} Profile aktiv")
+            return None
+
+        session = ProfileSession(name)
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: ProfileSession):
+        with self._lock:
+            if session not in self._sessions:
+                return
+            self._sessions.discard(session)
+        session.duration = time.time() - session.started
+        self._slots.release()
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                sessions = list(self._sessions)
+                if not sessions:
+                    self._wakeup.clear()
+            if not sessions:
+                self._wakeup.wait()
+                continue
+
+            frames = sys._current_frames()
+            for session in sessions:
+                for ident, thread_name in session.threads().items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        session.samples[_fold(thread_name, frame)] += 1
+                session.sample_count += 1
+            del frames
+
+            time.sleep(self.interval)
+
+
+# Singleton Instance für globale Nutzung
+profiler = SamplingProfiler()
+
+
+@contextmanager
+def profile_request(name: str):
+    """Profiliert den Block; liefert die Session oder None, falls kein Slot frei ist"""
+    session = profiler.start(name)
+    if session is None:
+        yield None
+        return
+
+    token = _active_profile.set(session)
+    try:
+        yield session
+    finally:
+        _active_profile.reset(token)
+        profiler.stop(session)
+
+
+def run_profiled(fn, *args, **kwargs):
+    """Führt ``fn`` aus und nimmt den Thread in ein aktives Profil des Kontexts auf"""
+    session = _active_profile.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    with session.attach_current_thread():
+        return fn(*args, **kwargs)
+
+
+class ProfileStore:
+    """Ablage der Profile als ``<id>.folded`` + ``<id>.json`` in PROFILE_DIR"""
+
+    @staticmethod
+    def directory() -> str:
+        return getattr(settings, "PROFILE_DIR", None) or os.path.join(tempfile.gettempdir(), "matchroute_profiles")
+
+    @staticmethod
+    def speichern(session: ProfileSession, meta: Dict[str, Any]) -> str:
+        directory = ProfileStore.directory()
+        os.makedirs(directory, exist_ok=True)
+
+        meta = {
+            "profile_id": session.profile_id,
+            "name": session.name,
+            "created": session.started,
+            "duration": session.duration,
+            "sample_count": session.sample_count,
+            "sample_interval": profiler.interval,
+            "distinct_stacks": len(session.samples),
+            **meta,
+        }
+        with open(os.path.join(directory, f"{session.profile_id}.folded"), "w", encoding="utf-8") as fh:
+            fh.write(session.folded())
+        with open(os.path.join(directory, f"{session.profile_id}.json"), "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+
+        ProfileStore._aufraeumen(directory)
+        logger.info(f"🔬 Profil {session.profile_id} gespeichert: {session.sample_count} Samples, {session.name}")
+        return session.profile_id
+
+    @staticmethod
+    def _aufraeumen(directory: str):
+        metas = sorted(
+            (f for f in os.listdir(directory) if f.endswith(".json")),
+            key=lambda f: os.path.getmtime(os.path.join(directory, f)),
+        )
+        for name in metas[:-MAX_STORED_PROFILES]:
+            profile_id = name[:-len(".json")]
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def liste(limit: int = 50) -> List[Dict[str, Any]]:
+        """Metadaten der neuesten Profile"""
+        directory = ProfileStore.directory()
+        if not os.path.isdir(directory):
+            return []
+
+        profile = []
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name), encoding="utf-8") as fh:
+                    profile.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        return sorted(profile, key=lambda p: p.get("created", 0), reverse=True)[:limit]
+
+    @staticmethod
+    def laden(profile_id: str) -> Optional[str]:
+        """Folded-Stacks eines Profils oder None"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(ProfileStore.directory(), f"{profile_id}.folded"), encoding="utf-8") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,157 @@
+# parkmanagement/query_instrumentation.py
+
+import contextvars
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import connections
+
+from .tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+# Ab so vielen gleichen Query-Formen pro Request wird ein N+1-Muster gemeldet
+N_PLUS_ONE_THRESHOLD = 5
+# Requests mit mehr Queries werden als Warnung geloggt
+QUERY_WARN_THRESHOLD = 30
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Offene Query-Statistiken, äußerste zuerst (z.B. Test-Budget um die des Requests)
+_current_stats: contextvars.ContextVar[Tuple["QueryStats", ...]] = contextvars.ContextVar("query_stats", default=())
+
+
+def normalize_sql(sql: str) -> str:
+    """Query-Form ohne Parameter/Literale - gleiche Formen deuten auf N+1 hin"""
+    shape = _STRING_LITERAL.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """Anzahl, DB-Zeit und Query-Formen eines Requests (bzw. Test-Blocks)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, Dict[str, Any]] = {}
+        self.queries: List[Dict[str, Any]] = []
+
+    def record(self, sql: str, duration: float, span_name: Optional[str] = None):
+        self.count += 1
+        self.total_time += duration
+        self.queries.append({"sql": sql, "duration": duration, "span": span_name})
+
+        shape = normalize_sql(sql)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            entry = self.shapes[shape] = {"count": 0, "total_time": 0.0, "spans": set()}
+        entry["count"] += 1
+        entry["total_time"] += duration
+        if span_name:
+            entry["spans"].add(span_name)
+
+    def n_plus_one(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Dict[str, Any]]:
+        """Query-Formen, die mindestens ``threshold`` mal ausgeführt wurden"""
+        return sorted(
+            (
+                {"shape": shape, "count": e["count"], "total_time": e["total_time"], "spans": sorted(e["spans"])}
+                for shape, e in self.shapes.items() if e["count"] >= threshold
+            ),
+            key=lambda e: e["count"],
+            reverse=True,
+        )
+
+    def duplicates(self) -> int:
+        """Anzahl der Queries, deren Form im Request schon einmal vorkam"""
+        return sum(e["count"] - 1 for e in self.shapes.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query_count": self.count,
+            "db_time": round(self.total_time, 4),
+            "distinct_shapes": len(self.shapes),
+            "duplicate_queries": self.duplicates(),
+            "n_plus_one": self.n_plus_one(),
+        }
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    ``connection.execute_wrapper`` - zählt Queries und DB-Zeit für den
+    aktuellen Request und den aktuell offenen Span.
+    """
+    span = current_span()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for stats in _current_stats.get():
+            stats.record(sql, duration, span.name if span else None)
+        if span is not None:
+            span.set_attribute("db.query_count", span.attributes.get("db.query_count", 0) + 1)
+            span.set_attribute("db.time", span.attributes.get("db.time", 0.0) + duration)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    offen = _current_stats.get()
+    return offen[-1] if offen else None
+
+
+@contextmanager
+def track_queries():
+    """
+    Misst alle Queries im Block (alle DB-Verbindungen des aktuellen Threads).
+    Blöcke lassen sich schachteln; den Zähl-Wrapper setzt nur der äußerste,
+    jede Query zählt in allen offenen Statistiken.
+    """
+    offen = _current_stats.get()
+    stats = QueryStats()
+    token = _current_stats.set(offen + (stats,))
+    try:
+        with ExitStack() as stack:
+            if not offen:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(count_queries))
+            yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Ein Code-Block hat mehr Queries ausgeführt als erlaubt."""
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, max_duplicates: Optional[int] = None):
+    """
+    Query-Budget für Tests, z.B.::
+
+        with assert_query_budget(5, max_duplicates=0):
+            self.client.get("/api/dashboard-stats/")
+
+    Raises:
+        QueryBudgetExceeded: mit allen ausgeführten Queries in der Meldung
+    """
+    with track_queries() as stats:
+        yield stats
+
+    fehler = []
+    if stats.count > max_queries:
+        fehler.append(f"{stats.count} Queries ausgeführt, Budget: {max_queries}")
+    if max_duplicates is not None and stats.duplicates() > max_duplicates:
+        fehler.append(f"{stats.duplicates()} wiederholte Query-Formen, erlaubt: {max_duplicates}")
+
+    if fehler:
+        queries = "\n".join(f"  {i}. {q['sql']}" for i, q in enumerate(stats.queries, 1))
+        raise QueryBudgetExceeded("; ".join(fehler) + f"\n{queries}")
@@ -0,0 +1,61 @@
+# parkmanagement/renderers.py
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson ist optional - ohne orjson verhalten sich Renderer und Parser wie die DRF-Standardklassen
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_drf_encoder = JSONEncoder()
+
+
+def _orjson_default(obj):
+    # Decimal, Lazy-Strings, QuerySets, Generatoren usw. wie der DRF-Encoder
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-Renderer auf Basis von orjson (serialisiert dicts/lists in C).
+
+    Ausgabe wie ``JSONRenderer``: kompakt, UTF-8, datetimes in UTC mit ``Z``,
+    Decimal als Zahl; NaN/Infinity werden allerdings zu ``null`` statt eines
+    Fehlers. Eingerückte Ausgabe (``; indent=``) und alles, was orjson ablehnt
+    (z.B. Ganzzahlen über 64 Bit), rendert die DRF-Implementierung.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not ORJSON_AVAILABLE or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_orjson_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # U+2028/U+2029 wie JSONRenderer escapen (gültiges JavaScript)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSON-Parser auf Basis von orjson (Fallback: DRF ``JSONParser``)"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not ORJSON_AVAILABLE:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
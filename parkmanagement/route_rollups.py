@@ -0,0 +1,262 @@
+# parkmanagement/route_rollups.py
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import RollupWasserstand, Route, RouteTagesStatistik, StadionBesucher
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "route_tage"
+TAGE_PRO_DURCHLAUF = 31  # Tage pro Transaktion beim Nachholen längerer Zeiträume
+TOTAL_USERS_CACHE_TIMEOUT = 300
+TOP_PARKPLAETZE = 10
+
+
+def _tagesbeginn(tag: date) -> datetime:
+    return timezone.make_aware(datetime.combine(tag, time.min))
+
+
+def _tag(zeitpunkt: datetime) -> date:
+    return timezone.localdate(zeitpunkt)
+
+
+def route_werte(route: Route) -> Dict[str, Any]:
+    """Rollup-relevante Felder einer Route (für Vorher/Nachher-Vergleiche in Signals)"""
+    return {
+        "erstelldatum": route.erstelldatum,
+        "stadion_id": route.stadion_id,
+        "parkplatz_id": route.parkplatz_id,
+        "transportmittel": route.transportmittel,
+        "dauer_minuten": route.dauer_minuten,
+    }
+
+
+class RouteRollups:
+    """
+    Tages-Rollups der Routen pro (Tag, Stadion, Parkplatz, Transportmittel).
+
+    Abgeschlossene Tage vor dem Wasserstand stehen in ``RouteTagesStatistik``,
+    der Rest (i.d.R. nur der laufende Tag) wird beim Export live aggregiert.
+    Nachträgliche Änderungen an bereits eingerechneten Tagen werden in der
+    gleichen Transaktion auf die Rollup-Zeile übertragen.
+    """
+
+    @staticmethod
+    def wasserstand() -> Optional[date]:
+        """Erster noch nicht eingerechneter Tag (None vor dem ersten Lauf)"""
+        return RollupWasserstand.objects.filter(name=ROLLUP_NAME).values_list("bis_tag", flat=True).first()
+
+    @staticmethod
+    def aktualisieren(bis: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Rechnet alle abgeschlossenen Tage ab dem Wasserstand bis ausschließlich
+        ``bis`` (Standard und Obergrenze: heute) ein.
+        """
+        heute = timezone.localdate()
+        bis = min(bis or heute, heute)
+
+        if not RollupWasserstand.objects.filter(name=ROLLUP_NAME).exists():
+            erste_route = Route.objects.aggregate(erste=Min("erstelldatum"))["erste"]
+            RollupWasserstand.objects.get_or_create(
+                name=ROLLUP_NAME, defaults={"bis_tag": _tag(erste_route) if erste_route else heute}
+            )
+
+        tage, zeilen = 0, 0
+        while True:
+            with transaction.atomic():
+                # Sperre serialisiert parallele Läufe (Command und Export)
+                stand = RollupWasserstand.objects.select_for_update().get(name=ROLLUP_NAME)
+                if stand.bis_tag >= bis:
+                    break
+                ende = min(stand.bis_tag + timedelta(days=TAGE_PRO_DURCHLAUF), bis)
+                zeilen += RouteRollups._einrechnen(stand.bis_tag, ende)
+                tage += (ende - stand.bis_tag).days
+                stand.bis_tag = ende
+                stand.save()
+
+        if tage:
+            logger.info(f"📦 Routen-Rollup: {tage} Tage, {zeilen} Zeilen, Wasserstand {bis}")
+        return {"days": tage, "rows": zeilen, "watermark": RouteRollups.wasserstand()}
+
+    @staticmethod
+    def neu_berechnen(von: date, bis: date) -> int:
+        """Berechnet bereits eingerechnete Tage [von, bis) erneut (z.B. nach Datenkorrekturen)"""
+        with transaction.atomic():
+            stand = RollupWasserstand.objects.select_for_update().filter(name=ROLLUP_NAME).first()
+            if stand is None:
+                return 0
+            return RouteRollups._einrechnen(von, min(bis, stand.bis_tag))
+
+    @staticmethod
+    def _einrechnen(von: date, bis: date) -> int:
+        if von >= bis:
+            return 0
+        RouteTagesStatistik.objects.filter(tag__gte=von, tag__lt=bis).delete()
+        gruppen = (
+            Route.objects.filter(erstelldatum__gte=_tagesbeginn(von), erstelldatum__lt=_tagesbeginn(bis))
+            .annotate(tag=TruncDate("erstelldatum", tzinfo=timezone.get_current_timezone()))
+            .values("tag", "stadion_id", "parkplatz_id", "transportmittel")
+            .annotate(anzahl=Count("id"), summe=Sum("dauer_minuten"), mit_dauer=Count("dauer_minuten"))
+            .order_by()
+        )
+        zeilen = [
+            RouteTagesStatistik(
+                tag=g["tag"],
+                stadion_id=g["stadion_id"],
+                parkplatz_id=g["parkplatz_id"],
+                transportmittel=g["transportmittel"],
+                anzahl_routen=g["anzahl"],
+                summe_dauer_minuten=g["summe"] or 0,
+                anzahl_mit_dauer=g["mit_dauer"],
+            )
+            for g in gruppen
+        ]
+        RouteTagesStatistik.objects.bulk_create(zeilen, batch_size=1000)
+        return len(zeilen)
+
+    @staticmethod
+    def route_geaendert(alt: Optional[Dict[str, Any]], neu: Optional[Dict[str, Any]]):
+        """
+        Überträgt Anlegen/Ändern/Löschen einer Route auf bereits eingerechnete
+        Tage (Werte aus ``route_werte``). Routen des laufenden Tages kosten
+        keine Abfrage.
+        """
+        heute = timezone.localdate()
+        betroffen = [
+            (werte, vorzeichen)
+            for werte, vorzeichen in ((alt, -1), (neu, 1))
+            if werte and werte["erstelldatum"] and _tag(werte["erstelldatum"]) < heute
+        ]
+        if not betroffen:
+            return
+
+        with transaction.atomic():
+            # Sperre wie aktualisieren/neu_berechnen: zwischen Lesen des Wasserstands und
+            # Anpassen der Zeile kann kein Lauf dieselbe Route einrechnen. Die Route selbst
+            # wird in derselben Transaktion geschrieben (Route.save, Collector bei delete).
+            stand = (
+                RollupWasserstand.objects.select_for_update().filter(name=ROLLUP_NAME)
+                .values_list("bis_tag", flat=True).first()
+            )
+            RouteRollups._anpassen(stand, betroffen)
+
+    @staticmethod
+    def _anpassen(stand: Optional[date], betroffen: List[Any]):
+        for werte, vorzeichen in betroffen:
+            tag = _tag(werte["erstelldatum"])
+            if stand is None or tag >= stand:
+                continue
+            schluessel = {
+                "tag": tag,
+                "stadion_id": werte["stadion_id"],
+                "parkplatz_id": werte["parkplatz_id"],
+                "transportmittel": werte["transportmittel"],
+            }
+            hat_dauer = werte["dauer_minuten"] is not None
+            # Nach gelöschten Parkplätzen (SET_NULL) kann es mehrere Zeilen pro Schlüssel geben
+            zeilen = RouteTagesStatistik.objects.filter(**schluessel).order_by("pk")
+            if vorzeichen < 0:
+                zeilen = zeilen.filter(anzahl_routen__gt=0, **({"anzahl_mit_dauer__gt": 0} if hat_dauer else {}))
+            zeile = zeilen.first()
+            if zeile is None and vorzeichen < 0:
+                logger.warning(f"⚠️ Keine Rollup-Zeile für gelöschte Route ({schluessel}) - rollup_routes --neu-berechnen")
+                continue
+            if zeile is None:
+                zeile = RouteTagesStatistik.objects.create(**schluessel)
+            RouteTagesStatistik.objects.filter(pk=zeile.pk).update(
+                anzahl_routen=F("anzahl_routen") + vorzeichen,
+                summe_dauer_minuten=F("summe_dauer_minuten") + (vorzeichen * int(werte["dauer_minuten"]) if hat_dauer else 0),
+                anzahl_mit_dauer=F("anzahl_mit_dauer") + (vorzeichen if hat_dauer else 0),
+            )
+
+    @staticmethod
+    def besucher_eintragen(stadion_id: int, benutzer_id: int):
+        StadionBesucher.objects.bulk_create(
+            [StadionBesucher(stadion_id=stadion_id, benutzer_id=benutzer_id)], ignore_conflicts=True
+        )
+
+    @staticmethod
+    def routen_angelegt(routen: List[Route]):
+        """Entspricht den post_save-Signals für per ``bulk_create`` angelegte Routen"""
+        paare = {(route.stadion_id, route.benutzer_id) for route in routen}
+        StadionBesucher.objects.bulk_create(
+            [StadionBesucher(stadion_id=stadion_id, benutzer_id=benutzer_id) for stadion_id, benutzer_id in paare],
+            ignore_conflicts=True,
+        )
+        for route in routen:
+            RouteRollups.route_geaendert(None, route_werte(route))
+
+    @staticmethod
+    def besucher_pruefen(stadion_id: int, benutzer_id: int):
+        """Entfernt das Paar, wenn der Benutzer keine Route mehr zu dem Stadion hat"""
+        if not Route.objects.filter(stadion_id=stadion_id, benutzer_id=benutzer_id).exists():
+            StadionBesucher.objects.filter(stadion_id=stadion_id, benutzer_id=benutzer_id).delete()
+
+    @staticmethod
+    def export_statistiken() -> Dict[str, Any]:
+        """
+        ``usage_statistics`` für research_data_export: Rollups plus Live-Aggregation
+        ab dem Wasserstand. Fehlende abgeschlossene Tage werden vorher eingerechnet.
+        """
+        stand = RouteRollups.wasserstand()
+        if stand is None or stand < timezone.localdate():
+            stand = RouteRollups.aktualisieren()["watermark"]
+        live = Route.objects.filter(erstelldatum__gte=_tagesbeginn(stand))
+
+        def summieren(feld: str) -> Dict[Any, List[int]]:
+            summen: Dict[Any, List[int]] = {}
+            rollups = RouteTagesStatistik.objects.values_list(feld).annotate(
+                Sum("anzahl_routen"), Sum("summe_dauer_minuten"), Sum("anzahl_mit_dauer")
+            ).order_by()
+            aktuell = live.values_list(feld).annotate(
+                Count("id"), Sum("dauer_minuten"), Count("dauer_minuten")
+            ).order_by()
+            for schluessel, anzahl, summe, mit_dauer in [*rollups, *aktuell]:
+                werte = summen.setdefault(schluessel, [0, 0, 0])
+                werte[0] += anzahl or 0
+                werte[1] += summe or 0
+                werte[2] += mit_dauer or 0
+            return {schluessel: werte for schluessel, werte in summen.items() if werte[0] > 0}
+
+        stadien = summieren("stadion__name")
+        besucher = dict(
+            StadionBesucher.objects.values_list("stadion__name")
+            .annotate(Count("benutzer", distinct=True)).order_by()
+        )
+        parkplaetze = summieren("parkplatz__name")
+        transportmittel = summieren("transportmittel")
+
+        return {
+            "total_users": cache.get_or_set("research_total_users", User.objects.count, TOTAL_USERS_CACHE_TIMEOUT),
+            "total_routes_calculated": sum(werte[0] for werte in stadien.values()),
+            "stadion_preferences": sorted(
+                (
+                    {
+                        "stadion__name": name,
+                        "route_count": anzahl,
+                        "avg_duration": summe / mit_dauer if mit_dauer else None,
+                        "unique_users": besucher.get(name, 0),
+                    }
+                    for name, (anzahl, summe, mit_dauer) in stadien.items()
+                ),
+                key=lambda eintrag: -eintrag["route_count"],
+            ),
+            "popular_parking": sorted(
+                ({"parkplatz__name": name, "usage_count": anzahl} for name, (anzahl, _, _) in parkplaetze.items()),
+                key=lambda eintrag: -eintrag["usage_count"],
+            )[:TOP_PARKPLAETZE],
+            "transport_modes": sorted(
+                ({"transportmittel": modus, "route_count": anzahl} for modus, (anzahl, _, _) in transportmittel.items()),
+                key=lambda eintrag: -eintrag["route_count"],
+            ),
+            "aggregated_until": stand.isoformat(),
+        }
@@ -0,0 +1,106 @@
+# parkmanagement/route_speichern.py
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+from django.db import IntegrityError, transaction
+
+from .models import Parkplatz, Route, Stadion
+from .route_rollups import RouteRollups
+from .user_statistics import BenutzerStatistiken
+
+logger = logging.getLogger(__name__)
+
+ROUTEN_BULK_MAX = 500  # Routen pro Bulk-Request (Offline-Sync)
+
+
+class RoutenSpeichern:
+    """
+    Speichert viele Routen eines Benutzers in einer Transaktion.
+
+    Stadien und Parkplätze werden mit je einem ``in_bulk`` aufgelöst, neue
+    Routen mit einem ``bulk_create`` angelegt. Einträge mit bereits
+    gespeichertem ``idempotency_key`` (auch doppelt im selben Batch) liefern
+    die vorhandene Route statt eines Duplikats. Da ``bulk_create`` keine
+    Signals auslöst, werden Dashboard-Statistik und Rollups hier nachgeführt.
+    """
+
+    @staticmethod
+    def bulk(benutzer, eintraege: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[int, str]]:
+        """
+        Args:
+            eintraege: validierte Daten von ``RouteSpeichernSerializer``
+
+        Returns:
+            (Ergebnis pro Eintrag, Fehler pro Index) - bei Fehlern wird nichts gespeichert
+        """
+        stadien = Stadion.objects.in_bulk({eintrag["stadion_id"] for eintrag in eintraege})
+        parkplaetze = Parkplatz.objects.in_bulk({eintrag["parkplatz_id"] for eintrag in eintraege})
+        fehler = {
+            index: "Stadion oder Parkplatz nicht gefunden."
+            for index, eintrag in enumerate(eintraege)
+            if eintrag["stadion_id"] not in stadien or eintrag["parkplatz_id"] not in parkplaetze
+        }
+        if fehler:
+            return [], fehler
+
+        try:
+            return RoutenSpeichern._anlegen(benutzer, eintraege, stadien, parkplaetze), {}
+        except IntegrityError:
+            # Paralleler Request mit denselben Schlüsseln war schneller - jetzt sind sie vorhanden
+            logger.info(f"🔁 Bulk-Speichern für {benutzer.username}: Schlüssel-Konflikt, neuer Versuch")
+            return RoutenSpeichern._anlegen(benutzer, eintraege, stadien, parkplaetze), {}
+
+    @staticmethod
+    def _anlegen(benutzer, eintraege, stadien, parkplaetze) -> List[Dict[str, Any]]:
+        schluessel = {eintrag["idempotency_key"] for eintrag in eintraege if eintrag.get("idempotency_key")}
+
+        with transaction.atomic():
+            vorhanden = {
+                route.idempotenz_schluessel: route
+                for route in Route.objects.filter(benutzer=benutzer, idempotenz_schluessel__in=schluessel)
+                .only("id", "idempotenz_schluessel", "erstelldatum")
+            } if schluessel else {}
+
+            neue: List[Route] = []
+            zuordnung: List[Tuple[Route, bool]] = []
+            for eintrag in eintraege:
+                key = eintrag.get("idempotency_key") or None
+                if key in vorhanden:
+                    zuordnung.append((vorhanden[key], False))
+                    continue
+                route = Route(
+                    benutzer=benutzer,
+                    stadion=stadien[eintrag["stadion_id"]],
+                    parkplatz=parkplaetze[eintrag["parkplatz_id"]],
+                    start_adresse=eintrag["start_adresse"],
+                    start_latitude=eintrag.get("start_lat"),
+                    start_longitude=eintrag.get("start_lng"),
+                    strecke_km=eintrag.get("distanz_km"),
+                    dauer_minuten=eintrag.get("dauer_min"),
+                    transportmittel=eintrag.get("transportmittel") or "auto",
+                    route_url=eintrag.get("route_url") or None,
+                    idempotenz_schluessel=key,
+                )
+                neue.append(route)
+                zuordnung.append((route, True))
+                if key:
+                    vorhanden[key] = route
+
+            if neue:
+                Route.objects.bulk_create(neue, batch_size=ROUTEN_BULK_MAX)
+                BenutzerStatistiken.neu_berechnen(benutzer.id)
+                RouteRollups.routen_angelegt(neue)
+
+        if neue:
+            logger.info(f"💾 {len(neue)} Routen für {benutzer.username} gespeichert ({len(eintraege) - len(neue)} Duplikate)")
+        return [
+            {
+                "index": index,
+                "route_id": route.id,
+                "idempotency_key": route.idempotenz_schluessel,
+                "created": angelegt,
+                "saved_at": route.erstelldatum.isoformat(),
+            }
+            for index, (route, angelegt) in enumerate(zuordnung)
+        ]
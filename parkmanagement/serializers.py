@@ -1,3 +1,6 @@
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Parkplatz, Route, Stadion, Verein
 from django.contrib.auth.models import User
@@ -56,4 +59,112 @@ class StadionSerializer(serializers.ModelSerializer):
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# Handgeschriebene Lese-Serializer: gleiche Ausgabe wie die ModelSerializer oben,
+# aber ohne Feld-Objekte pro Attribut (messbar bei Listen, siehe benchmark_micro).
+# Für Schreibzugriffe und Validierung bleiben die ModelSerializer zuständig.
+_DEZIMAL_STELLEN = {stellen: Decimal(1).scaleb(-stellen) for stellen in (2, 6)}
+
+
+def _dezimal(wert, stellen):
+    """Wie serializers.DecimalField mit COERCE_DECIMAL_TO_STRING"""
+    if wert is None:
+        return None
+    if not isinstance(wert, Decimal):
+        wert = Decimal(str(wert).strip())
+    return '{:f}'.format(wert.quantize(_DEZIMAL_STELLEN[stellen]))
+
+
+def _zeitpunkt(wert):
+    """Wie serializers.DateTimeField (ISO 8601 in der aktuellen Zeitzone, UTC als Z)"""
+    if wert is None:
+        return None
+    wert = timezone.localtime(wert) if timezone.is_aware(wert) else timezone.make_aware(wert)
+    text = wert.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+class ParkplatzLeseSerializer(serializers.BaseSerializer):
+    def to_representation(self, parkplatz):
+        return {
+            'id': parkplatz.id,
+            'name': parkplatz.name,
+            'adresse': parkplatz.adresse,
+            'kapazitaet': parkplatz.kapazitaet,
+            'frei': parkplatz.frei,
+            'preis_pro_stunde': _dezimal(parkplatz.preis_pro_stunde, 2),
+            'verfuegbar': parkplatz.verfuegbar,
+            'bewertung': _dezimal(parkplatz.bewertung, 2),
+            'oeffnungszeiten': parkplatz.oeffnungszeiten,
+            'schliesszeiten': parkplatz.schliesszeiten,
+            'latitude': _dezimal(parkplatz.latitude, 6),
+            'longitude': _dezimal(parkplatz.longitude, 6),
+            'external_id': parkplatz.external_id,
+            'live_data_json': parkplatz.live_data_json,
+            'live_data_source': parkplatz.live_data_source,
+            'live_data_update': _zeitpunkt(parkplatz.live_data_update),
+            'letztes_update': _zeitpunkt(parkplatz.letztes_update),
+            'stadion': parkplatz.stadion_id,
+        }
+
+
+class RouteLeseSerializer(serializers.BaseSerializer):
+    def to_representation(self, route):
+        return {
+            'id': route.id,
+            'start_adresse': route.start_adresse,
+            'start_latitude': _dezimal(route.start_latitude, 6),
+            'start_longitude': _dezimal(route.start_longitude, 6),
+            'strecke_km': _dezimal(route.strecke_km, 2),
+            'dauer_minuten': route.dauer_minuten,
+            'transportmittel': route.transportmittel,
+            'erstelldatum': _zeitpunkt(route.erstelldatum),
+            'route_url': route.route_url,
+            'idempotenz_schluessel': route.idempotenz_schluessel,
+            'benutzer': route.benutzer_id,
+            'stadion': route.stadion_id,
+            'parkplatz': route.parkplatz_id,
+        }
+
+
+# Schlanke Listen-Darstellung für die Routen-Historie: Stadion- und Parkplatzname
+# kommen aus dem JOIN des QuerySets (select_related), nicht aus einer Abfrage pro Route
+class RouteListSerializer(serializers.BaseSerializer):
+    def to_representation(self, route):
+        return {
+            'id': route.id,
+            'stadion': route.stadion_id,
+            'stadion_name': route.stadion.name,
+            'parkplatz': route.parkplatz_id,
+            'parkplatz_name': route.parkplatz.name if route.parkplatz_id else None,
+            'start_adresse': route.start_adresse,
+            'strecke_km': _dezimal(route.strecke_km, 2),
+            'dauer_minuten': route.dauer_minuten,
+            'transportmittel': route.transportmittel,
+            'erstelldatum': _zeitpunkt(route.erstelldatum),
+            'route_url': route.route_url,
+        }
+
+
+# Vom Client vergebener Schlüssel: nur Strings, Zahlen werden nicht stillschweigend umgewandelt.
+class SchluesselFeld(serializers.CharField):
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return super().to_internal_value(data)
+
+
+# Eine Route im Format von /routen/speichern/ - validiert einzelnes Speichern und die Einträge des Bulk-Speicherns.
+# Koordinaten und Distanz bleiben Gleitkommazahlen; die Modellfelder runden beim Speichern.
+class RouteSpeichernSerializer(serializers.Serializer):
+    stadion_id = serializers.IntegerField()
+    parkplatz_id = serializers.IntegerField()
+    start_adresse = serializers.CharField(max_length=255)
+    start_lat = serializers.FloatField(required=False, allow_null=True, min_value=-90, max_value=90)
+    start_lng = serializers.FloatField(required=False, allow_null=True, min_value=-180, max_value=180)
+    distanz_km = serializers.FloatField(required=False, allow_null=True, min_value=0, max_value=999.99)
+    dauer_min = serializers.IntegerField(required=False, allow_null=True)
+    transportmittel = serializers.CharField(max_length=50, required=False, default='auto')
+    route_url = serializers.URLField(required=False, allow_null=True, allow_blank=True)
+    idempotency_key = SchluesselFeld(max_length=64, required=False, allow_null=True)
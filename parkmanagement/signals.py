@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import BenutzerProfil
+from .catalog import Katalog
+from .models import BenutzerProfil, Parkplatz, Route, Stadion, Verein
+from .route_rollups import RouteRollups, route_werte
+from .user_statistics import BenutzerStatistiken
 
 
 # Jedes Mal, wenn ein neuer Benutzer erstellt wird, wird auch ein Benutzerprofil erstellt.
@@ -14,4 +17,64 @@ def create_user_profile(sender, instance, created, **kwargs):
 # Jedes Mal, wenn ein Benutzer gespeichert wird, wird auch das Benutzerprofil gespeichert.
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profil.save()
\ No newline at end of file
+    instance.profil.save()
+
+# Dashboard-Statistik: neue Routen inkrementell einrechnen,
+# Änderungen und Löschungen führen nach dem Commit zu einer Neuberechnung.
+@receiver(post_save, sender=Route)
+def route_statistik_fortschreiben(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        BenutzerStatistiken.route_hinzugefuegt(instance)
+    else:
+        BenutzerStatistiken.neu_berechnen_nach_commit([instance.benutzer_id])
+
+
+@receiver(post_delete, sender=Route)
+def route_statistik_nach_loeschen(sender, instance, **kwargs):
+    BenutzerStatistiken.neu_berechnen_nach_commit([instance.benutzer_id])
+
+
+# Beim Löschen eines Parkplatzes setzt die DB parkplatz=NULL ohne Route-Signals,
+# daher die betroffenen Benutzer vorher merken.
+@receiver(pre_delete, sender=Parkplatz)
+def parkplatz_statistik_nach_loeschen(sender, instance, **kwargs):
+    benutzer_ids = set(Route.objects.filter(parkplatz=instance).values_list("benutzer_id", flat=True))
+    if benutzer_ids:
+        BenutzerStatistiken.neu_berechnen_nach_commit(benutzer_ids)
+
+
+# Research-Rollups: Stadionbesucher pflegen und nachträgliche Änderungen an
+# bereits eingerechneten Tagen auf die Tages-Rollups übertragen.
+@receiver(pre_save, sender=Route)
+def route_rollup_vorher_merken(sender, instance, raw=False, **kwargs):
+    instance._rollup_vorher = None
+    if instance.pk and not raw:
+        vorher = Route.objects.filter(pk=instance.pk).first()
+        instance._rollup_vorher = route_werte(vorher) if vorher else None
+
+
+@receiver(post_save, sender=Route)
+def route_rollup_fortschreiben(sender, instance, created, raw=False, **kwargs):
+    RouteRollups.besucher_eintragen(instance.stadion_id, instance.benutzer_id)
+    vorher = getattr(instance, "_rollup_vorher", None)
+    RouteRollups.route_geaendert(vorher, route_werte(instance))
+    if vorher and vorher["stadion_id"] != instance.stadion_id:
+        RouteRollups.besucher_pruefen(vorher["stadion_id"], instance.benutzer_id)
+
+
+@receiver(post_delete, sender=Route)
+def route_rollup_nach_loeschen(sender, instance, **kwargs):
+    RouteRollups.route_geaendert(route_werte(instance), None)
+    RouteRollups.besucher_pruefen(instance.stadion_id, instance.benutzer_id)
+
+
+# Stammdaten-Katalog: jede Änderung an Vereinen, Stadien oder Parkplätzen
+# setzt nach dem Commit einen neuen Versionsstempel für alle Worker.
+@receiver(post_save, sender=Verein)
+@receiver(post_save, sender=Stadion)
+@receiver(post_save, sender=Parkplatz)
+@receiver(post_delete, sender=Verein)
+@receiver(post_delete, sender=Stadion)
+@receiver(post_delete, sender=Parkplatz)
+def katalog_geaendert(sender, **kwargs):
+    Katalog.geaendert()
@@ -0,0 +1,284 @@
+# parkmanagement/streaming_export.py
+
+import csv
+import logging
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Route, Stadion
+from .performance_store import performance_store
+
+logger = logging.getLogger(__name__)
+
+# Optionale Spaltenformate (Parquet / Arrow IPC) - CSV funktioniert immer
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_CHUNK_SIZE = 5000  # Zeilen pro DB-Fetch und pro CSV-Block / Record-Batch
+
+FORMATE = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Spalten pro Datensatz: (Name, Typ) mit Typ in int / float / str / bool / timestamp.
+# Routen ohne Benutzer und Startadresse (anonymisiert wie research_data_export)
+SPALTEN: Dict[str, List[Tuple[str, str]]] = {
+    "routes": [
+        ("route_id", "int"),
+        ("erstelldatum", "timestamp"),
+        ("stadion_id", "int"),
+        ("stadion", "str"),
+        ("parkplatz_id", "int"),
+        ("parkplatz", "str"),
+        ("transportmittel", "str"),
+        ("dauer_minuten", "int"),
+        ("strecke_km", "float"),
+    ],
+    "sessions": [
+        ("session_name", "str"),
+        ("start", "timestamp"),
+        ("total_duration", "float"),
+        ("stadium", "str"),
+        ("parking_count", "int"),
+        ("optimization_mode", "str"),
+        ("operations", "int"),
+        ("failed_operations", "int"),
+        ("dropped_operations", "int"),
+        ("trace_id", "str"),
+        ("pid", "int"),
+    ],
+    "operations": [
+        ("session_name", "str"),
+        ("session_start", "timestamp"),
+        ("operation", "str"),
+        ("start", "timestamp"),
+        ("offset", "float"),
+        ("duration", "float"),
+        ("success", "bool"),
+        ("error", "str"),
+        ("stadium", "str"),
+        ("trace_id", "str"),
+    ],
+}
+
+
+def _zeitpunkt(wert: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(wert, tz=dt_timezone.utc) if wert is not None else None
+
+
+def _routen_zeilen(since: Optional[float], until: Optional[float], stadion: Optional[Stadion],
+                   chunk_size: int) -> Iterator[tuple]:
+    """Routen chronologisch; ``iterator()`` nutzt auf PostgreSQL einen serverseitigen Cursor"""
+    routen = Route.objects.order_by("erstelldatum", "id")
+    if since is not None:
+        routen = routen.filter(erstelldatum__gte=_zeitpunkt(since))
+    if until is not None:
+        routen = routen.filter(erstelldatum__lt=_zeitpunkt(until))
+    if stadion is not None:
+        routen = routen.filter(stadion=stadion)
+
+    for *werte, strecke_km in routen.values_list(
+        "id", "erstelldatum", "stadion_id", "stadion__name", "parkplatz_id", "parkplatz__name",
+        "transportmittel", "dauer_minuten", "strecke_km",
+    ).iterator(chunk_size=chunk_size):
+        yield (*werte, float(strecke_km) if strecke_km is not None else None)
+
+
+def _session_records(since: Optional[float], until: Optional[float],
+                     stadion: Optional[Stadion]) -> Iterator[Dict[str, Any]]:
+    """Session-Records aller Worker aus dem Store, Segment für Segment gelesen"""
+    for record in performance_store.read(["session"], since, until):
+        session = record.get("data", {})
+        if stadion is not None and session.get("context", {}).get("stadium") != stadion.name:
+            continue
+        yield record
+
+
+def _session_zeilen(since: Optional[float], until: Optional[float], stadion: Optional[Stadion],
+                    chunk_size: int) -> Iterator[tuple]:
+    for record in _session_records(since, until, stadion):
+        session = record["data"]
+        context = session.get("context", {})
+        operationen = session.get("operations", [])
+        yield (
+            session.get("session_name"),
+            _zeitpunkt(session.get("start_time")),
+            session.get("total_duration"),
+            context.get("stadium"),
+            context.get("parking_count"),
+            context.get("optimization_mode"),
+            len(operationen),
+            sum(1 for op in operationen if not op.get("success", True)),
+            session.get("dropped_operations", 0),
+            session.get("trace_id"),
+            record.get("pid"),
+        )
+
+
+def _operation_zeilen(since: Optional[float], until: Optional[float], stadion: Optional[Stadion],
+                      chunk_size: int) -> Iterator[tuple]:
+    for record in _session_records(since, until, stadion):
+        session = record["data"]
+        session_start = session.get("start_time")
+        for op in session.get("operations", []):
+            start = op.get("start_time")
+            yield (
+                session.get("session_name"),
+                _zeitpunkt(session_start),
+                op.get("operation"),
+                _zeitpunkt(start),
+                start - session_start if start is not None and session_start is not None else None,
+                op.get("duration"),
+                op.get("success"),
+                op.get("error"),
+                session.get("context", {}).get("stadium"),
+                session.get("trace_id"),
+            )
+
+
+_ZEILEN = {
+    "routes": _routen_zeilen,
+    "sessions": _session_zeilen,
+    "operations": _operation_zeilen,
+}
+
+
+def _bloecke(zeilen: Iterable[tuple], groesse: int) -> Iterator[List[tuple]]:
+    zeilen = iter(zeilen)
+    while True:
+        block = list(islice(zeilen, groesse))
+        if not block:
+            return
+        yield block
+
+
+class _CsvZeile:
+    """Pseudo-Datei für csv.writer: ``write`` liefert die Zeile zurück, statt sie zu puffern"""
+
+    def write(self, wert: str) -> str:
+        return wert
+
+
+class _ByteSenke:
+    """
+    Beschreibbare Senke für pyarrow-Writer: sammelt die geschriebenen Bytes
+    nur bis zum nächsten ``abholen()`` - der Speicherbedarf bleibt bei einem Batch.
+    """
+
+    def __init__(self):
+        self._teile: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, daten) -> int:
+        daten = bytes(daten)
+        self._teile.append(daten)
+        self._position += len(daten)
+        return len(daten)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def abholen(self) -> bytes:
+        daten = b"".join(self._teile)
+        self._teile = []
+        return daten
+
+
+class StreamingExport:
+    """
+    Export großer Zeiträume als Stream statt als eine JSON-Antwort:
+    Zeilen werden blockweise gelesen (DB-Cursor bzw. Store-Segmente) und
+    sofort als CSV-Block oder Record-Batch (Parquet / Arrow IPC) ausgegeben.
+    """
+
+    @staticmethod
+    def pruefen(dataset: str, format: str):
+        """
+        Raises:
+            ValueError: bei unbekanntem Datensatz/Format oder fehlendem pyarrow
+        """
+        if dataset not in SPALTEN:
+            raise ValueError(f"Unbekannter Datensatz '{dataset}' (erlaubt: {', '.join(SPALTEN)})")
+        if format not in FORMATE:
+            raise ValueError(f"Unbekanntes Format '{format}' (erlaubt: {', '.join(FORMATE)})")
+        if format != "csv" and not PYARROW_AVAILABLE:
+            raise ValueError(f"Format '{format}' benötigt pyarrow (pip install pyarrow)")
+
+    @staticmethod
+    def content_type(format: str) -> str:
+        return FORMATE[format][0]
+
+    @staticmethod
+    def dateiname(dataset: str, format: str) -> str:
+        return f"matchroute_{dataset}_{datetime.now():%Y%m%d_%H%M%S}.{FORMATE[format][1]}"
+
+    @staticmethod
+    def stream(dataset: str, format: str, since: Optional[float] = None, until: Optional[float] = None,
+               stadion: Optional[Stadion] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Erzeugt den Export als Folge von Byte-Blöcken (vorher ``pruefen`` aufrufen)"""
+        zeilen = _ZEILEN[dataset](since, until, stadion, chunk_size)
+        bloecke = _bloecke(zeilen, chunk_size)
+        if format == "csv":
+            return StreamingExport._csv(SPALTEN[dataset], bloecke)
+        return StreamingExport._arrow(SPALTEN[dataset], bloecke, format)
+
+    @staticmethod
+    def _csv(spalten: List[Tuple[str, str]], bloecke: Iterator[List[tuple]]) -> Iterator[bytes]:
+        writer = csv.writer(_CsvZeile())
+        yield writer.writerow([name for name, _ in spalten]).encode("utf-8")
+        anzahl = 0
+        for block in bloecke:
+            anzahl += len(block)
+            yield "".join(
+                writer.writerow([wert.isoformat() if isinstance(wert, datetime) else wert for wert in zeile])
+                for zeile in block
+            ).encode("utf-8")
+        logger.info(f"📤 Streaming-Export (csv): {anzahl} Zeilen")
+
+    @staticmethod
+    def _arrow(spalten: List[Tuple[str, str]], bloecke: Iterator[List[tuple]], format: str) -> Iterator[bytes]:
+        typen = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "str": pa.string(),
+            "bool": pa.bool_(),
+            "timestamp": pa.timestamp("us", tz="UTC"),
+        }
+        schema = pa.schema([(name, typen[typ]) for name, typ in spalten])
+        senke = _ByteSenke()
+        datei = pa.PythonFile(senke, mode="w")
+        if format == "parquet":
+            writer = pq.ParquetWriter(datei, schema)
+        else:
+            writer = pa.ipc.new_stream(datei, schema)
+
+        anzahl = 0
+        try:
+            for block in bloecke:
+                anzahl += len(block)
+                spaltenwerte = list(zip(*block))
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(werte, type=feld.type) for werte, feld in zip(spaltenwerte, schema)],
+                    schema=schema,
+                ))
+                # Parquet: jeder Batch ist eine abgeschlossene Row-Group
+                yield senke.abholen()
+        finally:
+            writer.close()
+        yield senke.abholen()
+        logger.info(f"📤 Streaming-Export ({format}): {anzahl} Zeilen")
@@ -0,0 +1,131 @@
+# parkmanagement/suggestion_payload.py
+
+import random
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from django.utils import timezone
+
+from .models import RoutenVorschlagDetail
+
+VORSCHLAG_DETAIL_TIMEOUT = 600  # 10 Minuten sind die vollständigen Vorschläge abrufbar
+
+# Anteil der Requests, die abgelaufene Vorschläge mit aufräumen (per Index auf ``erstellt``)
+VORSCHLAG_AUFRAEUMEN_ANTEIL = 0.01
+
+ANSICHTEN = ("full", "compact")
+
+# Schwere Teile eines Vorschlags, die im kompakten Modus entfallen (per include=... wieder dabei)
+SCHWERE_FELDER = {
+    "polylines": ("polyline_auto", "polyline_transit", "polyline_walking"),
+    "navigation": ("navigation_links", "walking_navigation"),
+    "live_data": ("live_parking_data",),
+}
+
+# Live-Daten, die auch kompakt bleiben: Belegung und Aktualität für die Listenansicht
+KOMPAKTE_LIVE_FELDER = ("frei", "capacity", "occupancy", "freshness", "last_update", "type", "parkeinrichtung")
+
+
+class VorschlagAuswahl:
+    """
+    Welche Teile der Routenvorschläge eine Antwort enthält.
+
+    ``fields`` beschränkt jeden Vorschlag auf die genannten Schlüssel
+    (``parkplatz`` ist immer dabei). ``view=compact`` lässt bei den weiteren
+    Parkplätzen Polylines, Navigationslinks und die vollständigen Live-Daten
+    weg; ``include`` nimmt einzelne Gruppen wieder auf. Der empfohlene
+    Parkplatz bleibt ohne ``fields`` vollständig, da er sofort auf der Karte
+    erscheint.
+    """
+
+    def __init__(self, ansicht: str = "full", felder: Optional[FrozenSet[str]] = None,
+                 include: FrozenSet[str] = frozenset()):
+        self.ansicht = ansicht
+        self.felder = felder
+        self.include = include
+
+    @staticmethod
+    def aus_query_params(params) -> "VorschlagAuswahl":
+        """
+        Raises:
+            ValueError: bei unbekannter Ansicht oder include-Gruppe
+        """
+        ansicht = params.get("view") or "full"
+        if ansicht not in ANSICHTEN:
+            raise ValueError(f"Unbekannte Ansicht '{ansicht}' (erlaubt: {', '.join(ANSICHTEN)})")
+
+        include = frozenset(teil.strip() for teil in (params.get("include") or "").split(",") if teil.strip())
+        unbekannt = include - set(SCHWERE_FELDER)
+        if unbekannt:
+            raise ValueError(
+                f"Unbekannte include-Gruppe '{', '.join(sorted(unbekannt))}' (erlaubt: {', '.join(SCHWERE_FELDER)})"
+            )
+
+        felder = None
+        if params.get("fields"):
+            felder = frozenset(teil.strip() for teil in params["fields"].split(",") if teil.strip()) | {"parkplatz"}
+        return VorschlagAuswahl(ansicht, felder, include)
+
+    @property
+    def vollstaendig(self) -> bool:
+        return self.ansicht == "full" and self.felder is None
+
+    def anwenden(self, vorschlag: Dict[str, Any], empfohlen: bool = False) -> Dict[str, Any]:
+        if self.felder is not None:
+            vorschlag = {k: v for k, v in vorschlag.items() if k in self.felder}
+        if self.ansicht != "compact" or (empfohlen and self.felder is None):
+            return vorschlag
+
+        weglassen = {
+            feld for gruppe, felder in SCHWERE_FELDER.items() if gruppe not in self.include for feld in felder
+        }
+        kompakt = {k: v for k, v in vorschlag.items() if k not in weglassen}
+        live_data = vorschlag.get("live_parking_data")
+        if "live_parking_data" in weglassen and live_data:
+            kompakt["live_parking_data"] = {k: live_data[k] for k in KOMPAKTE_LIVE_FELDER if k in live_data}
+        return kompakt
+
+
+class VorschlagDetails:
+    """
+    Vollständige Vorschläge einer gekürzten Antwort, abrufbar pro Parkplatz
+    über ``routen-vorschlag/<vorschlag_id>/<parkplatz_id>/``. Alle Vorschläge
+    einer Antwort liegen als eine Zeile in ``RoutenVorschlagDetail`` und sind
+    damit für alle Worker sichtbar. Abgelaufene Zeilen räumt nur ein kleiner
+    Teil der Requests weg; ``abrufen`` prüft das Alter selbst.
+    """
+
+    @staticmethod
+    def ablegen(benutzer_id: int, vorschlaege: List[Dict[str, Any]]) -> str:
+        vorschlag_id = uuid.uuid4().hex
+        RoutenVorschlagDetail.objects.create(
+            vorschlag_id=vorschlag_id,
+            benutzer_id=benutzer_id,
+            vorschlaege={str(vorschlag["parkplatz"]["id"]): vorschlag for vorschlag in vorschlaege},
+        )
+        if random.random() < VORSCHLAG_AUFRAEUMEN_ANTEIL:
+            VorschlagDetails.aufraeumen()
+        return vorschlag_id
+
+    @staticmethod
+    def abrufen(vorschlag_id: str, parkplatz_id: int, benutzer_id: int) -> Optional[Dict[str, Any]]:
+        """Vollständiger Vorschlag für den Besitzer oder None, falls unbekannt/abgelaufen"""
+        vorschlaege = (
+            RoutenVorschlagDetail.objects.filter(
+                vorschlag_id=vorschlag_id,
+                benutzer_id=benutzer_id,
+                erstellt__gte=timezone.now() - timedelta(seconds=VORSCHLAG_DETAIL_TIMEOUT),
+            )
+            .values_list("vorschlaege", flat=True)
+            .first()
+        )
+        return vorschlaege.get(str(parkplatz_id)) if vorschlaege else None
+
+    @staticmethod
+    def aufraeumen() -> int:
+        """Löscht abgelaufene Vorschläge, liefert die Anzahl"""
+        geloescht, _ = RoutenVorschlagDetail.objects.filter(
+            erstellt__lt=timezone.now() - timedelta(seconds=VORSCHLAG_DETAIL_TIMEOUT)
+        ).delete()
+        return geloescht
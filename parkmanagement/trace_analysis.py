@@ -0,0 +1,416 @@
+# parkmanagement/trace_analysis.py
+
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .tracing import SPAN_KIND_CLIENT, Span
+
+# Fallback-Dauer eines Cache-Treffers, wenn keine Cache-Spans gemessen wurden
+DEFAULT_CACHE_LOOKUP_SEKUNDEN = 0.001
+
+# Toleranz beim Vergleich von Span-Grenzen (Uhr-Auflösung)
+EPSILON_SEKUNDEN = 1e-4
+
+SKALIERUNG_PARKPLATZ_ANZAHLEN = [5, 10, 15, 20, 50]
+
+# Obergrenzen der What-if Parameter (Fan-out wie ROUTEN_BULK_MAX)
+SIMULATION_MAX_FANOUT = 500
+SIMULATION_MAX_CONCURRENCY = 500
+
+
+class SpanNode:
+    """Span mit Kindern für die Analyse des Trace-Baums"""
+
+    __slots__ = ("span", "children", "start", "end")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.children: List["SpanNode"] = []
+        self.start = span.start_ns / 1e9
+        self.end = (span.end_ns or span.start_ns) / 1e9
+
+    @property
+    def name(self) -> str:
+        return self.span.name
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def attached_children(self) -> List["SpanNode"]:
+        """Kinder, die vor dem Ende des Parents abgeschlossen wurden (ohne Hintergrund-Jobs)"""
+        return [c for c in self.children if c.end <= self.end + EPSILON_SEKUNDEN]
+
+
+def build_span_tree(spans: Iterable[Span]) -> Optional[SpanNode]:
+    """Baut den Span-Baum eines Traces; Wurzel ist der längste Root-Span"""
+    nodes = {span.span_id: SpanNode(span) for span in spans}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.span.parent_span_id)
+        (parent.children if parent else roots).append(node)
+    for node in nodes.values():
+        node.children.sort(key=lambda c: c.start)
+    return max(roots, key=lambda n: n.duration) if roots else None
+
+
+def _union(intervals: Iterable) -> float:
+    """Gesamtlänge der Vereinigung von (start, end)-Intervallen"""
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def _walk(node: SpanNode):
+    yield node
+    for child in node.children:
+        yield from _walk(child)
+
+
+# -- Gemessene Kennzahlen ------------------------------------------------------
+
+def critical_path(root: SpanNode) -> List[Dict[str, Any]]:
+    """
+    Kritischer Pfad: rückwärts vom Ende des Root-Spans jeweils das zuletzt
+    endende Kind verfolgen. Die ``self_time`` aller Segmente summiert sich zur
+    Wanduhrzeit des Requests - jede Sekunde ist genau einer Operation zugeordnet.
+    """
+    path = []
+
+    def visit(node: SpanNode, end: float, depth: int):
+        segment = {
+            "name": node.name,
+            "span_id": node.span.span_id,
+            "depth": depth,
+            "start_offset": round(node.start - root.start, 4),
+            "duration": round(node.duration, 4),
+            "self_time": 0.0,
+        }
+        path.append(segment)
+
+        cursor = end
+        children = [c for c in node.attached_children() if c.start < cursor]
+        while children:
+            last = max(children, key=lambda c: min(c.end, cursor))
+            last_end = min(last.end, cursor)
+            segment["self_time"] += cursor - last_end
+            visit(last, last_end, depth + 1)
+            cursor = last.start
+            children = [c for c in children if c is not last and c.start < cursor]
+        segment["self_time"] += max(0.0, cursor - node.start)
+        segment["self_time"] = round(segment["self_time"], 4)
+
+    visit(root, root.end, 0)
+    return sorted(path, key=lambda s: (s["start_offset"], s["depth"]))
+
+
+def critical_path_by_operation(path: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Zeit auf dem kritischen Pfad pro Operation (absteigend)"""
+    totals = defaultdict(float)
+    for segment in path:
+        totals[segment["name"]] += segment["self_time"]
+    return {name: round(t, 4) for name, t in sorted(totals.items(), key=lambda x: x[1], reverse=True) if t > 0}
+
+
+def measured_overlap(root: SpanNode) -> List[Dict[str, Any]]:
+    """Tatsächliche Parallelität pro Span: Summe der Kind-Dauern vs. belegte Wanduhrzeit"""
+    overlaps = []
+    for node in _walk(root):
+        children = node.attached_children()
+        if len(children) < 2:
+            continue
+        busy = sum(c.duration for c in children)
+        wall = _union((c.start, c.end) for c in children)
+        if wall <= 0:
+            continue
+        overlaps.append({
+            "name": node.name,
+            "children": len(children),
+            "sum_child_time": round(busy, 4),
+            "wall_time": round(wall, 4),
+            "parallelism": round(busy / wall, 2),
+            "overlap_saved": round(busy - wall, 4),
+        })
+    return sorted(overlaps, key=lambda o: o["overlap_saved"], reverse=True)
+
+
+def cache_hit_rates(traces: Iterable[Iterable[Span]]) -> Dict[str, Dict[str, Any]]:
+    """Gemessene Hit-Raten und Lookup-Zeiten pro Cache aus den ``cache.get`` Spans"""
+    stats = defaultdict(lambda: {"lookups": 0, "hits": 0, "lookup_time": 0.0})
+    for spans in traces:
+        for span in spans:
+            cache_name = span.attributes.get("cache.name")
+            if cache_name is None or span.end_ns is None:
+                continue
+            entry = stats[cache_name]
+            entry["lookups"] += 1
+            entry["hits"] += 1 if span.attributes.get("cache.hit") else 0
+            entry["lookup_time"] += (span.end_ns - span.start_ns) / 1e9
+
+    return {
+        name: {
+            "lookups": entry["lookups"],
+            "hits": entry["hits"],
+            "hit_rate": round(entry["hits"] / entry["lookups"], 3),
+            "avg_lookup_time": entry["lookup_time"] / entry["lookups"],
+        }
+        for name, entry in stats.items()
+    }
+
+
+def upstream_repeat_rates(traces: Iterable[Iterable[Span]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Anteil der Upstream-Calls, deren Anfrage (``upstream.request_key``) in den
+    betrachteten Traces bereits vorher gestellt wurde - die Hit-Rate, die ein
+    Cache für diese API tatsächlich erreichen würde.
+    """
+    calls = []
+    for spans in traces:
+        for span in spans:
+            key = span.attributes.get("upstream.request_key")
+            if span.kind == SPAN_KIND_CLIENT and key:
+                calls.append((span.start_ns, span.attributes.get("upstream.api"),
+                              span.attributes.get("upstream.mode"), key))
+
+    seen = set()
+    stats = defaultdict(lambda: {"calls": 0, "repeats": 0})
+    for _, api, mode, key in sorted(calls, key=lambda c: c[0]):
+        stats[api]["calls"] += 1
+        if (api, mode, key) in seen:
+            stats[api]["repeats"] += 1
+        seen.add((api, mode, key))
+
+    return {
+        api: {**entry, "repeat_rate": round(entry["repeats"] / entry["calls"], 3)}
+        for api, entry in stats.items()
+    }
+
+
+# -- What-if Simulation --------------------------------------------------------
+
+def _upstream_api(node: SpanNode) -> Optional[str]:
+    if node.span.kind == SPAN_KIND_CLIENT:
+        return node.span.attributes.get("upstream.api")
+    return None
+
+
+def _upstream_signature(node: SpanNode):
+    """(api, mode) des einzigen Upstream-Calls unter diesem Span, sonst None"""
+    api = _upstream_api(node)
+    if api:
+        return api, node.span.attributes.get("upstream.mode")
+    children = node.attached_children()
+    if len(children) == 1:
+        return _upstream_signature(children[0])
+    return None
+
+
+def _phases(children: List[SpanNode], parallelize_siblings: bool) -> List[Dict[str, Any]]:
+    """
+    Gruppiert Geschwister-Spans in Phasen: überlappende Spans liefen
+    nebenläufig, aufeinanderfolgende gleichnamige Spans bilden eine Serie
+    (z.B. die sequenzielle Berechnung pro Parkplatz).
+    """
+    groups = []
+    group_end = None
+    for child in children:
+        if groups and child.start < group_end - EPSILON_SEKUNDEN:
+            groups[-1]["nodes"].append(child)
+            groups[-1]["overlapping"] = True
+            group_end = max(group_end, child.end)
+        else:
+            groups.append({"nodes": [child], "overlapping": False})
+            group_end = child.end
+
+    merged = []
+    for group in groups:
+        previous = merged[-1] if merged else None
+        if (previous and not previous["overlapping"] and not group["overlapping"]
+                and previous["nodes"][0].name == group["nodes"][0].name):
+            previous["nodes"].append(group["nodes"][0])
+        else:
+            merged.append(group)
+
+    for group in merged:
+        serie = not group["overlapping"] and len(group["nodes"]) > 1
+        group["concurrent"] = group["overlapping"] or (serie and parallelize_siblings)
+    return merged
+
+
+def _makespan(tasks: List[tuple], concurrency: Optional[int]) -> float:
+    """
+    Gesamtdauer von (Start-Offset, Dauer)-Aufgaben bei höchstens ``concurrency``
+    gleichzeitigen Aufgaben (Listen-Scheduling in Startreihenfolge).
+    """
+    if not tasks:
+        return 0.0
+    tasks = sorted(tasks)
+    if concurrency is None or concurrency >= len(tasks):
+        return max(offset + duration for offset, duration in tasks)
+    workers = [0.0] * max(1, concurrency)
+    ende = 0.0
+    for offset, duration in tasks:
+        start = max(offset, heapq.heappop(workers))
+        heapq.heappush(workers, start + duration)
+        ende = max(ende, start + duration)
+    return ende
+
+
+def simulate(
+    root: SpanNode,
+    concurrency: Optional[int] = None,
+    cache_hit_rate: Union[None, float, Dict[str, float]] = None,
+    batching: bool = False,
+    parallelize_siblings: bool = False,
+    fanout: Optional[int] = None,
+    cache_lookup_sekunden: float = DEFAULT_CACHE_LOOKUP_SEKUNDEN,
+) -> float:
+    """
+    Spielt einen aufgezeichneten Span-Baum unter anderen Einstellungen ab.
+
+    Args:
+        concurrency: max. gleichzeitige Geschwister-Spans (None = wie gemessen, 1 = seriell)
+        cache_hit_rate: Hit-Rate für Upstream-Calls, global oder pro API
+        batching: gleichartige Upstream-Calls einer Phase als ein Batch-Request
+            (Dauer = langsamster Einzel-Call)
+        parallelize_siblings: gleichnamige, seriell gelaufene Geschwister nebenläufig ausführen
+        fanout: Serien/Batches gleichnamiger Spans auf diese Anzahl skalieren
+            (Dauern werden zyklisch wiederverwendet)
+    Returns:
+        Simulierte Dauer des Root-Spans in Sekunden
+    Raises:
+        ValueError: fanout oder concurrency über den Obergrenzen
+    """
+    if fanout is not None and fanout > SIMULATION_MAX_FANOUT:
+        raise ValueError(f"fanout höchstens {SIMULATION_MAX_FANOUT}")
+    if concurrency is not None and concurrency > SIMULATION_MAX_CONCURRENCY:
+        raise ValueError(f"concurrency höchstens {SIMULATION_MAX_CONCURRENCY}")
+
+    memo: Dict[int, float] = {}
+
+    def hit_rate(api: str) -> float:
+        if isinstance(cache_hit_rate, dict):
+            return cache_hit_rate.get(api, 0.0)
+        return cache_hit_rate or 0.0
+
+    def replay(node: SpanNode) -> float:
+        key = id(node)
+        if key in memo:
+            return memo[key]
+
+        api = _upstream_api(node)
+        if api:
+            rate = hit_rate(api)
+            result = (1 - rate) * node.duration + rate * min(cache_lookup_sekunden, node.duration)
+        else:
+            children = node.attached_children()
+            self_time = max(0.0, node.duration - _union((c.start, c.end) for c in children))
+            result = self_time + sum(replay_group(g) for g in _phases(children, parallelize_siblings))
+
+        memo[key] = result
+        return result
+
+    def replay_group(group: Dict[str, Any]) -> float:
+        nodes = group["nodes"]
+        if fanout and len(nodes) > 1 and len({n.name for n in nodes}) == 1:
+            nodes = [nodes[i % len(nodes)] for i in range(fanout)]
+
+        # Gemessene Start-Offsets bleiben erhalten; parallelisierte Serien starten gemeinsam
+        group_start = nodes[0].start
+        tasks = [
+            (n.start - group_start if group["overlapping"] else 0.0, replay(n), _upstream_signature(n))
+            for n in nodes
+        ]
+
+        if batching:
+            batched = defaultdict(list)
+            remaining = []
+            for task in tasks:
+                (batched[task[2]] if task[2] else remaining).append(task)
+            tasks = remaining + [
+                (min(t[0] for t in batch), max(t[1] for t in batch), signature)
+                for signature, batch in batched.items()
+            ]
+
+        if len(tasks) == 1:
+            return tasks[0][1]
+        if not group["concurrent"]:
+            return sum(t[1] for t in tasks)
+        return _makespan([(offset, duration) for offset, duration, _ in tasks], concurrency)
+
+    return replay(root)
+
+
+# -- Gesamtauswertung -----------------------------------------------------------
+
+def analysiere_trace(spans: List[Span], vergleichs_traces: Iterable[List[Span]] = ()) -> Optional[Dict[str, Any]]:
+    """
+    Vollständige Analyse eines Request-Traces.
+
+    Hit- und Wiederholungsraten werden über ``vergleichs_traces`` (z.B. den
+    Ring-Buffer des Tracers) gemessen, Optimierungspotenziale per Replay des
+    Span-Baums simuliert statt mit festen Faktoren geschätzt.
+    """
+    root = build_span_tree(spans)
+    if root is None:
+        return None
+
+    vergleichs_traces = list(vergleichs_traces) or [spans]
+    caches = cache_hit_rates(vergleichs_traces)
+    repeats = upstream_repeat_rates(vergleichs_traces)
+    repeat_rates = {api: entry["repeat_rate"] for api, entry in repeats.items()}
+    lookup_times = [entry["avg_lookup_time"] for entry in caches.values()]
+    lookup_time = sum(lookup_times) / len(lookup_times) if lookup_times else DEFAULT_CACHE_LOOKUP_SEKUNDEN
+
+    path = critical_path(root)
+    szenarien = {
+        "replay_baseline": simulate(root),
+        "sequential": simulate(root, concurrency=1),
+        "with_parallelization": simulate(root, parallelize_siblings=True),
+        "with_caching": simulate(root, cache_hit_rate=repeat_rates, cache_lookup_sekunden=lookup_time),
+        "with_batch_apis": simulate(root, batching=True),
+        "with_full_optimization": simulate(
+            root, cache_hit_rate=repeat_rates, batching=True, parallelize_siblings=True,
+            cache_lookup_sekunden=lookup_time,
+        ),
+    }
+
+    return {
+        "trace_id": root.span.trace_id,
+        "measured_duration": round(root.duration, 4),
+        "critical_path": path,
+        "critical_path_by_operation": critical_path_by_operation(path),
+        "measured_overlap": measured_overlap(root),
+        "cache_hit_rates": caches,
+        "upstream_repeat_rates": repeats,
+        "what_if": {name: round(value, 3) for name, value in szenarien.items()},
+        "scalability_projection": project_scalability(root, repeat_rates, lookup_time),
+    }
+
+
+def project_scalability(root: SpanNode, repeat_rates: Dict[str, float] = None,
+                        cache_lookup_sekunden: float = DEFAULT_CACHE_LOOKUP_SEKUNDEN) -> Dict[str, Any]:
+    """Simulierte Antwortzeiten für andere Parkplatz-Anzahlen (Replay mit skaliertem Fan-out)"""
+    projections = {}
+    for count in SKALIERUNG_PARKPLATZ_ANZAHLEN:
+        optimized = simulate(
+            root, fanout=count, cache_hit_rate=repeat_rates, batching=True, parallelize_siblings=True,
+            cache_lookup_sekunden=cache_lookup_sekunden,
+        )
+        projections[f"{count}_parkplaetze"] = {
+            "sequential": round(simulate(root, fanout=count, concurrency=1), 2),
+            "current": round(simulate(root, fanout=count), 2),
+            "with_full_optimization": round(optimized, 2),
+            "usability": "good" if optimized < 5 else "acceptable" if optimized < 10 else "poor",
+        }
+    return projections
@@ -0,0 +1,342 @@
+# parkmanagement/tracing.py
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import requests
+from django.conf import settings
+
+from .performance_store import performance_store
+
+logger = logging.getLogger(__name__)
+
+# Tracing-Konfiguration
+TRACE_BUFFER_SIZE = 100  # Zuletzt abgeschlossene Traces im Speicher (Ring-Buffer)
+MAX_SPANS_PER_TRACE = 1000
+EXPORT_QUEUE_SIZE = 10000  # Bei voller Queue werden Spans verworfen statt Requests zu blockieren
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL = 2.0  # Sekunden zwischen zwei Export-Batches
+
+SERVICE_NAME = "matchroute"
+
+# OTLP Span-Kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP Status-Codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Aktiver Span pro Kontext - asyncio-Tasks und submit_with_context erben ihn als Parent
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("tracing_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """Einzelner Abschnitt eines Traces (OTLP-kompatibel)"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "kind",
+                 "start_ns", "end_ns", "attributes", "status_code", "status_message", "recorded")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Dict[str, Any] = None, recorded: bool = True):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status_code = STATUS_OK
+        self.status_message = None
+        # Nur aufgezeichnete Traces landen in Ring-Buffer, Store und Export
+        self.recorded = recorded
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: Exception):
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)
+        self.attributes["exception.type"] = type(error).__name__
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Dauer in Sekunden (None solange der Span läuft)"""
+        return (self.end_ns - self.start_ns) / 1e9 if self.end_ns else None
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """Verpackt Spans als OTLP/JSON ``ExportTraceServiceRequest``"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({
+                "service.name": SERVICE_NAME,
+                "process.pid": os.getpid(),
+            })},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class OTLPJsonExporter:
+    """
+    Hintergrund-Export abgeschlossener Spans als OTLP/JSON.
+
+    ``TRACING_EXPORT_FILE``: eine JSON-Zeile pro Batch (Format des File-Exporters
+    des OpenTelemetry Collectors). ``TRACING_OTLP_ENDPOINT``: POST an einen
+    Collector (z.B. ``http://localhost:4318/v1/traces``). Der Request-Pfad legt
+    Spans nur in eine Queue.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dropped_spans = 0
+
+    @staticmethod
+    def _targets():
+        return getattr(settings, "TRACING_EXPORT_FILE", None), getattr(settings, "TRACING_OTLP_ENDPOINT", None)
+
+    def submit(self, span: Span):
+        export_file, endpoint = self._targets()
+        if not export_file and not endpoint:
+            return
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped_spans += 1
+            return
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _export_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + EXPORT_INTERVAL
+            while len(batch) < EXPORT_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.export(batch)
+
+    def export(self, spans: List[Span]):
+        """Schreibt einen Batch in Datei und/oder Collector (Fehler werden nur geloggt)"""
+        export_file, endpoint = self._targets()
+        payload = otlp_payload(spans)
+
+        if export_file:
+            try:
+                with open(export_file, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(payload) + "\n")
+            except OSError as e:
+                logger.error(f"❌ Trace-Export in {export_file} fehlgeschlagen: {e}")
+
+        if endpoint:
+            try:
+                requests.post(endpoint, json=payload, timeout=5).raise_for_status()
+            except requests.RequestException as e:
+                logger.error(f"❌ Trace-Export an {endpoint} fehlgeschlagen: {e}")
+
+
+class Tracer:
+    """
+    Hierarchisches Tracing für die Request-Pipeline.
+
+    Spans liegen in einer ContextVar; verschachtelte ``start_span``-Aufrufe
+    bilden den Baum (View → Batch → einzelner HTTP-Call). Abgeschlossene
+    Traces werden im Ring-Buffer gehalten und asynchron exportiert.
+
+    Aufgezeichnet werden nur Traces, deren Root ein Request-Span
+    (``SPAN_KIND_SERVER``) ist oder mit ``record=True`` geöffnet wurde.
+    Hintergrundarbeit (Wetter-Refresh, Kommentar-Pool, Metriken) verdrängt
+    damit keine Request-Traces aus dem Ring-Buffer.
+    """
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.exporter = OTLPJsonExporter()
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, "TRACING_ENABLED", True)
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Dict[str, Any] = None, kind: int = SPAN_KIND_INTERNAL,
+                   trace_id: Optional[str] = None, parent_span_id: Optional[str] = None, record: bool = False):
+        """
+        Öffnet einen Span als Kind des aktuellen Spans (oder als neuen Trace).
+
+        ``trace_id``/``parent_span_id`` übernehmen einen eingehenden W3C
+        ``traceparent``, wenn es noch keinen aktiven Span gibt. Ein neuer
+        Trace wird nur als Request-Span oder mit ``record=True`` aufgezeichnet.
+        """
+        if not self.enabled():
+            yield None
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+            recorded = parent.recorded
+        else:
+            recorded = record or kind == SPAN_KIND_SERVER
+        span = Span(name, trace_id or secrets.token_hex(16), parent_span_id, kind, attributes, recorded)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Span wurde in einem anderen Kontext geöffnet (z.B. asyncio-Task)
+                _current_span.set(parent)
+            if span.recorded:
+                self._finish(span)
+                if parent is None:
+                    # Lokaler Root-Span beendet - Trace dauerhaft ablegen
+                    spans = self.get_trace(span.trace_id) or [span]
+                    performance_store.append("trace", {"trace_id": span.trace_id, "spans": [s.to_otlp() for s in spans]})
+
+    def _finish(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.buffer_size:
+                    self._traces.popitem(last=False)
+            if len(spans) < MAX_SPANS_PER_TRACE:
+                spans.append(span)
+        self.exporter.submit(span)
+
+    def get_trace(self, trace_id: str) -> Optional[List[Span]]:
+        """Spans eines Traces aus dem Ring-Buffer (nach Startzeit sortiert)"""
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return sorted(spans, key=lambda s: s.start_ns) if spans else None
+
+    def traces(self) -> List[List[Span]]:
+        """Alle Traces im Ring-Buffer (älteste zuerst)"""
+        with self._lock:
+            return [list(spans) for spans in self._traces.values()]
+
+    def recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Übersicht der zuletzt abgeschlossenen Traces (neueste zuerst)"""
+        with self._lock:
+            traces = list(self._traces.items())[-limit:]
+
+        overview = []
+        for trace_id, spans in reversed(traces):
+            root = next((s for s in spans if s.parent_span_id is None), None) or min(spans, key=lambda s: s.start_ns)
+            overview.append({
+                "trace_id": trace_id,
+                "root_span": root.name,
+                "duration": root.duration,
+                "span_count": len(spans),
+                "error": any(s.status_code == STATUS_ERROR for s in spans),
+                "start_time_unix_nano": str(root.start_ns),
+            })
+        return overview
+
+
+# Singleton Instance für globale Nutzung
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def parse_traceparent(header: Optional[str]):
+    """W3C ``traceparent`` (``00-<trace_id>-<span_id>-<flags>``) → (trace_id, span_id)"""
+    if not header:
+        return None, None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+def db_query_span(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` - ein Span pro DB-Query"""
+    connection = context["connection"]
+    with tracer.start_span(
+        "db.query",
+        {
+            "db.system": connection.vendor,
+            "db.name": connection.alias,
+            "db.statement": sql[:500],
+            "db.executemany": many,
+        },
+        kind=SPAN_KIND_CLIENT,
+    ):
+        return execute(sql, params, many, context)
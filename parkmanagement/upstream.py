@@ -0,0 +1,446 @@
+# parkmanagement/upstream.py
+
+import asyncio
+import contextvars
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core import serializers
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Kassetten-Konfiguration
+CASSETTE_VERSION = 1
+MAX_STORED_CASSETTES = 100
+# Parameter, die nie in eine Kassette geschrieben werden
+SECRET_PARAMS = {"key", "appid", "api_key"}
+
+_CASSETTE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Aktive Aufnahme bzw. Wiedergabe - submit_with_context nimmt sie in Worker-Threads mit
+_active_cassette: contextvars.ContextVar[Optional["Cassette"]] = contextvars.ContextVar("cassette", default=None)
+
+
+class CassetteMiss(Exception):
+    """Im Replay wurde ein Upstream-Call angefragt, der nicht aufgezeichnet ist."""
+
+
+class UpstreamReplayError(Exception):
+    """Wiedergabe eines aufgezeichneten Upstream-Fehlers ohne eigenen Exception-Typ."""
+
+
+@lru_cache(maxsize=4)
+def _openai_client(api_key, base_url):
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+
+def openai_client():
+    """OpenAI-Client für Key und Basis-URL aus den Settings (erst beim ersten Call erzeugt)"""
+    return _openai_client(settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL)
+
+
+def _signatur(api: str, mode: str, params: Dict[str, Any]) -> str:
+    """
+    Identität eines Calls: API, Modus und Parameter ohne Secrets. Die URL
+    gehört nicht dazu, damit Kassetten unabhängig von den konfigurierten
+    Basis-URLs (Produktion, Stand-ins) abspielbar sind.
+    """
+    sichtbar = {k: v for k, v in sorted(params.items()) if k not in SECRET_PARAMS}
+    return f"{api}|{mode}|{json.dumps(sichtbar, sort_keys=True, default=str)}"
+
+
+class Cassette:
+    """
+    Aufgezeichnete Upstream-Interaktionen eines Requests.
+
+    Enthält neben den HTTP-Antworten die in der Aufnahme gelesenen
+    Cache-Werte (Live-Daten, Wetter, Kommentar-Pool) und die DB-Fixtures
+    (Verein, Stadion, Parkplätze), damit sich der Request offline exakt
+    wiederholen lässt. Im Replay werden Interaktionen pro Signatur in
+    Aufnahme-Reihenfolge ausgeliefert.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, mode: str = "record", speed: float = 1.0):
+        data = data or {}
+        self.mode = mode
+        self.speed = speed
+        self.cassette_id = data.get("cassette_id") or uuid.uuid4().hex
+        self.meta: Dict[str, Any] = data.get("meta", {})
+        self.interactions: List[Dict[str, Any]] = data.get("interactions", [])
+        self.cache: Dict[str, List[Dict[str, Any]]] = data.get("cache", {})
+        self.fixtures: List[Dict[str, Any]] = data.get("fixtures", [])
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        # Aufnahme: laufende Calls (z.B. GPT-Kommentar nach der Response) und Ablage danach
+        self._offen = 0
+        self._nach_abschluss = None
+
+        # Replay-Zustand
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        for interaction in self.interactions:
+            self._queues[interaction["signature"]].append(interaction)
+        self._cache_queues: Dict[str, deque] = {name: deque(reads) for name, reads in self.cache.items()}
+        self.served = 0
+        self.misses: List[str] = []
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # -- Aufnahme ----------------------------------------------------------
+
+    def begin(self):
+        with self._lock:
+            self._offen += 1
+
+    def record(self, signature: str, api: str, mode: str, request: Dict[str, Any], started: float,
+               duration: float, status: Optional[int] = None, body: Any = None, error: Optional[str] = None,
+               error_message: Optional[str] = None):
+        with self._lock:
+            self._offen -= 1
+            self.interactions.append({
+                "signature": signature,
+                "api": api,
+                "mode": mode,
+                "request": request,
+                "offset": round(started - self.started, 4),
+                "duration": round(duration, 4),
+                "status": status,
+                "body": body,
+                "error": error,
+                "error_message": error_message,
+            })
+            callback = self._nach_abschluss if self._offen == 0 else None
+            if callback is not None:
+                self._nach_abschluss = None
+        if callback is not None:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"❌ Kassette {self.cassette_id} konnte nicht abgeschlossen werden: {e}")
+
+    def finish(self, callback):
+        """
+        Ruft ``callback(cassette)`` auf, sobald kein aufgezeichneter Call mehr
+        läuft - sofort oder aus dem Thread, der den letzten Call beendet.
+        """
+        with self._lock:
+            if self._offen > 0:
+                self._nach_abschluss = callback
+                return
+        callback(self)
+
+    def record_cache(self, cache_name: str, key: str, value: Any):
+        with self._lock:
+            self.cache.setdefault(cache_name, []).append({"key": key, "value": value})
+
+    def record_fixtures(self, objects: Iterable):
+        self.fixtures.extend(json.loads(serializers.serialize("json", objects)))
+
+    # -- Wiedergabe --------------------------------------------------------
+
+    def next_interaction(self, signature: str) -> Dict[str, Any]:
+        with self._lock:
+            queue = self._queues.get(signature)
+            if not queue:
+                self.misses.append(signature)
+                raise CassetteMiss(f"Nicht aufgezeichnet: {signature[:200]}")
+            self.served += 1
+            return queue.popleft()
+
+    def next_cache_value(self, cache_name: str) -> Any:
+        with self._lock:
+            queue = self._cache_queues.get(cache_name)
+            return queue.popleft()["value"] if queue else None
+
+    def delay(self, interaction: Dict[str, Any]) -> float:
+        return interaction["duration"] * self.speed
+
+    def unused(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": CASSETTE_VERSION,
+            "cassette_id": self.cassette_id,
+            "meta": self.meta,
+            "interactions": self.interactions,
+            "cache": self.cache,
+            "fixtures": self.fixtures,
+        }
+
+
+@contextmanager
+def recording(meta: Optional[Dict[str, Any]] = None):
+    """Zeichnet alle Upstream-Calls im Block (inkl. Worker-Threads via submit_with_context) auf"""
+    cassette = Cassette({"meta": dict(meta or {})}, mode="record")
+    token = _active_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active_cassette.reset(token)
+
+
+@contextmanager
+def replaying(cassette_data: Dict[str, Any], speed: float = 1.0):
+    """
+    Beantwortet alle Upstream-Calls im Block aus der Kassette, mit der
+    aufgezeichneten Dauer multipliziert mit ``speed`` (0 = ohne Wartezeit).
+    """
+    cassette = Cassette(cassette_data, mode="replay", speed=speed)
+    token = _active_cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active_cassette.reset(token)
+
+
+def response_summary(response) -> Optional[Dict[str, Any]]:
+    """Vergleichswerte zwischen Aufnahme und Replay: empfohlener Parkplatz und Anzahl Optionen"""
+    data = getattr(response, "data", None)
+    if not isinstance(data, dict):
+        return None
+    empfehlung = data.get("empfohlener_parkplatz") or {}
+    return {
+        "recommended_parkplatz_id": (empfehlung.get("parkplatz") or {}).get("id"),
+        "total_options": (data.get("meta") or {}).get("total_options"),
+        "detail": data.get("detail"),
+    }
+
+
+def record_fixtures(objects: Iterable):
+    """Legt DB-Objekte als Fixtures in einer laufenden Aufnahme ab (sonst no-op)"""
+    cassette = _active_cassette.get()
+    if cassette is not None and not cassette.replaying:
+        cassette.record_fixtures(objects)
+
+
+def cached_value(cache_name: str, key: str, value: Any) -> Any:
+    """
+    Cache-Lesezugriff auf Upstream-Daten: in der Aufnahme wird jeder Lesezugriff
+    (auch Misses) mitgeschrieben, im Replay gelten ausschließlich die
+    aufgezeichneten Werte in Aufnahme-Reihenfolge. Der Schlüssel dient nur der
+    Nachvollziehbarkeit - Kommentar-Buckets hängen z.B. von der Uhrzeit ab.
+    """
+    cassette = _active_cassette.get()
+    if cassette is None:
+        return value
+    if cassette.replaying:
+        return cassette.next_cache_value(cache_name)
+    cassette.record_cache(cache_name, key, value)
+    return value
+
+
+# -- HTTP-Calls --------------------------------------------------------------------
+
+def _replay_requests(cassette: Cassette, signature: str) -> Any:
+    interaction = cassette.next_interaction(signature)
+    time.sleep(cassette.delay(interaction))
+    if interaction["error"] == "Timeout":
+        raise requests.exceptions.Timeout(interaction["error_message"])
+    if interaction["error"] == "ConnectionError":
+        raise requests.exceptions.ConnectionError(interaction["error_message"])
+    if interaction["error"]:
+        raise UpstreamReplayError(interaction["error_message"] or interaction["error"])
+    if interaction["status"] is not None and interaction["status"] >= 400:
+        raise requests.HTTPError(f"{interaction['status']} (Replay)")
+    return interaction["body"]
+
+
+def get_json(api: str, mode: str, url: str, params: Dict[str, Any], timeout: float,
+             headers: Optional[Dict[str, str]] = None, raise_for_status: bool = True) -> Any:
+    """
+    GET mit JSON-Antwort über ``requests`` - einzige Stelle für synchrone Upstream-Calls.
+
+    Raises:
+        requests.RequestException: wie ``requests.get`` / ``raise_for_status``
+        CassetteMiss: im Replay für nicht aufgezeichnete Calls
+    """
+    cassette = _active_cassette.get()
+    signature = _signatur(api, mode, params)
+    if cassette is not None and cassette.replaying:
+        return _replay_requests(cassette, signature)
+
+    if cassette is not None:
+        cassette.begin()
+    start = time.perf_counter()
+    status, body, fehler, meldung = None, None, None, None
+    try:
+        response = requests.get(url, params=params, timeout=timeout, headers=headers)
+        status = response.status_code
+        if raise_for_status:
+            response.raise_for_status()
+        body = response.json()
+        return body
+    except requests.exceptions.HTTPError:
+        # Status >= 400 ist aufgezeichnet, das Replay wirft daraus wieder HTTPError
+        raise
+    except requests.exceptions.Timeout as e:
+        fehler, meldung = "Timeout", str(e)
+        raise
+    except requests.exceptions.ConnectionError as e:
+        fehler, meldung = "ConnectionError", str(e)
+        raise
+    except Exception as e:
+        fehler, meldung = type(e).__name__, str(e)
+        raise
+    finally:
+        if cassette is not None:
+            cassette.record(signature, api, mode, _anfrage(url, params), start,
+                            time.perf_counter() - start, status, body, fehler, meldung)
+
+
+async def get_json_async(session, api: str, mode: str, url: str, params: Dict[str, Any]) -> Any:
+    """
+    GET mit JSON-Antwort über eine ``aiohttp.ClientSession``.
+
+    Raises:
+        aiohttp.ClientError / asyncio.TimeoutError: wie der direkte Aufruf
+        CassetteMiss: im Replay für nicht aufgezeichnete Calls
+    """
+    import aiohttp
+
+    cassette = _active_cassette.get()
+    signature = _signatur(api, mode, params)
+    if cassette is not None and cassette.replaying:
+        interaction = cassette.next_interaction(signature)
+        await asyncio.sleep(cassette.delay(interaction))
+        if interaction["error"] == "Timeout":
+            raise asyncio.TimeoutError(interaction["error_message"])
+        if interaction["error"] or (interaction["status"] or 0) >= 400:
+            raise aiohttp.ClientError(interaction["error_message"] or f"HTTP {interaction['status']} (Replay)")
+        return interaction["body"]
+
+    if cassette is not None:
+        cassette.begin()
+    start = time.perf_counter()
+    status, body, fehler, meldung = None, None, None, None
+    try:
+        async with session.get(url, params=params) as response:
+            status = response.status
+            response.raise_for_status()
+            body = await response.json()
+            return body
+    except asyncio.TimeoutError as e:
+        fehler, meldung = "Timeout", str(e)
+        raise
+    except aiohttp.ClientResponseError:
+        raise
+    except Exception as e:
+        fehler, meldung = type(e).__name__, str(e)
+        raise
+    finally:
+        if cassette is not None:
+            cassette.record(signature, api, mode, _anfrage(url, params), start,
+                            time.perf_counter() - start, status, body, fehler, meldung)
+
+
+def chat_completion_texts(**kwargs) -> List[str]:
+    """
+    OpenAI Chat Completion; liefert die nicht-leeren Texte aller Choices.
+
+    Der Prompt enthält Tageszeit-Kontext und ist deshalb nicht Teil der
+    Signatur, wird aber in der Kassette mit abgelegt.
+    """
+    cassette = _active_cassette.get()
+    anfrage = {k: v for k, v in kwargs.items() if k != "timeout"}
+    signature = _signatur("openai", "chat", {k: v for k, v in anfrage.items() if k != "messages"})
+    if cassette is not None and cassette.replaying:
+        return _replay_requests(cassette, signature)
+
+    if cassette is not None:
+        cassette.begin()
+    start = time.perf_counter()
+    status, texte, fehler, meldung = None, None, None, None
+    try:
+        response = openai_client().chat.completions.create(**kwargs)
+        status = 200
+        texte = [choice.message.content.strip() for choice in response.choices if choice.message.content]
+        return texte
+    except Exception as e:
+        status, fehler, meldung = getattr(e, "status_code", None), type(e).__name__, str(e)
+        raise
+    finally:
+        if cassette is not None:
+            cassette.record(signature, "openai", "chat", {"path": "/chat/completions", "params": anfrage}, start,
+                            time.perf_counter() - start, status, texte, fehler, meldung)
+
+
+def _anfrage(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"path": urlparse(url).path, "params": {k: v for k, v in params.items() if k not in SECRET_PARAMS}}
+
+
+# -- Ablage ------------------------------------------------------------------------
+
+class CassetteStore:
+    """Ablage der Kassetten als ``<id>.json.gz`` in CASSETTE_DIR"""
+
+    @staticmethod
+    def directory() -> str:
+        return getattr(settings, "CASSETTE_DIR", None) or os.path.join(tempfile.gettempdir(), "matchroute_cassettes")
+
+    @staticmethod
+    def speichern(cassette: Cassette) -> str:
+        """Schreibt die Kassette (auch aus einem Worker-Thread aufrufbar); liefert die ID"""
+        directory = CassetteStore.directory()
+        os.makedirs(directory, exist_ok=True)
+        pfad = os.path.join(directory, f"{cassette.cassette_id}.json.gz")
+        with gzip.open(pfad, "wt", encoding="utf-8") as fh:
+            json.dump(cassette.to_dict(), fh, separators=(",", ":"), default=str)
+
+        CassetteStore._aufraeumen(directory)
+        logger.info(f"📼 Kassette {cassette.cassette_id} gespeichert: {len(cassette.interactions)} Upstream-Calls")
+        return cassette.cassette_id
+
+    @staticmethod
+    def _aufraeumen(directory: str):
+        kassetten = sorted(
+            (f for f in os.listdir(directory) if f.endswith(".json.gz")),
+            key=lambda f: os.path.getmtime(os.path.join(directory, f)),
+        )
+        for name in kassetten[:-MAX_STORED_CASSETTES]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def laden(cassette_id_oder_pfad: str) -> Optional[Dict[str, Any]]:
+        """Kassette per ID aus CASSETTE_DIR oder per Dateipfad; None wenn nicht vorhanden"""
+        if _CASSETTE_ID.match(cassette_id_oder_pfad):
+            pfad = os.path.join(CassetteStore.directory(), f"{cassette_id_oder_pfad}.json.gz")
+        else:
+            pfad = cassette_id_oder_pfad
+        try:
+            with gzip.open(pfad, "rt", encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def liste(limit: int = 50) -> List[Tuple[str, float]]:
+        """IDs und Zeitstempel der neuesten Kassetten"""
+        directory = CassetteStore.directory()
+        if not os.path.isdir(directory):
+            return []
+        kassetten = [
+            (name[:-len(".json.gz")], os.path.getmtime(os.path.join(directory, name)))
+            for name in os.listdir(directory) if name.endswith(".json.gz")
+        ]
+        return sorted(kassetten, key=lambda k: k[1], reverse=True)[:limit]
@@ -3,8 +3,11 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ParkplatzViewSet,
+    RouteKommentarView,
+    RouteBulkSpeichernView,
     RouteSpeichernView,
     RouteSuggestionView,
+    RouteVorschlagDetailView,
     RouteViewSet,
     StadionViewSet,
     UserRegisterView,
@@ -12,13 +15,20 @@ from .views import (
     google_route_details, 
     geocode_address,
     dashboard_stats,
+    catalog_snapshot,
     ProfilView,
     # 🆕 Neue Dortmund Live-Daten Endpoints
     dortmund_parking_overview,
     live_parking_status,
     research_data_export,
     performance_analysis,
-    monitoring_export
+    monitoring_export,
+    streaming_export,
+    performance_what_if,
+    profile_detail,
+    profile_list,
+    trace_detail,
+    trace_list,
 )
 
 router = DefaultRouter()
@@ -30,7 +40,10 @@ router.register(r'routen', RouteViewSet)
 urlpatterns = [
     # Hauptfunktionen
     path('routen/speichern/', RouteSpeichernView.as_view(), name='routing-speichern'),
+    path('routen/speichern/bulk/', RouteBulkSpeichernView.as_view(), name='routing-speichern-bulk'),
     path('routen-vorschlag/', RouteSuggestionView.as_view(), name='routen-vorschlag'),
+    path('routen-vorschlag/kommentar/<str:job_id>/', RouteKommentarView.as_view(), name='routen-vorschlag-kommentar'),
+    path('routen-vorschlag/<str:vorschlag_id>/<int:parkplatz_id>/', RouteVorschlagDetailView.as_view(), name='routen-vorschlag-detail'),
     path('register/', UserRegisterView.as_view(), name='register'),
     path('profil/', ProfilView.as_view(), name='profil'),
     
@@ -38,6 +51,9 @@ urlpatterns = [
     path("route-details/", google_route_details, name="google_route_details"),
     path("geocode/", geocode_address, name="geocode_address"),
     
+    # Stammdaten-Katalog (Vereine, Stadien, Parkplätze) in einer gecachten Antwort
+    path("catalog/", catalog_snapshot, name="catalog_snapshot"),
+    
     # Dashboard API
     path("dashboard-stats/", dashboard_stats, name="dashboard_stats"),
     
@@ -50,6 +66,12 @@ urlpatterns = [
     
     path("performance/analysis/", performance_analysis, name="performance_analysis"),
     path("performance/export/", monitoring_export, name="monitoring_export"),
+    path("export/stream/", streaming_export, name="streaming_export"),
+    path("performance/what-if/", performance_what_if, name="performance_what_if"),
+    path("performance/profiles/", profile_list, name="profile_list"),
+    path("performance/profiles/<str:profile_id>/", profile_detail, name="profile_detail"),
+    path("performance/traces/", trace_list, name="trace_list"),
+    path("performance/traces/<str:trace_id>/", trace_detail, name="trace_detail"),
     
     # Router URLs
     path('', include(router.urls)),
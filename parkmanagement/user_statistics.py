@@ -0,0 +1,118 @@
+# parkmanagement/user_statistics.py
+
+from typing import Any, Dict, Iterable
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import BenutzerStatistik, Route
+from .serializers import RouteLeseSerializer
+
+LETZTE_ROUTEN = 5  # Anzahl Routen in "recent_routes" des Dashboards
+
+
+class BenutzerStatistiken:
+    """
+    Pflegt die materialisierte ``BenutzerStatistik`` pro Benutzer.
+
+    Neue Routen werden inkrementell eingerechnet (eine gesperrte Zeile pro
+    Benutzer). Änderungen und Löschungen sind selten und lösen nach dem
+    Commit eine Neuberechnung aus den Routen des Benutzers aus.
+    """
+
+    @staticmethod
+    def route_hinzugefuegt(route: Route):
+        """Rechnet eine neu angelegte Route in die Statistik ihres Benutzers ein"""
+        with transaction.atomic():
+            statistik, angelegt = BenutzerStatistik.objects.select_for_update().get_or_create(
+                benutzer_id=route.benutzer_id
+            )
+            if angelegt:
+                # Erste Statistik des Benutzers: vollständig aus der DB (enthält die neue Route)
+                BenutzerStatistiken._berechnen(statistik)
+                return
+
+            statistik.anzahl_routen += 1
+            if route.dauer_minuten is not None:
+                statistik.summe_dauer_minuten += int(route.dauer_minuten)
+                statistik.anzahl_mit_dauer += 1
+
+            if route.parkplatz_id is not None:
+                schluessel = str(route.parkplatz_id)
+                zaehler = statistik.parkplatz_zaehler
+                zaehler[schluessel] = zaehler.get(schluessel, 0) + 1
+                favorit = str(statistik.lieblings_parkplatz_id) if statistik.lieblings_parkplatz_id else None
+                if favorit is None or zaehler[schluessel] > zaehler.get(favorit, 0):
+                    statistik.lieblings_parkplatz_id = route.parkplatz_id
+
+            statistik.letzte_route_ids = (
+                [route.pk] + [pk for pk in statistik.letzte_route_ids if pk != route.pk]
+            )[:LETZTE_ROUTEN]
+            statistik.save()
+
+    @staticmethod
+    def neu_berechnen(benutzer_id: int) -> BenutzerStatistik:
+        """Berechnet die Statistik eines Benutzers vollständig aus seinen Routen"""
+        with transaction.atomic():
+            statistik, _ = BenutzerStatistik.objects.select_for_update().get_or_create(benutzer_id=benutzer_id)
+            BenutzerStatistiken._berechnen(statistik)
+            return statistik
+
+    @staticmethod
+    def neu_berechnen_nach_commit(benutzer_ids: Iterable[int]):
+        """
+        Plant die Neuberechnung nach dem Commit - bei kaskadierenden Löschungen
+        ist der Benutzer dann ggf. schon entfernt und wird übersprungen.
+        """
+        def ausfuehren(ids=frozenset(benutzer_ids)):
+            for benutzer_id in User.objects.filter(pk__in=ids).values_list("pk", flat=True):
+                BenutzerStatistiken.neu_berechnen(benutzer_id)
+
+        transaction.on_commit(ausfuehren)
+
+    @staticmethod
+    def _berechnen(statistik: BenutzerStatistik):
+        routen = Route.objects.filter(benutzer_id=statistik.benutzer_id)
+        summen = routen.aggregate(anzahl=Count("id"), summe=Sum("dauer_minuten"), mit_dauer=Count("dauer_minuten"))
+        zaehler = {
+            str(parkplatz_id): anzahl
+            for parkplatz_id, anzahl in routen.filter(parkplatz__isnull=False)
+            .values_list("parkplatz_id").annotate(anzahl=Count("id")).order_by()
+        }
+
+        statistik.anzahl_routen = summen["anzahl"]
+        statistik.summe_dauer_minuten = summen["summe"] or 0
+        statistik.anzahl_mit_dauer = summen["mit_dauer"]
+        statistik.parkplatz_zaehler = zaehler
+        statistik.lieblings_parkplatz_id = int(max(zaehler, key=zaehler.get)) if zaehler else None
+        statistik.letzte_route_ids = list(
+            routen.order_by("-erstelldatum", "-id").values_list("id", flat=True)[:LETZTE_ROUTEN]
+        )
+        statistik.save()
+
+    @staticmethod
+    def dashboard_daten(user) -> Dict[str, Any]:
+        """
+        Routen-Kennzahlen für das Dashboard aus der Statistik-Zeile:
+        eine Abfrage für die Zeile (inkl. Lieblings-Parkplatz) und eine für
+        höchstens LETZTE_ROUTEN Routen - unabhängig von der Historie.
+        """
+        statistik = (
+            BenutzerStatistik.objects.select_related("lieblings_parkplatz")
+            .filter(benutzer=user).first()
+        )
+        if statistik is None or statistik.anzahl_routen == 0:
+            return {"total_routes": 0, "avg_duration_minutes": 0, "favorite_parking": None, "recent_routes": []}
+
+        letzte = sorted(
+            Route.objects.filter(pk__in=statistik.letzte_route_ids),
+            key=lambda route: statistik.letzte_route_ids.index(route.pk),
+        )
+        durchschnitt = statistik.durchschnitt_dauer_minuten
+        return {
+            "total_routes": statistik.anzahl_routen,
+            "avg_duration_minutes": round(durchschnitt) if durchschnitt else 0,
+            "favorite_parking": statistik.lieblings_parkplatz.name if statistik.lieblings_parkplatz else None,
+            "recent_routes": RouteLeseSerializer(letzte, many=True).data,
+        }
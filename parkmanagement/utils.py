@@ -1,12 +1,19 @@
-import requests
 from django.conf import settings
-from openai import OpenAI
 import math
 from datetime import datetime, time
 import logging
 
 # 🆕 PERFORMANCE MONITORING IMPORTS
 from .performance_monitor import performance_monitor, monitor_performance
+from .comment_cache import (
+    VerkehrsKommentarCache,
+    ZEIT_KONTEXTE,
+    WETTER_KATEGORIEN,
+    verzoegerung_text,
+)
+from .deadline import LIVE_DATEN_TIMEOUT_SEKUNDEN, DeadlineExceeded, ist_abgelaufen, restzeit
+from .metrics import track_upstream
+from .upstream import chat_completion_texts, get_json
 
 
 
@@ -26,9 +33,10 @@ except ImportError:
 GOOGLE_KEY = settings.GOOGLE_MAPS_API_KEY
 OPENWEATHER_KEY = settings.OPENWEATHERMAP_KEY
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+GPT_TIMEOUT_SEKUNDEN = 20  # Obergrenze für einzelne OpenAI-Calls
 logger = logging.getLogger(__name__)
 
+
 # 🚀 PERFORMANCE OPTIMIZATION IMPORTS
 try:
     from .async_client import run_parallel_route_calculation
@@ -167,11 +175,11 @@ def generiere_google_maps_navigation_link(start_adresse, parkplatz_lat, parkplat
 
 
 @monitor_performance("google_route_calculation")
-def berechne_google_route(origin, destination, mode="driving", departure_time="now"):
+def berechne_google_route(origin, destination, mode="driving", departure_time="now", timeout=10):
     """
     🆕 ERWEITERT: Universelle Google Directions API Funktion mit Performance-Monitoring
     """
-    url = "https://maps.googleapis.com/maps/api/directions/json"
+    url = f"{settings.GOOGLE_MAPS_API_BASE_URL}/directions/json"
     params = {
         "origin": origin,
         "destination": destination,
@@ -194,9 +202,9 @@ def berechne_google_route(origin, destination, mode="driving", departure_time="n
         params["transit_routing_preference"] = "fewer_transfers"
     
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        with track_upstream("google_directions", mode, request_key=f"{origin}|{destination}") as call:
+            data = get_json("google_directions", mode, url, params, timeout)
+            call["error"] = data["status"] != "OK"
         
         if data["status"] == "OK" and data["routes"]:
             route = data["routes"][0]
@@ -229,9 +237,10 @@ def berechne_google_route(origin, destination, mode="driving", departure_time="n
         return None
 
 
-def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion):
+def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion, deadline=None):
     """
     🆕 ERWEITERT: Routenberechnung mit detailliertem Performance-Monitoring
+    Alle Google-Calls nutzen höchstens das verbleibende Zeitbudget der Deadline.
     """
     ergebnisse = {}
     parkplatz_coords = f"{parkplatz.latitude},{parkplatz.longitude}"
@@ -246,7 +255,8 @@ def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion):
         auto_route = berechne_google_route(
             origin=start_adresse,
             destination=parkplatz_coords,
-            mode="driving"
+            mode="driving",
+            timeout=restzeit(deadline, 10)
         )
     
     if not auto_route:
@@ -292,7 +302,8 @@ def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion):
         transit_route = berechne_google_route(
             origin=parkplatz_coords,
             destination=stadion_coords,
-            mode="transit"
+            mode="transit",
+            timeout=restzeit(deadline, 10)
         )
     
     if transit_route:
@@ -310,7 +321,8 @@ def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion):
         walking_route = berechne_google_route(
             origin=parkplatz_coords,
             destination=stadion_coords,
-            mode="walking"
+            mode="walking",
+            timeout=restzeit(deadline, 10)
         )
     
     if walking_route:
@@ -347,7 +359,7 @@ def berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion):
     return ergebnisse
 
 
-def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkplaetze, stadion):
+def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkplaetze, stadion, deadline=None):
     """
     🚀 HOCHOPTIMIERT: Parkplatz-Empfehlung mit Parallelisierung und Live-Daten
     
@@ -355,6 +367,9 @@ def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkp
     - Parallele Google API-Calls (21 serielle → 3 parallele Batches)
     - Erwartete Zeitreduktion: 80-85% (13s → 2-3s)
     - Wissenschaftlich messbare Optimierung für Masterarbeit
+    
+    Mit einer Deadline werden Live-Daten und Routing auf das verbleibende
+    Budget begrenzt; bei Ablauf werden die bis dahin vorliegenden Vorschläge geliefert.
     """
     if not parkplaetze:
         return []
@@ -377,10 +392,12 @@ def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkp
     try:
         # 1. LIVE-DATEN LADEN (mit Monitoring)
         live_data_list = []
-        if DORTMUND_INTEGRATION_AVAILABLE:
+        if DORTMUND_INTEGRATION_AVAILABLE and not ist_abgelaufen(deadline):
             with performance_monitor.measure_operation("dortmund_live_data_fetch", {"source": "Dortmund Open Data"}):
                 try:
-                    live_data_list = DortmundParkingData.fetch_live_parking_data() or []
+                    live_data_list = DortmundParkingData.fetch_live_parking_data(
+                        timeout=restzeit(deadline, LIVE_DATEN_TIMEOUT_SEKUNDEN) if deadline else 10
+                    ) or []
                     if live_data_list:
                         logger.info(f"✅ {len(live_data_list)} Live-Parkplätze geladen")
                 except Exception as e:
@@ -398,13 +415,17 @@ def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkp
                 }
             ):
                 logger.info("🚀 Starte PARALLELE Routenberechnung - Erwartete Verbesserung: 80-85%")
-                vorschlaege = run_parallel_route_calculation(start_adresse, parkplaetze, stadion)
+                vorschlaege = run_parallel_route_calculation(start_adresse, parkplaetze, stadion, deadline=deadline)
         else:
             # Fallback zu sequenzieller Berechnung (alte Methode)
             logger.info("⚠️ Fallback zu sequenzieller Berechnung")
             vorschlaege = []
             
             for i, parkplatz in enumerate(parkplaetze):
+                if ist_abgelaufen(deadline):
+                    logger.warning(f"⏰ Zeitbudget aufgebraucht nach {i}/{parkplatz_count} Parkplätzen")
+                    break
+                
                 with performance_monitor.measure_operation(
                     f"single_parking_calculation_fallback", 
                     {
@@ -415,7 +436,10 @@ def berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkp
                 ):
                     logger.info(f"🔄 [{i+1}/{parkplatz_count}] SEQUENZIELL: {parkplatz.name}")
                     
-                    result = berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion)
+                    try:
+                        result = berechne_gesamtzeit_mit_monitoring(start_adresse, parkplatz, stadion, deadline)
+                    except DeadlineExceeded:
+                        result = None
                     
                     if result:
                         vorschlag = {
@@ -545,12 +569,12 @@ def get_optimization_comparison():
         return {"error": f"Fehler bei Performance-Vergleich: {str(e)}"}
 
 # Backwards compatibility - alte Funktion leitet an neue weiter
-def berechne_optimierte_parkplatz_empfehlung(start_adresse, parkplaetze, stadion):
+def berechne_optimierte_parkplatz_empfehlung(start_adresse, parkplaetze, stadion, deadline=None):
     """
     Legacy-Funktion für Rückwärtskompatibilität.
     Leitet an die neue Funktion mit Live-Daten weiter.
     """
-    return berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkplaetze, stadion)
+    return berechne_optimierte_parkplatz_empfehlung_mit_live_daten(start_adresse, parkplaetze, stadion, deadline=deadline)
 
 
 # Legacy-Funktionen für Rückwärtskompatibilität (ERHALTEN)
@@ -574,17 +598,20 @@ def hole_wetter_mit_verkehrseinfluss(lat, lng):
     Erweiterte Wetterfunktion die auch Verkehrsauswirkungen berücksichtigt.
     """
     try:
-        res = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
-            params={
-                "lat": lat,
-                "lon": lng,
-                "appid": OPENWEATHER_KEY,
-                "units": "metric",
-                "lang": "de",
-            },
-            timeout=5
-        ).json()
+        with track_upstream("openweathermap", "current", request_key=f"{lat},{lng}"):
+            res = get_json(
+                "openweathermap", "current",
+                f"{settings.OPENWEATHERMAP_API_BASE_URL}/weather",
+                params={
+                    "lat": lat,
+                    "lon": lng,
+                    "appid": OPENWEATHER_KEY,
+                    "units": "metric",
+                    "lang": "de",
+                },
+                timeout=5,
+                raise_for_status=False,
+            )
 
         temp = res["main"]["temp"]
         wetter_code = res["weather"][0]["id"]
@@ -644,10 +671,50 @@ def berechne_wetter_verkehrs_einfluss(wetter_code, temperatur):
     return round(base_faktor, 2)
 
 
+def berechne_wetter_kommentar_zusatz(wetter_data):
+    """
+    Wetterabhängiger Zusatz zum Verkehrskommentar.
+    Wird nicht gecacht, da er die konkrete Wetterbeschreibung enthält.
+    """
+    if wetter_data and wetter_data.get("verkehr_einfluss", 1) > 1.2:
+        return f" Das {wetter_data.get('beschreibung', 'Wetter')} kann zusätzliche Verzögerungen verursachen."
+    elif wetter_data and wetter_data.get("temperatur") is not None and wetter_data.get("verkehr_einfluss", 1) < 0.95:
+        return f" Bei dem schönen Wetter sind die Straßen entspannt."
+    return ""
+
+
 @monitor_performance("gpt_traffic_comment_generation")
-def generiere_intelligenten_verkehrskommentar(verkehr_score, verzoegerung_min, wetter_data, tageszeit):
+def generiere_gpt_kommentar_varianten(bucket, anzahl=1, timeout=GPT_TIMEOUT_SEKUNDEN):
+    """
+    Generiert GPT-Verkehrskommentare für einen Kommentar-Bucket.
+    Mehrere Varianten werden in einem einzigen API-Call angefordert.
+    """
+    verkehr_score, verzoegerung, tageszeit, wetter = bucket
+
+    # GPT-Prompt für natürlichere Kommentare
+    prompt = (
+        f"Erstelle einen kurzen, freundlichen Verkehrskommentar (max. 2 Sätze) für eine Routenplanung. "
+        f"Verkehrsbewertung: {verkehr_score}/5, Verzögerung: {verzoegerung_text(verzoegerung)}, "
+        f"Zeit: {ZEIT_KONTEXTE[tageszeit]}, Wetter: {WETTER_KATEGORIEN[wetter]}. "
+        f"Sei spezifisch und hilfreich. Nenne keine exakten Minutenangaben. Auf Deutsch, kein Gendern."
+    )
+
+    with track_upstream("openai", "chat"):
+        return chat_completion_texts(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=100,
+            n=anzahl,
+            timeout=timeout,
+        )
+
+
+def generiere_intelligenten_verkehrskommentar(verkehr_score, verzoegerung_min, wetter_data, tageszeit, deadline=None):
     """
-    🆕 ERWEITERT: Generiert intelligente Verkehrskommentare mit Performance-Monitoring
+    🆕 ERWEITERT: Intelligente Verkehrskommentare aus dem Bucket-Cache.
+    GPT wird nur bei einem leeren Pool synchron aufgerufen, sonst im Hintergrund nachgefüllt.
+    Der synchrone Call ist durch die Deadline bzw. GPT_TIMEOUT_SEKUNDEN begrenzt.
     """
     try:
         if isinstance(tageszeit, str):
@@ -655,45 +722,25 @@ def generiere_intelligenten_verkehrskommentar(verkehr_score, verzoegerung_min, w
             tageszeit = datetime.now()
         elif tageszeit is None:
             tageszeit = datetime.now()
-            
-        hour = tageszeit.hour if isinstance(tageszeit, datetime) else tageszeit
-        
-        # Kontext aufbauen
-        zeit_kontext = ""
-        if 7 <= hour <= 9:
-            zeit_kontext = "zur Hauptverkehrszeit am Morgen"
-        elif 17 <= hour <= 19:
-            zeit_kontext = "im Feierabendverkehr"
-        elif 12 <= hour <= 14:
-            zeit_kontext = "zur Mittagszeit"
-        elif 22 <= hour or hour <= 6:
-            zeit_kontext = "zur verkehrsarmen Nachtzeit"
-        else:
-            zeit_kontext = "zur aktuellen Zeit"
-            
-        wetter_einfluss = ""
-        if wetter_data and wetter_data.get("verkehr_einfluss", 1) > 1.2:
-            wetter_einfluss = f" Das {wetter_data.get('beschreibung', 'Wetter')} kann zusätzliche Verzögerungen verursachen."
-        elif wetter_data and wetter_data.get("verkehr_einfluss", 1) < 0.95:
-            wetter_einfluss = f" Bei dem schönen Wetter sind die Straßen entspannt."
-        
-        # GPT-Prompt für natürlichere Kommentare
-        prompt = (
-            f"Erstelle einen kurzen, freundlichen Verkehrskommentar (max. 2 Sätze) für eine Routenplanung. "
-            f"Verkehrsbewertung: {verkehr_score}/5, Verzögerung: {verzoegerung_min} Minuten, "
-            f"Zeit: {zeit_kontext}, Wetter: {wetter_data.get('beschreibung', 'unbekannt') if wetter_data else 'unbekannt'}. "
-            f"Sei spezifisch und hilfreich. Auf Deutsch, kein Gendern."
-        )
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=100,
-        )
+        bucket = VerkehrsKommentarCache.bucket_fuer(verkehr_score, verzoegerung_min, wetter_data, tageszeit)
+
+        with performance_monitor.measure_operation("traffic_comment_cache_lookup", {"bucket": list(bucket)}) as operation:
+            # Bei einem Miss füllt der synchrone Call unten den Pool, kein zusätzliches Nachfüllen
+            kommentar = VerkehrsKommentarCache.get(bucket, nachfuellen_bei_miss=False)
+            operation["details"]["cache_hit"] = kommentar is not None
+
+        if kommentar is None:
+            # Cache-Miss: eine Variante synchron erzeugen, der Rest des Pools wird beim nächsten Treffer nachgefüllt
+            varianten = generiere_gpt_kommentar_varianten(
+                bucket, anzahl=1, timeout=restzeit(deadline, GPT_TIMEOUT_SEKUNDEN)
+            )
+            if not varianten:
+                raise ValueError("Leere GPT-Antwort")
+            kommentar = varianten[0]
+            VerkehrsKommentarCache.add(bucket, varianten)
 
-        kommentar = response.choices[0].message.content.strip()
-        return kommentar + wetter_einfluss
+        return kommentar + berechne_wetter_kommentar_zusatz(wetter_data)
         
     except Exception as e:
         print(f"GPT Kommentar Fehler: {e}")
@@ -705,7 +752,7 @@ def geocode_adresse(adresse):
     """
     Konvertiert eine Adresse in Koordinaten mit Google Geocoding API.
     """
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
+    url = f"{settings.GOOGLE_MAPS_API_BASE_URL}/geocode/json"
     params = {
         "address": adresse,
         "key": GOOGLE_KEY,
@@ -714,9 +761,9 @@ def geocode_adresse(adresse):
     }
     
     try:
-        response = requests.get(url, params=params, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+        with track_upstream("google_geocoding", request_key=adresse) as call:
+            data = get_json("google_geocoding", "geocode", url, params, 5)
+            call["error"] = data["status"] not in ("OK", "ZERO_RESULTS")
         
         if data["status"] == "OK" and data["results"]:
             location = data["results"][0]["geometry"]["location"]
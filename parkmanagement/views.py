@@ -1,28 +1,60 @@
 from datetime import datetime
 from typing import Any, Dict, List
 from django.shortcuts import render
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_safe
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework import viewsets, generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 import requests
 import logging
+import re
 
 from parkmanagement.utils import (
     berechne_gesamtzeit_mit_realistischer_bewertung, 
     berechne_optimierte_parkplatz_empfehlung_mit_live_daten, 
     generiere_intelligenten_verkehrskommentar,
-    hole_wetter_mit_verkehrseinfluss,
     berechne_google_route,
     geocode_adresse,
 )
 
 from .performance_monitor import performance_monitor, get_research_export
+from .weather_cache import StadionWetterCache
+from .comment_cache import KommentarJobs, KOMMENTAR_BUDGET_SEKUNDEN
+from .deadline import Deadline, DeadlineExceeded, ROUTEN_VORSCHLAG_BUDGET_SEKUNDEN
+from .metrics import OPENMETRICS_CONTENT_TYPE, render_openmetrics, track_upstream
+from .upstream import get_json, record_fixtures
+from .route_rollups import RouteRollups
+from .streaming_export import StreamingExport
+from .catalog import Katalog
+from .pagination import RoutenCursorPagination
+from .route_speichern import ROUTEN_BULK_MAX, RoutenSpeichern
+from .suggestion_payload import VorschlagAuswahl, VorschlagDetails
+from .user_statistics import BenutzerStatistiken
+from .tracing import current_trace_id, otlp_payload, tracer
+from .trace_analysis import (
+    SIMULATION_MAX_CONCURRENCY, SIMULATION_MAX_FANOUT, analysiere_trace, build_span_tree, simulate,
+)
+from .query_instrumentation import current_query_stats
+from .profiling import ProfileStore
+from .performance_statistics import (
+    analyze_performance_trends,
+    calculate_api_efficiency,
+    calculate_parallelization_potential,
+    forschungsdaten_aus_store,
+    generate_production_recommendations,
+    generate_statistical_analysis,
+    parse_zeitpunkt,
+)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from itertools import chain
 
 
 # Import der Dortmund Live-Daten Integration
@@ -38,6 +70,9 @@ except ImportError:
 from .models import Parkplatz, Route, Stadion, Verein
 from .serializers import (
     ParkplatzSerializer,
+    RouteLeseSerializer,
+    RouteListSerializer,
+    RouteSpeichernSerializer,
     RouteSerializer,
     StadionSerializer,
     UserRegisterSerializer,
@@ -46,10 +81,59 @@ from .serializers import (
 
 logger = logging.getLogger(__name__)
 
+KATALOG_VERSIONIERT_MAX_AGE = 365 * 24 * 3600  # catalog/?v=<Stempel> ändert sich nie
+
+
+def _etag_passt(request, etag: str) -> bool:
+    """If-None-Match gegen den aktuellen ETag (schwacher Vergleich wie in RFC 9110)"""
+    kandidaten = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in kandidaten or etag in [kandidat.removeprefix("W/") for kandidat in kandidaten]
+
+
+def _katalog_cache_header(response, etag: str, max_age: int):
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={max_age}"
+    return response
+
+
+class KatalogLesenMixin:
+    """
+    Liste und Detail der Stammdaten aus dem In-Process-Katalog statt aus der DB.
+
+    Der ETag leitet sich aus dem Katalog-Stempel ab; ``If-None-Match`` mit
+    aktuellem Stempel ergibt 304 ohne DB-Abfrage. Schreibzugriffe laufen
+    unverändert über das ModelViewSet; die Signals setzen danach einen neuen Stempel.
+    """
+    katalog_modell = None  # Schlüssel in KatalogSnapshot.daten
 
-class ParkplatzViewSet(viewsets.ModelViewSet):
+    def perform_authentication(self, request):
+        # Lesen braucht keinen Benutzer - das JWT wird erst geprüft, wenn eine Permission ihn liest
+        if request.method not in SAFE_METHODS:
+            super().perform_authentication(request)
+
+    def list(self, request, *args, **kwargs):
+        snapshot = Katalog.snapshot()
+        return self._katalog_antwort(request, snapshot, lambda: list(snapshot.daten[self.katalog_modell].values()))
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = Katalog.snapshot()
+        pk = str(kwargs.get(self.lookup_url_kwarg or self.lookup_field, ""))
+        daten = snapshot.daten[self.katalog_modell].get(int(pk)) if pk.isdigit() else None
+        if daten is None:
+            return Response({"detail": "Nicht gefunden."}, status=404)
+        return self._katalog_antwort(request, snapshot, lambda: daten)
+
+    def _katalog_antwort(self, request, snapshot, daten):
+        # Browsable API und JSON sind verschiedene Repräsentationen derselben Ressource
+        etag = quote_etag(f"{snapshot.stempel}-{request.accepted_renderer.format}")
+        response = Response(status=304) if _etag_passt(request, etag) else Response(daten())
+        return _katalog_cache_header(response, etag, settings.KATALOG_CACHE_MAX_AGE)
+
+
+class ParkplatzViewSet(KatalogLesenMixin, viewsets.ModelViewSet):
     queryset = Parkplatz.objects.all()
     serializer_class = ParkplatzSerializer
+    katalog_modell = "parkplatz"
     # permission_classes = [IsAuthenticated]
 
 
@@ -58,59 +142,109 @@ class UserRegisterView(generics.CreateAPIView):
     serializer_class = UserRegisterSerializer
 
 
-class VereinViewSet(viewsets.ModelViewSet):
+class VereinViewSet(KatalogLesenMixin, viewsets.ModelViewSet):
     queryset = Verein.objects.all()
     serializer_class = VereinSerializer
+    katalog_modell = "verein"
 
 
-class StadionViewSet(viewsets.ModelViewSet):
+class StadionViewSet(KatalogLesenMixin, viewsets.ModelViewSet):
     queryset = Stadion.objects.all()
     serializer_class = StadionSerializer
+    katalog_modell = "stadion"
 
 
 class RouteViewSet(viewsets.ModelViewSet):
+    """
+    Routen des angemeldeten Benutzers. Die Liste ist cursor-paginiert
+    (``?cursor=...``, ``?page_size=``) und liefert die schlanke Darstellung.
+    """
     queryset = Route.objects.all()
     serializer_class = RouteSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RoutenCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        return self.queryset.filter(benutzer=user).order_by("-erstelldatum")
+        routen = self.queryset.filter(benutzer=user)
+        if self.action == "list":
+            # Namen per JOIN statt einer Abfrage pro Route; Sortierung setzt die Pagination
+            routen = routen.select_related("stadion", "parkplatz").only(
+                "id", "benutzer", "start_adresse", "strecke_km", "dauer_minuten", "transportmittel",
+                "erstelldatum", "route_url", "stadion__name", "parkplatz__name",
+            )
+        return routen.order_by("-erstelldatum", "-id")
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return RouteListSerializer
+        if self.action == "retrieve":
+            return RouteLeseSerializer
+        return RouteSerializer
 
 
 class RouteSuggestionView(APIView):
     """
     Diese View wurde für wissenschaftliche Anwendungsfälle erweitert und 
     integriert Echtzeit-Parkplatzdaten von Dortmund Open Data.
+
+    Query-Parameter für kleinere Antworten (siehe ``VorschlagAuswahl``):
+    ``view=compact``, ``fields=parkplatz,gesamtzeit,...`` und
+    ``include=polylines,navigation,live_data``. Gekürzte Antworten enthalten
+    eine ``vorschlag_id``, über die die vollständigen Daten pro Parkplatz
+    abrufbar sind (``routen-vorschlag/<vorschlag_id>/<parkplatz_id>/``).
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        try:
+            auswahl = VorschlagAuswahl.aus_query_params(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        # Request-weites Zeitbudget für Routing, Live-Daten und Kommentar
+        deadline = Deadline(ROUTEN_VORSCHLAG_BUDGET_SEKUNDEN)
         start_adresse = request.data.get("start_adresse")
         user = request.user
 
+        # Stadion und Parkplätze aus dem Stammdaten-Katalog statt Verein -> Stadion -> Parkplätze aus der DB
+        katalog = Katalog.snapshot()
         try:
-            stadion = user.profil.lieblingsverein.stadien.first()
+            stadion = katalog.stadion_fuer_verein(user.profil.lieblingsverein_id)
         except AttributeError:
+            stadion = None
+        if stadion is None:
             return Response(
                 {"detail": "Kein Lieblingsverein oder Stadion gefunden."}, 
                 status=400
             )
 
-        parkplaetze = stadion.parkplaetze.all()
+        parkplaetze = katalog.parkplaetze_fuer_stadion(stadion.id)
         
-        if not parkplaetze.exists():
+        if not parkplaetze:
             return Response(
                 {"detail": "Keine Parkplätze für das Stadion gefunden."}, 
                 status=400
             )
 
         logger.info(f"Starte Routenberechnung für {user.username} - {len(parkplaetze)} Parkplätze")
+        # Bei X-Record-Cassette: DB-Stand für das Replay mit aufzeichnen (Abfragen nur während einer Aufnahme)
+        record_fixtures(chain(
+            Verein.objects.filter(pk=stadion.verein_id),
+            Stadion.objects.filter(pk=stadion.id),
+            Parkplatz.objects.filter(pk__in=[parkplatz.id for parkplatz in parkplaetze]),
+        ))
 
         vorschlaege = berechne_optimierte_parkplatz_empfehlung_mit_live_daten(
-            start_adresse, parkplaetze, stadion
+            start_adresse, parkplaetze, stadion, deadline=deadline
         )
 
+        if not vorschlaege and deadline.expired:
+            return Response(
+                {"detail": "Zeitüberschreitung bei der Routenberechnung. Bitte erneut versuchen."},
+                status=504
+            )
+
         if not vorschlaege:
             return Response(
                 {"detail": "Keine Route gefunden. Bitte überprüfen Sie Ihre Startadresse."}, 
@@ -124,36 +258,66 @@ class RouteSuggestionView(APIView):
         bester = vorschlaege[0]
         
         try:
-            wetter_data = hole_wetter_mit_verkehrseinfluss(
-                stadion.latitude, stadion.longitude
-            )
+            # Wetter aus dem Stadion-Cache - blockiert nie auf der Wetter-API
+            wetter_data = StadionWetterCache.get(stadion)
+            bester["wetter_info"] = wetter_data.get("formatted", "")
             
-            # Intelligenten Kommentar generieren
-            enhanced_kommentar = generiere_intelligenten_verkehrskommentar(
+            # Intelligenten Kommentar nebenläufig generieren, höchstens KOMMENTAR_BUDGET_SEKUNDEN warten
+            kommentar_job_id, kommentar_future = KommentarJobs.starten(
+                user.id,
+                generiere_intelligenten_verkehrskommentar,
                 verkehr_score=bester.get("verkehr_bewertung", 3),
                 verzoegerung_min=bester.get("dauer_traffic", 0) - bester.get("dauer_auto", 0),
                 wetter_data=wetter_data,
                 tageszeit=request.META.get('HTTP_DATE')  # Optional: Zeit aus Request
             )
             
-            bester["verkehr_kommentar"] = enhanced_kommentar
-            bester["wetter_info"] = wetter_data.get("formatted", "")
+            try:
+                bester["verkehr_kommentar"] = kommentar_future.result(
+                    timeout=deadline.timeout(KOMMENTAR_BUDGET_SEKUNDEN)
+                )
+                bester["kommentar_status"] = "ready"
+            except (FutureTimeoutError, DeadlineExceeded):
+                if KommentarJobs.zuruecklegen(kommentar_job_id):
+                    # Deterministischer Kommentar aus der Verkehrsbewertung bleibt bestehen,
+                    # der GPT-Kommentar ist später über den Follow-up Endpoint abrufbar
+                    logger.info(f"⏳ GPT-Kommentar nicht innerhalb von {KOMMENTAR_BUDGET_SEKUNDEN}s verfügbar - Job {kommentar_job_id}")
+                    bester["kommentar_status"] = "pending"
+                    bester["kommentar_job_id"] = kommentar_job_id
+                else:
+                    # Gerade noch fertig geworden
+                    bester["verkehr_kommentar"] = kommentar_future.result()
+                    bester["kommentar_status"] = "ready"
             
         except Exception as e:
             logger.error(f"Wetter/GPT Fehler: {e}")
             # Fallback bleibt bestehen
 
         alle_ohne_bester = vorschlaege[1:]
+        vorschlag_id = None
+        if not auswahl.vollstaendig:
+            # Vollständige Vorschläge für den Abruf pro Parkplatz zurücklegen
+            vorschlag_id = VorschlagDetails.ablegen(user.id, vorschlaege)
+            bester = auswahl.anwenden(bester, empfohlen=True)
+            alle_ohne_bester = [auswahl.anwenden(vorschlag) for vorschlag in alle_ohne_bester]
+
+        # Query-Statistik (Anzahl, SQL-Formen) nur in der Entwicklung und für Staff
+        query_stats = current_query_stats() if settings.DEBUG or user.is_staff else None
 
         # Erweiterte Response mit Live-Daten Metadaten
         response_data = {
             "empfohlener_parkplatz": bester, 
             "alle_parkplaetze": alle_ohne_bester,
+            "vorschlag_id": vorschlag_id,
             "meta": {
                 "total_options": len(vorschlaege),
                 "live_data_available": live_data_count,
                 "live_data_percentage": round((live_data_count / len(vorschlaege)) * 100, 1) if vorschlaege else 0,
                 "calculation_time": "live",
+                "view": auswahl.ansicht,
+                "deadline": deadline.to_dict(),
+                "trace_id": current_trace_id(),
+                "database": query_stats.to_dict() if query_stats else None,
                 "data_sources": {
                     "routing": "Google Maps API",
                     "traffic": "Google Maps Traffic API",
@@ -163,7 +327,7 @@ class RouteSuggestionView(APIView):
                 "research_context": {
                     "integration_active": DORTMUND_INTEGRATION_AVAILABLE,
                     "city": "Dortmund",
-                    "user_club": stadion.verein.name if stadion and stadion.verein else None
+                    "user_club": katalog.vereine[stadion.verein_id].name if stadion.verein_id in katalog.vereine else None
                 }
             }
         }
@@ -173,35 +337,94 @@ class RouteSuggestionView(APIView):
         return Response(response_data, status=200)
 
 
+class RouteKommentarView(APIView):
+    """
+    Follow-up Endpoint für GPT-Kommentare, die nicht innerhalb des
+    Zeitbudgets von RouteSuggestionView fertig wurden.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        ergebnis = KommentarJobs.ergebnis(job_id, request.user.id)
+
+        if ergebnis is None:
+            return Response(
+                {"detail": "Kommentar nicht gefunden oder abgelaufen."},
+                status=404
+            )
+
+        return Response(ergebnis, status=200)
+
+
+class RouteVorschlagDetailView(APIView):
+    """Vollständiger Vorschlag (Polylines, Navigation, Live-Daten) eines Parkplatzes aus einer gekürzten Antwort"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, vorschlag_id, parkplatz_id):
+        vorschlag = VorschlagDetails.abrufen(vorschlag_id, parkplatz_id, request.user.id)
+
+        if vorschlag is None:
+            return Response(
+                {"detail": "Vorschlag nicht gefunden oder abgelaufen."},
+                status=404
+            )
+
+        return Response(vorschlag, status=200)
+
+
 class RouteSpeichernView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         user = request.user
-        data = request.data
+        serializer = RouteSpeichernSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"detail": "Ungültige Route.", "errors": serializer.errors},
+                status=400
+            )
+        data = serializer.validated_data
 
         try:
-            stadion = Stadion.objects.get(id=data.get("stadion_id"))
-            parkplatz = Parkplatz.objects.get(id=data.get("parkplatz_id"))
+            stadion = Stadion.objects.get(id=data["stadion_id"])
+            parkplatz = Parkplatz.objects.get(id=data["parkplatz_id"])
         except (Stadion.DoesNotExist, Parkplatz.DoesNotExist):
             return Response(
                 {"detail": "Stadion oder Parkplatz nicht gefunden."},
                 status=400
             )
 
+        # Wiederholtes Speichern mit demselben Schlüssel (Doppel-Tap, Retry) liefert die vorhandene Route
+        schluessel = data.get("idempotency_key") or request.headers.get("Idempotency-Key")
+        if schluessel and len(schluessel) > 64:
+            return Response({"detail": "Idempotency-Key darf höchstens 64 Zeichen lang sein."}, status=400)
+        if schluessel:
+            vorhanden = Route.objects.filter(benutzer=user, idempotenz_schluessel=schluessel).first()
+            if vorhanden is not None:
+                return Response(
+                    {
+                        "detail": "Route bereits gespeichert.",
+                        "route_id": vorhanden.id,
+                        "saved_at": vorhanden.erstelldatum.isoformat(),
+                    },
+                    status=200
+                )
+
         try:
-            route = Route.objects.create(
-                benutzer=user,
-                stadion=stadion,
-                parkplatz=parkplatz,
-                start_adresse=data.get("start_adresse"),
-                start_latitude=data.get("start_lat"),
-                start_longitude=data.get("start_lng"),
-                strecke_km=data.get("distanz_km"),
-                dauer_minuten=data.get("dauer_min"),  
-                transportmittel=data.get("transportmittel", "auto"),
-                route_url=data.get("route_url"),
-            )
+            with transaction.atomic():
+                route = Route.objects.create(
+                    benutzer=user,
+                    stadion=stadion,
+                    parkplatz=parkplatz,
+                    start_adresse=data["start_adresse"],
+                    start_latitude=data.get("start_lat"),
+                    start_longitude=data.get("start_lng"),
+                    strecke_km=data.get("distanz_km"),
+                    dauer_minuten=data.get("dauer_min"),
+                    transportmittel=data["transportmittel"],
+                    route_url=data.get("route_url"),
+                    idempotenz_schluessel=schluessel or None,
+                )
 
             return Response(
                 {
@@ -212,6 +435,25 @@ class RouteSpeichernView(APIView):
                 status=201
             )
 
+        except IntegrityError as e:
+            # Paralleler Request mit demselben Schlüssel war schneller
+            vorhanden = (
+                Route.objects.filter(benutzer=user, idempotenz_schluessel=schluessel).first() if schluessel else None
+            )
+            if vorhanden is None:
+                return Response(
+                    {"detail": f"Fehler beim Speichern der Route: {str(e)}"},
+                    status=500
+                )
+            return Response(
+                {
+                    "detail": "Route bereits gespeichert.",
+                    "route_id": vorhanden.id,
+                    "saved_at": vorhanden.erstelldatum.isoformat(),
+                },
+                status=200
+            )
+
         except Exception as e:
             return Response(
                 {"detail": f"Fehler beim Speichern der Route: {str(e)}"},
@@ -219,21 +461,61 @@ class RouteSpeichernView(APIView):
             )
 
 
+class RouteBulkSpeichernView(APIView):
+    """
+    Speichert bis zu ROUTEN_BULK_MAX Routen in einer Transaktion (Offline-Sync)
+
+    Body: ``{"routes": [...]}`` mit Einträgen im Format von ``routen/speichern/``
+    und optionalem ``idempotency_key`` pro Route. Bereits gespeicherte
+    Schlüssel liefern die vorhandene Route (``created: false``).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        eintraege = request.data.get("routes") if isinstance(request.data, dict) else None
+        if not isinstance(eintraege, list) or not eintraege:
+            return Response({"detail": "Liste 'routes' erwartet."}, status=400)
+        if len(eintraege) > ROUTEN_BULK_MAX:
+            return Response({"detail": f"Höchstens {ROUTEN_BULK_MAX} Routen pro Request."}, status=400)
+
+        serializer = RouteSpeichernSerializer(data=eintraege, many=True)
+        if not serializer.is_valid():
+            return Response(
+                {"detail": "Ungültige Routen.", "errors": serializer.errors},
+                status=400
+            )
+
+        ergebnisse, fehler = RoutenSpeichern.bulk(request.user, serializer.validated_data)
+        if fehler:
+            return Response({"detail": "Stadion oder Parkplatz nicht gefunden.", "errors": fehler}, status=400)
+
+        angelegt = sum(1 for ergebnis in ergebnisse if ergebnis["created"])
+        return Response(
+            {
+                "created": angelegt,
+                "duplicates": len(ergebnisse) - angelegt,
+                "routes": ergebnisse,
+            },
+            status=201 if angelegt else 200
+        )
+
+
 class ProfilView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         try:
             profil = request.user.profil
-            lieblingsverein = profil.lieblingsverein
-            stadion = lieblingsverein.stadien.first() if lieblingsverein else None
+            katalog = Katalog.snapshot()
+            lieblingsverein = katalog.daten["verein"].get(profil.lieblingsverein_id)
+            stadion = katalog.stadion_fuer_verein(profil.lieblingsverein_id) if lieblingsverein else None
             
             return Response(
                 {
                     "username": request.user.username,
                     "email": request.user.email,
-                    "lieblingsverein": VereinSerializer(lieblingsverein).data if lieblingsverein else None,
-                    "stadion": StadionSerializer(stadion).data if stadion else None,
+                    "lieblingsverein": lieblingsverein,
+                    "stadion": katalog.daten["stadion"][stadion.id] if stadion else None,
                     "member_since": request.user.date_joined.isoformat(),
                     "profile_complete": bool(lieblingsverein and stadion)
                 }
@@ -263,7 +545,7 @@ def google_route_details(request):
         )
 
     # Google Directions API für detaillierte Wegbeschreibungen
-    url = "https://maps.googleapis.com/maps/api/directions/json"
+    url = f"{settings.GOOGLE_MAPS_API_BASE_URL}/directions/json"
     params = {
         "origin": start,
         "destination": ziel,
@@ -274,9 +556,9 @@ def google_route_details(request):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        with track_upstream("google_directions", mode) as call:
+            data = get_json("google_directions", mode, url, params, 10)
+            call["error"] = data["status"] != "OK"
         
         if data["status"] != "OK":
             return Response(
@@ -458,32 +740,11 @@ def dashboard_stats(request):
     """
     try:
         user = request.user
-        routen = Route.objects.filter(benutzer=user)
-        
-        # Grundlegende Statistiken
-        total_routes = routen.count()
-        
-        if total_routes > 0:
-            avg_duration = routen.aggregate(
-                avg_dur=models.Avg('dauer_minuten')
-            )['avg_dur'] or 0
-            
-            # Lieblings-Parkplatz (häufigster)
-            favorite_parking = routen.values('parkplatz__name').annotate(
-                count=models.Count('parkplatz')
-            ).order_by('-count').first()
-            
-            # Letzte Routen
-            recent_routes = RouteSerializer(
-                routen.order_by('-erstelldatum')[:5], 
-                many=True
-            ).data
-        else:
-            avg_duration = 0
-            favorite_parking = None
-            recent_routes = []
-        
-        # Live-Daten Status für Dashboard
+
+        # Routen-Kennzahlen aus der materialisierten Statistik (O(1) statt Aggregation über alle Routen)
+        routen_statistik = BenutzerStatistiken.dashboard_daten(user)
+
+        # Live-Daten Status für Dashboard - nur aus dem Cache, lädt bei Bedarf im Hintergrund nach
         live_data_status = {
             "integration_available": DORTMUND_INTEGRATION_AVAILABLE,
             "city": "Dortmund",
@@ -493,7 +754,7 @@ def dashboard_stats(request):
         
         if DORTMUND_INTEGRATION_AVAILABLE:
             try:
-                live_data_list = DortmundParkingData.fetch_live_parking_data()
+                live_data_list = DortmundParkingData.cached_live_parking_data()
                 if live_data_list:
                     live_data_status.update({
                         "last_check": "erfolgreiche Verbindung",
@@ -502,7 +763,7 @@ def dashboard_stats(request):
                     })
                 else:
                     live_data_status.update({
-                        "last_check": "keine Daten verfügbar",
+                        "last_check": "keine Daten im Cache - werden geladen",
                         "status": "no_data"
                     })
             except Exception as e:
@@ -512,10 +773,7 @@ def dashboard_stats(request):
                 })
         
         return Response({
-            "total_routes": total_routes,
-            "avg_duration_minutes": round(avg_duration) if avg_duration else 0,
-            "favorite_parking": favorite_parking.get('parkplatz__name') if favorite_parking else None,
-            "recent_routes": recent_routes,
+            **routen_statistik,
             "profile_completion": {
                 "has_favorite_club": bool(user.profil.lieblingsverein),
                 "has_stadium": bool(user.profil.lieblingsverein and user.profil.lieblingsverein.stadien.exists()),
@@ -551,6 +809,10 @@ def performance_analysis(request):
                 "message": "Keine Performance-Daten verfügbar. Führen Sie zuerst eine Routenberechnung durch."
             })
         
+        # Kritischer Pfad und Optimierungspotenzial aus den aufgezeichneten Spans
+        trace_spans = tracer.get_trace(summary["session_info"]["trace_id"]) if summary["session_info"].get("trace_id") else None
+        trace_analyse = analysiere_trace(trace_spans, tracer.traces()) if trace_spans else None
+        
         # Erweiterte Analyse für Masterarbeit
         analysis = {
             "session_overview": summary["session_info"],
@@ -563,15 +825,21 @@ def performance_analysis(request):
                 "operations_per_second": len(summary["session_info"]) / summary["session_info"]["total_duration"] if summary["session_info"]["total_duration"] > 0 else 0,
                 "api_call_efficiency": calculate_api_efficiency(summary["operation_breakdown"]),
                 "parallelization_potential": calculate_parallelization_potential(summary["operation_breakdown"]),
-                "scalability_projection": project_scalability(summary["session_info"])
+                "scalability_projection": trace_analyse["scalability_projection"] if trace_analyse else None
             },
             
-            # Verbesserungsvorschläge mit Zeitschätzungen
+            # Gemessener kritischer Pfad, Überlappung und Cache-Raten
+            "trace_analysis": {
+                key: trace_analyse[key]
+                for key in ("trace_id", "measured_duration", "critical_path", "critical_path_by_operation",
+                            "measured_overlap", "cache_hit_rates", "upstream_repeat_rates")
+            } if trace_analyse else None,
+            
+            # Verbesserungsvorschläge per Replay des Span-Baums
             "optimization_potential": {
                 "current_performance": f"{summary['session_info']['total_duration']:.2f}s",
-                "with_parallelization": f"{calculate_parallel_time(summary['operation_breakdown']):.2f}s",
-                "with_caching": f"{calculate_cached_time(summary['operation_breakdown']):.2f}s",
-                "with_batch_apis": f"{calculate_batch_time(summary['operation_breakdown']):.2f}s",
+                **({name: f"{value:.2f}s" for name, value in trace_analyse["what_if"].items()} if trace_analyse
+                   else {"note": "Kein Trace für die Session verfügbar - Simulation nicht möglich"}),
                 "optimal_target": "2-4 seconds"
             }
         }
@@ -593,10 +861,22 @@ def monitoring_export(request):
     
     Liefert alle gesammelten Monitoring-Daten im wissenschaftlichen Format
     für statistische Auswertung und Dokumentation.
+    
+    Mit ``?source=store`` (optional ``since``/``until``, z.B. ``24h`` oder ISO-Datum)
+    stammen die Sessions aus dem dauerhaften Store aller Worker statt aus dem
+    Speicher dieses Workers.
     """
     try:
-        # Vollständiger Export für Forschung
-        research_data = get_research_export()
+        if request.query_params.get("source") == "store":
+            try:
+                since = parse_zeitpunkt(request.query_params.get("since"))
+                until = parse_zeitpunkt(request.query_params.get("until"))
+            except ValueError:
+                return Response({"detail": "since/until: relative Angabe (z.B. 24h, 7d) oder ISO-Datum erwartet."}, status=400)
+            research_data = forschungsdaten_aus_store(since, until)
+        else:
+            # Vollständiger Export für Forschung
+            research_data = get_research_export()
         
         # Zusätzliche Metadaten für Masterarbeit
         enhanced_research_data = {
@@ -634,194 +914,185 @@ def monitoring_export(request):
         }, status=500)
 
 
-# Hilfsfunktionen für wissenschaftliche Analyse
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def streaming_export(request):
+    """
+    Streaming-Export für lange Zeiträume (Staff)
+
+    ``dataset``: ``routes`` (anonymisierte Routen-Historie), ``sessions`` oder
+    ``operations`` (Monitoring aus dem Performance-Store aller Worker).
+    ``output``: ``csv`` (Standard), ``parquet`` oder ``arrow`` (benötigen pyarrow).
+    Filter: ``since``/``until`` (z.B. ``7d`` oder ISO-Datum) und ``stadion`` (ID).
+    Die Daten werden blockweise gelesen und ausgegeben, statt die gesamte
+    Antwort im Speicher aufzubauen.
+    """
+    dataset = request.query_params.get("dataset", "routes")
+    # "format" ist bei DRF für die Content-Negotiation reserviert
+    ausgabe = request.query_params.get("output", "csv")
+    try:
+        StreamingExport.pruefen(dataset, ausgabe)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+    try:
+        since = parse_zeitpunkt(request.query_params.get("since"))
+        until = parse_zeitpunkt(request.query_params.get("until"))
+    except ValueError:
+        return Response({"detail": "since/until: relative Angabe (z.B. 24h, 7d) oder ISO-Datum erwartet."}, status=400)
+
+    stadion = None
+    stadion_id = request.query_params.get("stadion")
+    if stadion_id:
+        stadion = Stadion.objects.filter(pk=stadion_id).first() if stadion_id.isdigit() else None
+        if stadion is None:
+            return Response({"detail": "Stadion nicht gefunden."}, status=404)
+
+    response = StreamingHttpResponse(
+        StreamingExport.stream(dataset, ausgabe, since, until, stadion),
+        content_type=StreamingExport.content_type(ausgabe),
+    )
+    response["Content-Disposition"] = f'attachment; filename="{StreamingExport.dateiname(dataset, ausgabe)}"'
+    return response
 
-def calculate_api_efficiency(operation_breakdown: Dict[str, Dict]) -> Dict[str, Any]:
-    """Berechnet API-Effizienz-Metriken"""
-    api_operations = {k: v for k, v in operation_breakdown.items() 
-                     if any(term in k.lower() for term in ['google', 'api', 'dortmund', 'gpt'])}
-    
-    total_api_time = sum(op["total_time"] for op in api_operations.values())
-    total_api_calls = sum(op["count"] for op in api_operations.values())
-    
-    return {
-        "total_api_time_seconds": round(total_api_time, 2),
-        "total_api_calls": total_api_calls,
-        "average_api_latency": round(total_api_time / total_api_calls, 2) if total_api_calls > 0 else 0,
-        "api_time_percentage": round((total_api_time / sum(op["total_time"] for op in operation_breakdown.values())) * 100, 1),
-        "efficiency_rating": "poor" if total_api_time > 20 else "fair" if total_api_time > 10 else "good"
-    }
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def trace_list(request):
+    """
+    Übersicht der zuletzt abgeschlossenen Traces (Ring-Buffer des Workers)
+    """
+    try:
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"detail": "limit muss eine Zahl sein."}, status=400)
+    return Response({"traces": tracer.recent_traces(limit)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def trace_detail(request, trace_id):
+    """
+    Alle Spans eines Traces als OTLP/JSON (z.B. für Jaeger/Tempo-Import)
+    """
+    spans = tracer.get_trace(trace_id)
+    if not spans:
+        return Response({"detail": "Trace nicht gefunden."}, status=404)
+    return Response(otlp_payload(spans))
 
-def calculate_parallelization_potential(operation_breakdown: Dict[str, Dict]) -> Dict[str, Any]:
-    """Berechnet das Potenzial für Parallelisierung"""
-    parallelizable_ops = {k: v for k, v in operation_breakdown.items() 
-                         if 'google_directions' in k or 'live_data' in k}
-    
-    sequential_time = sum(op["total_time"] for op in parallelizable_ops.values())
-    parallel_time = max(op["max_time"] for op in parallelizable_ops.values()) if parallelizable_ops else 0
-    
-    time_savings = sequential_time - parallel_time
-    improvement_percentage = (time_savings / sequential_time * 100) if sequential_time > 0 else 0
-    
-    return {
-        "current_sequential_time": round(sequential_time, 2),
-        "estimated_parallel_time": round(parallel_time, 2),
-        "potential_time_savings": round(time_savings, 2),
-        "improvement_percentage": round(improvement_percentage, 1),
-        "parallelizable_operations": len(parallelizable_ops),
-        "recommendation": "High Priority" if improvement_percentage > 50 else "Medium Priority" if improvement_percentage > 25 else "Low Priority"
-    }
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def performance_what_if(request):
+    """
+    What-if Simulation auf einem aufgezeichneten Trace
 
-def project_scalability(session_info: Dict[str, Any]) -> Dict[str, Any]:
-    """Projiziert Skalierbarkeit für verschiedene Parkplatz-Anzahlen"""
-    current_count = session_info.get("context", {}).get("parking_count", 1)
-    current_time = session_info["total_duration"]
+    Query-Parameter: trace_id (Standard: letzte Session), concurrency
+    (max. SIMULATION_MAX_CONCURRENCY), cache_hit_rate (0-1), batching,
+    parallelize, fanout (max. SIMULATION_MAX_FANOUT)
+    """
+    params = request.query_params
+    trace_id = params.get("trace_id")
+    if not trace_id:
+        letzte_session = performance_monitor.metrics[-1] if performance_monitor.metrics else None
+        trace_id = letzte_session.get("trace_id") if letzte_session else None
     
-    # Lineare Skalierung (worst case)
-    time_per_parking = current_time / current_count if current_count > 0 else current_time
+    spans = tracer.get_trace(trace_id) if trace_id else None
+    if not spans:
+        return Response({"detail": "Trace nicht gefunden."}, status=404)
     
-    projections = {}
-    for count in [5, 10, 15, 20, 50]:
-        linear_time = time_per_parking * count
-        projections[f"{count}_parkplaetze"] = {
-            "linear_scaling": round(linear_time, 1),
-            "with_parallelization": round(linear_time * 0.2, 1),  # 80% Verbesserung
-            "with_full_optimization": round(linear_time * 0.1, 1),  # 90% Verbesserung
-            "usability": "good" if linear_time * 0.1 < 5 else "acceptable" if linear_time * 0.1 < 10 else "poor"
-        }
+    try:
+        concurrency = int(params["concurrency"]) if params.get("concurrency") else None
+        cache_hit_rate = float(params["cache_hit_rate"]) if params.get("cache_hit_rate") else None
+        fanout = int(params["fanout"]) if params.get("fanout") else None
+    except ValueError:
+        return Response({"detail": "concurrency, cache_hit_rate und fanout müssen Zahlen sein."}, status=400)
     
-    return projections
-
-
-def calculate_parallel_time(operation_breakdown: Dict[str, Dict]) -> float:
-    """Schätzt Zeit mit Parallelisierung"""
-    google_ops = [op for name, op in operation_breakdown.items() if 'google_directions' in name]
-    if not google_ops:
-        return sum(op["total_time"] for op in operation_breakdown.values())
+    if (concurrency is not None and concurrency < 1) or (fanout is not None and fanout < 1) \
+            or (cache_hit_rate is not None and not 0 <= cache_hit_rate <= 1):
+        return Response({"detail": "Ungültige Simulationsparameter."}, status=400)
+    if (fanout or 0) > SIMULATION_MAX_FANOUT or (concurrency or 0) > SIMULATION_MAX_CONCURRENCY:
+        return Response({
+            "detail": f"Höchstens fanout={SIMULATION_MAX_FANOUT} und concurrency={SIMULATION_MAX_CONCURRENCY}."
+        }, status=400)
     
-    # Max Zeit der parallelisierbaren Operationen + serielle Operationen
-    max_parallel_time = max(op["max_time"] for op in google_ops)
-    serial_time = sum(op["total_time"] for name, op in operation_breakdown.items() 
-                     if 'google_directions' not in name)
+    szenario = {
+        "concurrency": concurrency,
+        "cache_hit_rate": cache_hit_rate,
+        "batching": params.get("batching", "false").lower() == "true",
+        "parallelize_siblings": params.get("parallelize", "false").lower() == "true",
+        "fanout": fanout,
+    }
+    root = build_span_tree(spans)
     
-    return max_parallel_time + serial_time
+    return Response({
+        "trace_id": trace_id,
+        "measured_duration": round(root.duration, 4),
+        "replay_baseline": round(simulate(root), 4),
+        "scenario": szenario,
+        "simulated_duration": round(simulate(root, **szenario), 4),
+    })
 
 
-def calculate_cached_time(operation_breakdown: Dict[str, Dict]) -> float:
-    """Schätzt Zeit mit Caching (wiederholte Operationen)"""
-    total_time = sum(op["total_time"] for op in operation_breakdown.values())
-    
-    # Annahme: 70% der wiederholten API-Calls können gecacht werden
-    cached_savings = 0
-    for op in operation_breakdown.values():
-        if op["count"] > 1:
-            cached_savings += op["total_time"] * 0.7
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profile_list(request):
+    """
+    Gespeicherte Request-Profile (neueste zuerst)
     
-    return max(total_time - cached_savings, total_time * 0.3)
+    Profiling per Header ``X-Profile: 1`` (Staff) oder PROFILING_SAMPLE_RATE.
+    """
+    return Response({"profiles": ProfileStore.liste()})
 
 
-def calculate_batch_time(operation_breakdown: Dict[str, Dict]) -> float:
-    """Schätzt Zeit mit Batch-API-Requests"""
-    # Google Distance Matrix API kann multiple Ziele in einem Request
-    google_ops = [op for name, op in operation_breakdown.items() if 'google_directions' in name]
-    
-    if not google_ops:
-        return sum(op["total_time"] for op in operation_breakdown.values())
-    
-    # Batch-Request: 3-5 einzelne Requests → 1 Batch-Request
-    google_time = sum(op["total_time"] for op in google_ops)
-    batch_time = google_time * 0.3  # 70% Zeitersparnis durch Batching
-    
-    other_time = sum(op["total_time"] for name, op in operation_breakdown.items() 
-                    if 'google_directions' not in name)
-    
-    return batch_time + other_time
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profile_detail(request, profile_id):
+    """
+    Folded-Stacks eines Profils - direkt nutzbar mit flamegraph.pl, speedscope oder inferno
+    """
+    folded = ProfileStore.laden(profile_id)
+    if folded is None:
+        return Response({"detail": "Profil nicht gefunden."}, status=404)
+    return HttpResponse(folded, content_type="text/plain; charset=utf-8")
 
 
-def generate_statistical_analysis(research_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Generiert statistische Auswertung für Masterarbeit"""
-    sessions = research_data.get("all_sessions", [])
-    
-    if not sessions:
-        return {"error": "Keine Sessions für Analyse verfügbar"}
-    
-    durations = [s["total_duration"] for s in sessions]
-    
-    return {
-        "session_count": len(sessions),
-        "duration_statistics": {
-            "mean": round(sum(durations) / len(durations), 2),
-            "min": round(min(durations), 2),
-            "max": round(max(durations), 2),
-            "median": round(sorted(durations)[len(durations)//2], 2)
-        },
-        "performance_classification": {
-            "excellent": sum(1 for d in durations if d < 5),
-            "good": sum(1 for d in durations if 5 <= d < 10),
-            "acceptable": sum(1 for d in durations if 10 <= d < 20),
-            "poor": sum(1 for d in durations if d >= 20)
-        }
-    }
+@require_safe
+def catalog_snapshot(request):
+    """
+    Alle Vereine, Stadien und Parkplätze in einer Antwort (vorberechnet, gzip)
 
+    ETag und ``X-Catalog-Version`` tragen den Katalog-Stempel. Mit
+    ``?v=<Stempel>`` ist die Antwort unveränderlich und wird langfristig
+    gecacht; ohne bzw. mit veraltetem ``v`` gilt KATALOG_CACHE_MAX_AGE.
+    """
+    payload = Katalog.payload()
+    komprimiert = bool(re.search(r"\bgzip\b", request.headers.get("Accept-Encoding", "")))
+    etag = quote_etag(f"{payload.stempel}-gzip" if komprimiert else payload.stempel)
 
-def analyze_performance_trends(research_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Analysiert Performance-Trends über Zeit"""
-    sessions = research_data.get("all_sessions", [])
-    
-    if len(sessions) < 2:
-        return {"note": "Mindestens 2 Sessions für Trend-Analyse erforderlich"}
-    
-    # Chronologische Sortierung
-    sorted_sessions = sorted(sessions, key=lambda x: x.get("start_datetime", ""))
-    
-    recent_avg = sum(s["total_duration"] for s in sorted_sessions[-3:]) / min(3, len(sorted_sessions))
-    early_avg = sum(s["total_duration"] for s in sorted_sessions[:3]) / min(3, len(sorted_sessions))
-    
-    trend = "improving" if recent_avg < early_avg else "stable" if abs(recent_avg - early_avg) < 1 else "degrading"
-    
-    return {
-        "trend_direction": trend,
-        "early_average": round(early_avg, 2),
-        "recent_average": round(recent_avg, 2),
-        "performance_change": round(((recent_avg - early_avg) / early_avg) * 100, 1) if early_avg > 0 else 0
-    }
+    if _etag_passt(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload.gzip if komprimiert else payload.json, content_type="application/json")
+        if komprimiert:
+            response["Content-Encoding"] = "gzip"
 
+    _katalog_cache_header(response, etag, settings.KATALOG_CACHE_MAX_AGE)
+    if request.GET.get("v") == payload.stempel:
+        response["Cache-Control"] = f"public, max-age={KATALOG_VERSIONIERT_MAX_AGE}, immutable"
+    response["Vary"] = "Accept-Encoding"
+    response["X-Catalog-Version"] = payload.stempel
+    return response
+
+
+def metrics_view(request):
+    """
+    OpenMetrics/Prometheus Endpoint
+
+    Request-Latenzen pro View, Upstream-Latenzen und -Fehler, Cache-Hit-Raten,
+    Alter der Live-Daten und laufende Requests - aggregiert über alle Worker.
+    """
+    return HttpResponse(render_openmetrics(), content_type=OPENMETRICS_CONTENT_TYPE)
 
-def generate_production_recommendations(research_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Generiert Empfehlungen für Produktivsystem"""
-    avg_duration = research_data.get("aggregated_statistics", {}).get("avg_session_duration", 0)
-    
-    recommendations = []
-    
-    if avg_duration > 15:
-        recommendations.append({
-            "priority": "CRITICAL",
-            "area": "Architecture",
-            "recommendation": "Implementierung von asynchroner Verarbeitung und Parallelisierung",
-            "expected_improvement": "70-80% Zeitreduktion",
-            "implementation_effort": "High"
-        })
-    
-    if avg_duration > 10:
-        recommendations.append({
-            "priority": "HIGH", 
-            "area": "API Optimization",
-            "recommendation": "Google Distance Matrix API für Batch-Requests nutzen",
-            "expected_improvement": "40-60% weniger API-Calls",
-            "implementation_effort": "Medium"
-        })
-    
-    recommendations.append({
-        "priority": "MEDIUM",
-        "area": "Caching",
-        "recommendation": "Redis-basiertes Caching für Routenberechnungen (5-15min TTL)",
-        "expected_improvement": "85-95% bei wiederholten Anfragen",
-        "implementation_effort": "Low"
-    })
-    
-    return recommendations
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -833,32 +1104,19 @@ def research_data_export(request):
     ohne persönliche Informationen preiszugeben.
     """
     try:
-        # Allgemeine Nutzungsstatistiken (anonymisiert)
-        total_users = User.objects.count()
-        total_routes = Route.objects.count()
-        
-        # Stadion-bezogene Statistiken  
-        stadion_stats = Route.objects.values('stadion__name').annotate(
-            route_count=models.Count('id'),
-            avg_duration=models.Avg('dauer_minuten'),
-            unique_users=models.Count('benutzer', distinct=True)
-        ).order_by('-route_count')
-        
-        # Parkplatz-Nutzung
-        parkplatz_stats = Route.objects.values('parkplatz__name').annotate(
-            usage_count=models.Count('id')
-        ).order_by('-usage_count')[:10]
+        # Nutzungsstatistiken (anonymisiert) aus den Tages-Rollups, nur der laufende Tag wird live aggregiert
+        usage_statistics = RouteRollups.export_statistiken()
         
         # Live-Daten Verfügbarkeit
         live_data_info = {
             "integration_available": DORTMUND_INTEGRATION_AVAILABLE,
             "data_source": "Dortmund Open Data Portal",
-            "api_endpoint": "https://open-data.dortmund.de/api/explore/v2.1/catalog/datasets/parkhauser/records"
+            "api_endpoint": settings.DORTMUND_API_URL
         }
         
         if DORTMUND_INTEGRATION_AVAILABLE:
             try:
-                live_locations = DortmundParkingData.fetch_live_parking_data()
+                live_locations = DortmundParkingData.cached_live_parking_data()
                 live_data_info.update({
                     "current_locations": len(live_locations) if live_locations else 0,
                     "status": "operational" if live_locations else "no_data"
@@ -873,12 +1131,7 @@ def research_data_export(request):
                 "purpose": "Masterarbeit - Optimierung der Fan-Anreise durch datengetriebene Technologien",
                 "data_privacy": "Alle Daten anonymisiert, keine persönlichen Informationen"
             },
-            "usage_statistics": {
-                "total_users": total_users,
-                "total_routes_calculated": total_routes,
-                "stadion_preferences": list(stadion_stats),
-                "popular_parking": list(parkplatz_stats)
-            },
+            "usage_statistics": usage_statistics,
             "live_data_integration": live_data_info,
             "api_capabilities": {
                 "routing_engine": "Google Maps Directions API",
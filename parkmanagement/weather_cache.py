@@ -0,0 +1,168 @@
+# parkmanagement/weather_cache.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .metrics import track_cache_lookup
+from .upstream import cached_value
+
+logger = logging.getLogger(__name__)
+
+# Cache-Konfiguration
+WEATHER_CACHE_TIMEOUT = 600  # 10 Minuten - Wetter ändert sich im 10-Minuten-Takt
+WEATHER_REFRESH_INTERVAL = 300  # Hintergrund-Refresh alle 5 Minuten
+WEATHER_REFRESH_WORKERS = 8  # Parallele Wetter-Requests pro Refresh
+
+WETTER_FALLBACK = {
+    "temperatur": None,
+    "beschreibung": "Wetter nicht verfügbar",
+    "verkehr_einfluss": 0,
+    "formatted": "Wetter nicht verfügbar",
+}
+
+
+class StadionWetterCache:
+    """
+    Wetter-Cache pro Stadion mit TTL und Hintergrund-Aktualisierung.
+
+    Der Request-Pfad liest ausschließlich aus dem Cache und blockiert nie
+    auf der OpenWeatherMap API. Fehlende Einträge werden im Hintergrund
+    nachgeladen, ein periodischer Refresher hält alle aktiven Stadien warm.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=WEATHER_REFRESH_WORKERS, thread_name_prefix="wetter-refresh")
+    _lock = threading.Lock()
+    _in_flight = set()
+    _refresher_thread = None
+
+    @staticmethod
+    def _cache_key(stadion_id: int) -> str:
+        return f"stadion_wetter_{stadion_id}"
+
+    @staticmethod
+    def get(stadion) -> Dict[str, Any]:
+        """
+        Liefert das gecachte Wetter für ein Stadion ohne API-Call.
+
+        Bei einem Cache-Miss wird ein Refresh im Hintergrund angestoßen und
+        sofort der Fallback zurückgegeben.
+        """
+        StadionWetterCache.ensure_refresher_started()
+
+        with track_cache_lookup("stadion_wetter") as lookup:
+            cache_key = StadionWetterCache._cache_key(stadion.id)
+            cached = cached_value("stadion_wetter", cache_key, cache.get(cache_key))
+            lookup["hit"] = bool(cached)
+        if cached:
+            return cached
+
+        logger.info(f"🌦️ Kein Wetter im Cache für {stadion.name} - lade im Hintergrund")
+        StadionWetterCache.refresh_async(stadion.id, stadion.latitude, stadion.longitude)
+        return dict(WETTER_FALLBACK)
+
+    @staticmethod
+    def refresh_async(stadion_id: int, lat, lng):
+        """Plant einen Refresh für ein einzelnes Stadion (dedupliziert)."""
+        with StadionWetterCache._lock:
+            if stadion_id in StadionWetterCache._in_flight:
+                return None
+            StadionWetterCache._in_flight.add(stadion_id)
+
+        return StadionWetterCache._executor.submit(
+            StadionWetterCache._refresh_single, stadion_id, lat, lng
+        )
+
+    @staticmethod
+    def _refresh_single(stadion_id: int, lat, lng) -> Optional[Dict[str, Any]]:
+        from .utils import hole_wetter_mit_verkehrseinfluss
+
+        try:
+            wetter_data = hole_wetter_mit_verkehrseinfluss(lat, lng)
+
+            # Fehlerantworten nicht cachen, damit der nächste Refresh es erneut versucht
+            if wetter_data.get("temperatur") is None:
+                return None
+
+            wetter_data["abgerufen_um"] = datetime.now().isoformat()
+            cache.set(StadionWetterCache._cache_key(stadion_id), wetter_data, WEATHER_CACHE_TIMEOUT)
+            return wetter_data
+
+        except Exception as e:
+            logger.error(f"❌ Wetter-Refresh für Stadion {stadion_id} fehlgeschlagen: {e}")
+            return None
+
+        finally:
+            with StadionWetterCache._lock:
+                StadionWetterCache._in_flight.discard(stadion_id)
+
+    @staticmethod
+    def refresh_all(stadien: Iterable = None) -> int:
+        """
+        Aktualisiert das Wetter aller aktiven Stadien parallel.
+
+        Aktiv sind Stadien mit mindestens einem Parkplatz, da nur diese in
+        Routenvorschlägen auftauchen.
+
+        Returns:
+            int: Anzahl erfolgreich aktualisierter Stadien (ohne bereits laufende Refreshes)
+        """
+        from .models import Stadion
+
+        if stadien is None:
+            stadien = Stadion.objects.filter(parkplaetze__isnull=False).distinct()
+
+        koordinaten = [(s.id, s.latitude, s.longitude) for s in stadien]
+        if not koordinaten:
+            return 0
+
+        start_time = time.time()
+        futures = [
+            StadionWetterCache.refresh_async(stadion_id, lat, lng)
+            for stadion_id, lat, lng in koordinaten
+        ]
+
+        # Ein bereits laufender Refresh (z.B. nach Cache-Miss) ist kein Fehler
+        laufend = sum(1 for future in futures if future is None)
+        erfolgreich = sum(1 for future in futures if future is not None and future.result() is not None)
+
+        logger.info(
+            f"🌦️ Wetter für {erfolgreich}/{len(koordinaten) - laufend} Stadien in {time.time() - start_time:.2f}s "
+            f"aktualisiert ({laufend} bereits in Arbeit)"
+        )
+        return erfolgreich
+
+    @staticmethod
+    def ensure_refresher_started():
+        """Startet den periodischen Refresher genau einmal pro Prozess."""
+        if StadionWetterCache._refresher_thread is not None:
+            return
+
+        with StadionWetterCache._lock:
+            if StadionWetterCache._refresher_thread is not None:
+                return
+
+            thread = threading.Thread(
+                target=StadionWetterCache._refresher_loop,
+                name="wetter-refresher",
+                daemon=True,
+            )
+            StadionWetterCache._refresher_thread = thread
+            thread.start()
+
+    @staticmethod
+    def _refresher_loop():
+        while True:
+            try:
+                StadionWetterCache.refresh_all()
+            except Exception as e:
+                logger.error(f"❌ Wetter-Refresher Fehler: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(WEATHER_REFRESH_INTERVAL)